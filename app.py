@@ -3,25 +3,41 @@ Moulya College Management System
 Main Flask application entry point
 """
 
-from flask import Flask
-from flask_wtf.csrf import CSRFProtect
+from decimal import Decimal
+from flask import Flask, g
+from flask_wtf.csrf import CSRFProtect, generate_csrf
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
-from database import db, init_db
+from database import db, init_db, is_bootstrapped, register_sqlite_pragmas, configure_logging
 
 def create_app():
     """Application factory pattern"""
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Behind a reverse proxy, take the client address from X-Forwarded-For so the
+    # login throttle keys on real clients rather than the proxy
+    proxy_count = app.config['TRUSTED_PROXY_COUNT']
+    if proxy_count:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_count, x_proto=proxy_count)
+    
     # Initialize extensions with app
     db.init_app(app)
+    with app.app_context():
+        register_sqlite_pragmas(db.engine)
     csrf = CSRFProtect(app)
     
     # Add CSRF token to template context
     @app.context_processor
     def inject_csrf_token():
-        from flask_wtf.csrf import generate_csrf
-        return dict(csrf_token=generate_csrf)
+        def csrf_token():
+            # Sign the token once per request, however many forms the page renders
+            token = getattr(g, '_csrf_tok', None)
+            if token is None:
+                token = generate_csrf()
+                g._csrf_tok = token
+            return token
+        return dict(csrf_token=csrf_token)
     
     # Register blueprints
     from routes.auth import auth_bp
@@ -32,9 +48,6 @@ def create_app():
     app.register_blueprint(management_bp, url_prefix='/management')
     app.register_blueprint(lecturer_bp, url_prefix='/lecturer')
     
-    # Initialize database
-    init_db(app)
-    
     # Jinja filter: format numbers so 34.0 -> 34, round 34.5 to 34.50
     @app.template_filter('format_mark')
     def format_mark(value):
@@ -42,6 +55,13 @@ def create_app():
             # Handle None or empty gracefully
             if value is None or value == "":
                 return ""
+            # Fast paths: whole ints and Decimals skip the float round-trip
+            if type(value) is int:
+                return str(value)
+            if isinstance(value, Decimal):
+                if value == value.to_integral_value():
+                    return str(int(value))
+                return f"{value:.2f}"
             number = float(value)
             # If it's an integer value (like 34.0), return without decimals
             if number.is_integer():
@@ -55,6 +75,10 @@ def create_app():
     return app
 
 if __name__ == '__main__':
+    configure_logging()
     app = create_app()
+    # Schema setup lives in `python init_db.py`; the dev server only bootstraps an empty database
+    if not is_bootstrapped(app):
+        init_db(app)
     app.run(host='0.0.0.0', port=8020, debug=True, use_reloader=False)
 
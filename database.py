@@ -3,79 +3,230 @@ Database configuration and initialization for Moulya College Management System
 """
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import event
-from sqlalchemy.engine import Engine
-import sqlite3
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.schema import CreateColumn
+import logging
+import os
+
+logger = logging.getLogger(__name__)
 
 # Initialize SQLAlchemy instance
 db = SQLAlchemy()
 
-@event.listens_for(Engine, "connect")
+# Connection-level tuning applied to every SQLite connection:
+# NORMAL sync (safe under WAL), a ~20MB page cache, in-memory temp tables,
+# a 256MB mmap window and a busy timeout so writers wait instead of failing.
+SQLITE_PRAGMAS = """
+PRAGMA synchronous=NORMAL;
+PRAGMA foreign_keys=ON;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-20000;
+PRAGMA mmap_size=268435456;
+PRAGMA busy_timeout=5000;
+"""
+
 def set_sqlite_pragma(dbapi_connection, connection_record):
-    """Enable foreign key constraints for SQLite"""
-    if isinstance(dbapi_connection, sqlite3.Connection):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
+    """Enable foreign key constraints and performance pragmas for SQLite"""
+    cursor = dbapi_connection.cursor()
+    # WAL only applies to file-backed databases, not sqlite:///:memory:
+    main_db = cursor.execute("PRAGMA database_list").fetchone()
+    if main_db and main_db[2]:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.executescript(SQLITE_PRAGMAS)
+    cursor.close()
+
+def register_sqlite_pragmas(engine):
+    """Attach set_sqlite_pragma to a SQLite engine; other dialects never dispatch it"""
+    if engine.dialect.name == 'sqlite' and not event.contains(engine, 'connect', set_sqlite_pragma):
+        event.listen(engine, 'connect', set_sqlite_pragma)
+    return engine
+
+def make_engine(uri=None):
+    """Build a bare Engine from Config without creating the Flask app.
+
+    Relative SQLite paths resolve against the instance folder, matching Flask-SQLAlchemy.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import make_url
+    from config import Config
+    
+    url = make_url(uri or Config.SQLALCHEMY_DATABASE_URI)
+    if url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:') \
+            and not os.path.isabs(url.database):
+        instance_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+        os.makedirs(instance_path, exist_ok=True)
+        url = url.set(database=os.path.join(instance_path, url.database))
+    return register_sqlite_pragmas(create_engine(url))
+
+def configure_logging():
+    """Log to stderr from command-line entry points; MOULYA_QUIET=1 keeps only warnings"""
+    logging.basicConfig(
+        format='%(message)s',
+        level=logging.WARNING if os.environ.get('MOULYA_QUIET') == '1' else logging.INFO
+    )
+
+def is_bootstrapped(app):
+    """Return True if the configured database already has the schema"""
+    with app.app_context():
+        return sa_inspect(db.engine).has_table('management')
 
 def init_db(app):
     """Initialize database with application context"""
     with app.app_context():
-        # Import all models to ensure they are registered
-        from models import (
-            Management, Lecturer, Course, Subject, AcademicYear,
-            Student, StudentEnrollment, AttendanceRecord,
-            MonthlyAttendanceSummary, StudentMarks, SubjectAssignment
-        )
-        
-        # Create all tables
-        db.create_all()
-        
-        # Create default management user if not exists
-        create_default_management_user()
-        
-        print("Database initialized successfully!")
+        ensure_schema()
+        logger.info("Database initialized successfully!")
+
+def ensure_schema():
+    """Create and upgrade the schema; requires an active application context"""
+    # Import all models to ensure they are registered
+    from models import (
+        Management, Lecturer, Course, Subject, AcademicYear,
+        Student, StudentEnrollment, AttendanceRecord,
+        MonthlyAttendanceSummary, StudentMarks, SubjectAssignment
+    )
+    
+    # Create all tables
+    db.create_all()
+    
+    # Bring existing databases up to date with the models
+    added_columns = ensure_columns()
+    ensure_indexes()
+    
+    # Backfill attendance counters the first time they are added
+    if ('student_enrollment', 'total_count') in added_columns:
+        StudentEnrollment.refresh_attendance_counts()
+        db.session.commit()
+    if ('student', 'overall_attendance_total') in added_columns:
+        Student.refresh_overall_counts()
+        db.session.commit()
+    
+    migrate_admin_permissions()
+    
+    # Create default management user if not exists
+    create_default_management_user()
+
+def ensure_columns():
+    """Add model columns missing from existing tables.
+
+    Returns a list of (table, column) pairs that were added so callers can
+    backfill derived values.
+    """
+    added = []
+    inspector = sa_inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    with db.engine.begin() as conn:
+        preparer = conn.dialect.identifier_preparer
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_ddl}")
+                added.append((table.name, column.name))
+    return added
+
+def migrate_admin_permissions():
+    """Rewrite legacy comma-separated administrator permissions as JSON lists"""
+    from models.user import Administrator
+    
+    table = Administrator.__table__
+    # Read the stored text, since legacy values are not valid JSON
+    raw = db.cast(table.c.permissions, db.Text)
+    with db.engine.begin() as conn:
+        rows = conn.execute(
+            db.select(table.c.id, raw).where(db.or_(raw.is_(None), raw.not_like('[%')))
+        ).all()
+        if rows:
+            conn.execute(
+                table.update().where(table.c.id == db.bindparam('admin_id')),
+                [{'admin_id': admin_id,
+                  'permissions': Administrator.permissions_from_legacy(value)}
+                 for admin_id, value in rows]
+            )
+
+def ensure_indexes():
+    """Create any model indexes missing from an existing database.
+
+    db.create_all() skips tables that already exist, so indexes added to
+    __table_args__ later would never reach older databases without this.
+    """
+    with db.engine.begin() as conn:
+        existing = _existing_index_names(conn)
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(bind=conn)
+
+def _existing_index_names(conn):
+    """Names of indexes already in the database.
+
+    SQLite reflection skips expression indexes, so read sqlite_master directly there.
+    """
+    if conn.dialect.name == 'sqlite':
+        return {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    inspector = sa_inspect(conn)
+    return {index['name'] for table in inspector.get_table_names()
+            for index in inspector.get_indexes(table)}
+
+# Precomputed generate_password_hash('admin123', method='pbkdf2:sha256:50000');
+# the bootstrap credential is constant, so there is no need to hash it on every boot
+DEFAULT_ADMIN_HASH = (
+    'pbkdf2:sha256:50000$eoFSmEyodMYpxnAz$'
+    '7ff0b3981ed8c92b58b92a008586e3564231300526359b3b58bdc8088e82cc4b'
+)
 
 def create_default_management_user():
     """Create default management user for initial access"""
     from models.user import Management
-    from werkzeug.security import generate_password_hash
     
-    # Check if management user already exists
-    existing_user = Management.query.filter_by(username='admin').first()
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        insert = None
     
-    if not existing_user:
-        default_user = Management(
-            username='admin',
-            password_hash=generate_password_hash('admin123')
-        )
-        
-        try:
-            db.session.add(default_user)
-            db.session.commit()
-            print("Default management user created: admin/admin123")
-        except Exception as e:
-            db.session.rollback()
-            print(f"Error creating default user: {e}")
+    if insert is None:
+        # Check if management user already exists without hydrating an ORM object
+        existing_user = db.session.execute(
+            db.text("SELECT 1 FROM management WHERE username = :username LIMIT 1"),
+            {'username': 'admin'}
+        ).first()
+        if existing_user is not None:
+            return
+        stmt = db.insert(Management)
+    else:
+        # Single race-safe statement; parallel workers booting at once won't collide
+        stmt = insert(Management).on_conflict_do_nothing(index_elements=['username'])
+    
+    stmt = stmt.values(username='admin', password_hash=DEFAULT_ADMIN_HASH)
+    
+    try:
+        result = db.session.execute(stmt)
+        db.session.commit()
+        if result.rowcount:
+            logger.info("Default management user created: admin/admin123")
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error creating default user: %s", e)
 
 def reset_database(app):
     """Reset database - WARNING: This will delete all data"""
     with app.app_context():
-        # Disable foreign key constraints temporarily
-        db.engine.execute("PRAGMA foreign_keys=OFF")
-        
-        # Drop all tables
-        db.drop_all()
-        
-        # Re-enable foreign key constraints
-        db.engine.execute("PRAGMA foreign_keys=ON")
-        
-        # Create all tables
-        db.create_all()
+        # Keep the DDL on one connection so the per-connection PRAGMA actually applies
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            db.metadata.drop_all(bind=conn)
+            db.metadata.create_all(bind=conn)
+            conn.exec_driver_sql("PRAGMA foreign_keys=ON")
         
         # Create default management user
         create_default_management_user()
-        print("Database reset completed!")
+        logger.info("Database reset completed!")
 
 class DatabaseError(Exception):
     """Custom exception for database operations"""
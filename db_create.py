@@ -1,8 +1,14 @@
-from app import create_app
-from database import db
+import logging
+import os
+# Quiet by default; run with MOULYA_QUIET=0 to see the status line
+os.environ.setdefault('MOULYA_QUIET', '1')
+
+from database import make_engine, configure_logging
 from models.attendance import MonthlyStudentAttendance
 
-app = create_app()
-with app.app_context():
-    MonthlyStudentAttendance.__table__.create(bind=db.engine, checkfirst=True)
-    print("Created monthly_student_attendance (if missing)")
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+configure_logging()
+engine = make_engine()
+MonthlyStudentAttendance.__table__.create(bind=engine, checkfirst=True)
+logger.info("Created monthly_student_attendance (if missing)")
@@ -5,7 +5,7 @@ Run this script to set up the database with initial data
 """
 
 from app import create_app
-from database import init_db, reset_database
+from database import configure_logging, init_db, reset_database
 import sys
 
 def main():
@@ -23,4 +23,5 @@ def main():
         init_db(app)
 
 if __name__ == '__main__':
+    configure_logging()
     main()
\ No newline at end of file
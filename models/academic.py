@@ -5,6 +5,9 @@ Course, Subject, and AcademicYear models
 
 from database import db
 from datetime import datetime
+from flask import g, has_app_context
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 
 class Course(db.Model):
     """Course model for academic programs"""
@@ -21,15 +24,18 @@ class Course(db.Model):
     
     # Relationships
     students = db.relationship('Student', backref='course', lazy='dynamic')
-    subjects = db.relationship('Subject', backref='course', lazy='dynamic')
+    # Plain list so it can be eager-loaded and reused within a request;
+    # subject.course is joined in so Subject.to_dict never lazy-loads it
+    subjects = db.relationship('Subject', backref=db.backref('course', lazy='joined'))
     
     def get_subjects_by_year_semester(self, year, semester):
         """Get subjects for a specific year and semester"""
-        return self.subjects.filter_by(year=year, semester=semester).all()
+        return [subject for subject in self.subjects
+                if subject.year == year and subject.semester == semester]
     
     def get_total_subjects(self):
         """Get total number of subjects in the course"""
-        return self.subjects.count()
+        return len(self.subjects)
     
     def get_active_students_count(self):
         """Get count of active students in this course"""
@@ -50,6 +56,34 @@ class Course(db.Model):
             'active_students': self.get_active_students_count()
         }
     
+    @classmethod
+    def list_with_counts(cls):
+        """Return to_dict()-shaped rows for all courses with the counts computed in one SELECT"""
+        from models.student import Student
+        
+        total_subjects = (db.select(func.count(Subject.id))
+            .where(Subject.course_id == cls.id)
+            .correlate(cls)
+            .scalar_subquery())
+        active_students = (db.select(func.count(Student.id))
+            .where(Student.course_id == cls.id, Student.is_active == True)
+            .correlate(cls)
+            .scalar_subquery())
+        
+        rows = db.session.execute(
+            db.select(
+                cls.id, cls.name, cls.code, cls.description, cls.duration_years,
+                cls.total_semesters, cls.created_at, cls.is_active,
+                total_subjects.label('total_subjects'),
+                active_students.label('active_students')
+            ).order_by(cls.id)
+        ).mappings()
+        
+        return [{
+            **row,
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None
+        } for row in rows]
+    
     def __repr__(self):
         return f'<Course {self.code}: {self.name}>'
 
@@ -69,8 +103,9 @@ class Subject(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     
     # Relationships
-    assignments = db.relationship('SubjectAssignment', backref='subject', lazy='dynamic')
-    enrollments = db.relationship('StudentEnrollment', backref='subject', lazy='dynamic')
+    # assignment.subject is read almost everywhere an assignment is, so join it in
+    assignments = db.relationship('SubjectAssignment', backref=db.backref('subject', lazy='joined'))
+    enrollments = db.relationship('StudentEnrollment', backref='subject')
     attendance_records = db.relationship('AttendanceRecord', backref='subject', lazy='dynamic')
     monthly_summaries = db.relationship('MonthlyAttendanceSummary', backref='subject', lazy='dynamic')
     student_marks = db.relationship('StudentMarks', backref='subject', lazy='dynamic')
@@ -80,32 +115,77 @@ class Subject(db.Model):
     
     def get_assigned_lecturers(self):
         """Get all lecturers assigned to this subject"""
-        return [assignment.lecturer for assignment in self.assignments]
+        from models.assignments import SubjectAssignment
+        
+        # Load lecturers in the same statement instead of one SELECT per assignment
+        assignments = (SubjectAssignment.query
+            .options(joinedload(SubjectAssignment.lecturer))
+            .filter_by(subject_id=self.id)
+            .all())
+        return [assignment.lecturer for assignment in assignments]
     
     def get_enrolled_students(self):
         """Get all students enrolled in this subject"""
-        return [enrollment.student for enrollment in self.enrollments.filter_by(is_active=True)]
+        from models.student import StudentEnrollment
+        
+        enrollments = (StudentEnrollment.query
+            .options(joinedload(StudentEnrollment.student))
+            .filter_by(subject_id=self.id, is_active=True)
+            .all())
+        return [enrollment.student for enrollment in enrollments]
     
     def get_enrolled_students_count(self):
         """Get count of enrolled students"""
-        return self.enrollments.filter_by(is_active=True).count()
+        from models.student import StudentEnrollment
+        
+        return StudentEnrollment.query.filter_by(subject_id=self.id, is_active=True).count()
     
     def is_student_enrolled(self, student_id):
         """Check if a student is enrolled in this subject"""
-        return self.enrollments.filter_by(student_id=student_id, is_active=True).first() is not None
+        from models.student import StudentEnrollment
+        
+        return StudentEnrollment.query.filter_by(
+            subject_id=self.id, student_id=student_id, is_active=True
+        ).first() is not None
     
     def get_attendance_percentage(self, student_id):
         """Get attendance percentage for a specific student"""
-        total_classes = self.attendance_records.filter_by(student_id=student_id).count()
-        if total_classes == 0:
-            return 0
+        from models.student import StudentEnrollment
+        from models.attendance import AttendanceRecord
         
-        present_classes = self.attendance_records.filter_by(
-            student_id=student_id, 
-            status='present'
-        ).count()
+        # Read the counters kept on the enrollment row instead of scanning records
+        enrollment = StudentEnrollment.query.filter_by(
+            subject_id=self.id, student_id=student_id
+        ).first()
+        if enrollment is not None:
+            return enrollment.get_attendance_percentage()
         
-        return round((present_classes / total_classes) * 100, 2)
+        return AttendanceRecord.bulk_percentages([student_id], self.id)[student_id]
+    
+    def get_attendance_percentages(self, student_ids):
+        """Get attendance percentages for many students"""
+        from models.student import StudentEnrollment
+        from models.attendance import AttendanceRecord
+        
+        student_ids = list(student_ids)
+        percentages = {student_id: 0 for student_id in student_ids}
+        if not student_ids:
+            return percentages
+        
+        enrollments = StudentEnrollment.query.filter(
+            StudentEnrollment.subject_id == self.id,
+            StudentEnrollment.student_id.in_(student_ids)
+        ).all()
+        for enrollment in enrollments:
+            percentages[enrollment.student_id] = enrollment.get_attendance_percentage()
+        
+        # Students without an enrollment row fall back to aggregating their records
+        enrolled_ids = {enrollment.student_id for enrollment in enrollments}
+        missing_ids = [student_id for student_id in student_ids if student_id not in enrolled_ids]
+        if missing_ids:
+            percentages.update(AttendanceRecord.bulk_percentages(missing_ids, self.id))
+        
+        return percentages
     
     def to_dict(self):
         """Convert subject to dictionary"""
@@ -124,6 +204,31 @@ class Subject(db.Model):
             'enrolled_students': self.get_enrolled_students_count()
         }
     
+    @classmethod
+    def list_with_counts(cls, course_id=None):
+        """Return to_dict()-shaped rows for subjects with course name and enrollment count in one SELECT"""
+        from models.student import StudentEnrollment
+        
+        enrolled_students = (db.select(func.count(StudentEnrollment.id))
+            .where(StudentEnrollment.subject_id == cls.id, StudentEnrollment.is_active == True)
+            .correlate(cls)
+            .scalar_subquery())
+        
+        stmt = db.select(
+            cls.id, cls.name, cls.code, cls.course_id,
+            Course.name.label('course_name'),
+            cls.semester, cls.year, cls.credits, cls.description,
+            cls.created_at, cls.is_active,
+            enrolled_students.label('enrolled_students')
+        ).outerjoin(Course, Course.id == cls.course_id).order_by(cls.id)
+        if course_id is not None:
+            stmt = stmt.where(cls.course_id == course_id)
+        
+        return [{
+            **row,
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None
+        } for row in db.session.execute(stmt).mappings()]
+    
     def __repr__(self):
         return f'<Subject {self.code}: {self.name}>'
 
@@ -154,8 +259,12 @@ class AcademicYear(db.Model):
     
     @staticmethod
     def get_current_academic_year():
-        """Get the current academic year"""
-        return AcademicYear.query.filter_by(is_current=True).first()
+        """Get the current academic year (memoized on flask.g for the request)"""
+        if not has_app_context():
+            return AcademicYear.query.filter_by(is_current=True).first()
+        if '_current_academic_year' not in g:
+            g._current_academic_year = AcademicYear.query.filter_by(is_current=True).first()
+        return g._current_academic_year
     
     def to_dict(self):
         """Convert academic year to dictionary"""
@@ -18,7 +18,11 @@ class SubjectAssignment(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     
     # Unique constraint to prevent duplicate assignments
-    __table_args__ = (db.UniqueConstraint('lecturer_id', 'subject_id', 'academic_year', name='unique_lecturer_subject_year'),)
+    # Composite index backs the "active assignments for this year" lookup
+    __table_args__ = (
+        db.UniqueConstraint('lecturer_id', 'subject_id', 'academic_year', name='unique_lecturer_subject_year'),
+        db.Index('ix_sa_lect_year_active', 'lecturer_id', 'academic_year', 'is_active'),
+    )
     
     def deactivate(self):
         """Deactivate assignment"""
@@ -28,6 +32,15 @@ class SubjectAssignment(db.Model):
         """Activate assignment"""
         self.is_active = True
     
+    @staticmethod
+    def is_assigned(lecturer_id, subject_id):
+        """Check for an active assignment without loading the row"""
+        return db.session.query(SubjectAssignment.id).filter_by(
+            lecturer_id=lecturer_id,
+            subject_id=subject_id,
+            is_active=True
+        ).first() is not None
+    
     def to_dict(self):
         """Convert assignment to dictionary"""
         return {
@@ -47,4 +60,4 @@ class SubjectAssignment(db.Model):
     def __repr__(self):
         lecturer_name = self.lecturer.name if self.lecturer else "Unknown"
         subject_code = self.subject.code if self.subject else "Unknown"
-        return f'<SubjectAssignment {lecturer_name} -> {subject_code}>'
\ No newline at end of file
+        return f'<SubjectAssignment {lecturer_name} -> {subject_code}>'
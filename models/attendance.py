@@ -5,6 +5,13 @@ AttendanceRecord and MonthlyAttendanceSummary models
 
 from database import db
 from datetime import datetime, date
+from operator import attrgetter
+from sqlalchemy import event, func, case, and_, bindparam
+from sqlalchemy.orm import attributes, column_property, selectinload, Load
+
+# Plain columns copied verbatim by AttendanceRecord.to_dicts
+_RECORD_COLUMNS = ('id', 'student_id', 'subject_id', 'lecturer_id', 'status', 'remarks')
+_get_record_columns = attrgetter(*_RECORD_COLUMNS)
 
 class AttendanceRecord(db.Model):
     """Daily attendance record for students"""
@@ -15,13 +22,20 @@ class AttendanceRecord(db.Model):
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
     lecturer_id = db.Column(db.Integer, db.ForeignKey('lecturer.id'), nullable=False)
     date = db.Column(db.Date, nullable=False, default=date.today)
-    status = db.Column(db.String(10), nullable=False)  # 'present' or 'absent'
+    # 'present' or 'absent'; active_history keeps the old value for the counter deltas
+    status = column_property(db.Column(db.String(10), nullable=False), active_history=True)
     remarks = db.Column(db.String(200), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Unique constraint to prevent duplicate attendance for same student, subject, date
-    __table_args__ = (db.UniqueConstraint('student_id', 'subject_id', 'date', name='unique_student_subject_date_attendance'),)
+    # Composite indexes cover the per-subject/per-student COUNT queries and
+    # per-subject month ranges; the unique constraint already indexes (student, subject, date)
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'subject_id', 'date', name='unique_student_subject_date_attendance'),
+        db.Index('ix_att_subj_stu_status', 'subject_id', 'student_id', 'status'),
+        db.Index('ix_att_subj_date', 'subject_id', 'date'),
+    )
     
     def mark_present(self):
         """Mark student as present"""
@@ -41,35 +55,140 @@ class AttendanceRecord(db.Model):
         """Check if student was absent"""
         return self.status == 'absent'
     
+    @classmethod
+    def bulk_create(cls, rows, chunk_size=1000):
+        """Insert many attendance rows (dicts of column values) with executemany.
+
+        Bypasses the ORM write events, so the enrollment and student counters get
+        the inserted rows' deltas applied afterwards. The caller commits.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        from models.student import Student, StudentEnrollment
+        
+        stmt = db.insert(cls)
+        for start in range(0, len(rows), chunk_size):
+            db.session.execute(stmt, rows[start:start + chunk_size])
+        
+        # Sum the deltas per enrollment and per student, then apply them as
+        # counter = counter + delta in one executemany UPDATE per table
+        enrollment_deltas = {}
+        student_deltas = {}
+        for row in rows:
+            present = 1 if row['status'] == 'present' else 0
+            for deltas, key in ((enrollment_deltas, (row['student_id'], row['subject_id'])),
+                                (student_deltas, row['student_id'])):
+                total_delta, present_delta = deltas.get(key, (0, 0))
+                deltas[key] = (total_delta + 1, present_delta + present)
+        
+        enrollments = StudentEnrollment.__table__
+        db.session.execute(
+            db.update(enrollments)
+            .where(
+                enrollments.c.student_id == bindparam('b_student_id'),
+                enrollments.c.subject_id == bindparam('b_subject_id')
+            )
+            .values(
+                total_count=enrollments.c.total_count + bindparam('b_total'),
+                present_count=enrollments.c.present_count + bindparam('b_present')
+            ),
+            [{'b_student_id': student_id, 'b_subject_id': subject_id, 'b_total': total, 'b_present': present}
+             for (student_id, subject_id), (total, present) in enrollment_deltas.items()]
+        )
+        students = Student.__table__
+        db.session.execute(
+            db.update(students)
+            .where(students.c.id == bindparam('b_student_id'))
+            .values(
+                overall_attendance_total=students.c.overall_attendance_total + bindparam('b_total'),
+                overall_attendance_present=students.c.overall_attendance_present + bindparam('b_present')
+            ),
+            [{'b_student_id': student_id, 'b_total': total, 'b_present': present}
+             for student_id, (total, present) in student_deltas.items()]
+        )
+        return len(rows)
+    
+    @staticmethod
+    def in_month(month, year):
+        """Index-friendly date range predicate for a calendar month"""
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+        return and_(AttendanceRecord.date >= start, AttendanceRecord.date < end)
+    
     @staticmethod
     def get_attendance_for_month(student_id, subject_id, month, year):
         """Get attendance records for a specific month"""
         return AttendanceRecord.query.filter(
             AttendanceRecord.student_id == student_id,
             AttendanceRecord.subject_id == subject_id,
-            db.extract('month', AttendanceRecord.date) == month,
-            db.extract('year', AttendanceRecord.date) == year
+            AttendanceRecord.in_month(month, year)
         ).all()
     
     @staticmethod
     def get_attendance_percentage(student_id, subject_id, start_date=None, end_date=None):
         """Calculate attendance percentage for a student in a subject"""
-        query = AttendanceRecord.query.filter_by(
-            student_id=student_id,
-            subject_id=subject_id
+        return AttendanceRecord.bulk_percentages(
+            [student_id], subject_id, start_date, end_date
+        )[student_id]
+    
+    @classmethod
+    def bulk_percentages(cls, student_ids, subject_id, start_date=None, end_date=None):
+        """Calculate attendance percentages for many students in one grouped query"""
+        student_ids = list(student_ids)
+        percentages = {student_id: 0 for student_id in student_ids}
+        if not student_ids:
+            return percentages
+        
+        # Total and present counts come back together, one row per student
+        query = db.session.query(
+            cls.student_id,
+            func.count(cls.id),
+            func.coalesce(func.sum(case((cls.status == 'present', 1), else_=0)), 0)
+        ).filter(
+            cls.subject_id == subject_id,
+            cls.student_id.in_(student_ids)
         )
         
         if start_date:
-            query = query.filter(AttendanceRecord.date >= start_date)
+            query = query.filter(cls.date >= start_date)
         if end_date:
-            query = query.filter(AttendanceRecord.date <= end_date)
-        
-        total_records = query.count()
-        if total_records == 0:
-            return 0
+            query = query.filter(cls.date <= end_date)
         
-        present_records = query.filter_by(status='present').count()
-        return round((present_records / total_records) * 100, 2)
+        for student_id, total_records, present_records in query.group_by(cls.student_id):
+            if total_records:
+                percentages[student_id] = round((present_records / total_records) * 100, 2)
+        return percentages
+    
+    @classmethod
+    def base_query(cls):
+        """Query with student, subject and lecturer preloaded for to_dict; any other lazy load on it raises"""
+        return cls.query.options(
+            selectinload(cls.student),
+            selectinload(cls.subject),
+            selectinload(cls.lecturer),
+            Load(cls).raiseload('*')
+        )
+    
+    @classmethod
+    def to_dicts(cls, records):
+        """Serialize many records at once; same keys as to_dict, load relationships first (see base_query)"""
+        result = []
+        for record in records:
+            row = dict(zip(_RECORD_COLUMNS, _get_record_columns(record)))
+            student, subject, lecturer = record.student, record.subject, record.lecturer
+            row.update(
+                student_name=student.name if student else None,
+                student_roll_number=student.roll_number if student else None,
+                subject_name=subject.name if subject else None,
+                subject_code=subject.code if subject else None,
+                lecturer_name=lecturer.name if lecturer else None,
+                date=record.date.isoformat() if record.date else None,
+                created_at=record.created_at.isoformat() if record.created_at else None,
+                updated_at=record.updated_at.isoformat() if record.updated_at else None
+            )
+            result.append(row)
+        return result
     
     def to_dict(self):
         """Convert attendance record to dictionary"""
@@ -95,6 +214,48 @@ class AttendanceRecord(db.Model):
         subject_code = self.subject.code if self.subject else "Unknown"
         return f'<AttendanceRecord {student_roll} - {subject_code} - {self.date} - {self.status}>'
 
+def _bump_enrollment_counts(connection, target, total_delta, present_delta):
+    """Apply attendance deltas to the matching StudentEnrollment and Student counters"""
+    if not total_delta and not present_delta:
+        return
+    from models.student import Student, StudentEnrollment
+    connection.execute(
+        db.update(Student)
+        .where(Student.id == target.student_id)
+        .values(
+            overall_attendance_total=Student.overall_attendance_total + total_delta,
+            overall_attendance_present=Student.overall_attendance_present + present_delta
+        )
+    )
+    connection.execute(
+        db.update(StudentEnrollment)
+        .where(
+            StudentEnrollment.student_id == target.student_id,
+            StudentEnrollment.subject_id == target.subject_id
+        )
+        .values(
+            total_count=StudentEnrollment.total_count + total_delta,
+            present_count=StudentEnrollment.present_count + present_delta
+        )
+    )
+
+@event.listens_for(AttendanceRecord, 'after_insert')
+def _attendance_inserted(mapper, connection, target):
+    _bump_enrollment_counts(connection, target, 1, 1 if target.status == 'present' else 0)
+
+@event.listens_for(AttendanceRecord, 'after_update')
+def _attendance_updated(mapper, connection, target):
+    history = attributes.get_history(target, 'status')
+    if not history.has_changes():
+        return
+    was_present = 'present' in (history.deleted or ())
+    is_present = target.status == 'present'
+    _bump_enrollment_counts(connection, target, 0, int(is_present) - int(was_present))
+
+@event.listens_for(AttendanceRecord, 'after_delete')
+def _attendance_deleted(mapper, connection, target):
+    _bump_enrollment_counts(connection, target, -1, -1 if target.status == 'present' else 0)
+
 class MonthlyAttendanceSummary(db.Model):
     """Monthly attendance summary for subjects"""
     __tablename__ = 'monthly_attendance_summary'
@@ -110,56 +271,66 @@ class MonthlyAttendanceSummary(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Unique constraint for subject, lecturer, month, year
-    __table_args__ = (db.UniqueConstraint('subject_id', 'lecturer_id', 'month', 'year', name='unique_subject_lecturer_month_year'),)
+    # Unique constraint for subject, lecturer, month, year; the composite index
+    # orders year before month so prior-month SUM()s become index range seeks
+    __table_args__ = (
+        db.UniqueConstraint('subject_id', 'lecturer_id', 'month', 'year', name='unique_subject_lecturer_month_year'),
+        db.Index('ix_mas_subj_lect_yr_mo', 'subject_id', 'lecturer_id', 'year', 'month'),
+    )
     
     def calculate_average_attendance(self):
         """Calculate and update average attendance for the month"""
-        # Get all attendance records for this subject and month
-        attendance_records = AttendanceRecord.query.filter(
+        # Let the database average the month's records instead of loading them
+        average = db.session.query(
+            func.avg(case((AttendanceRecord.status == 'present', 1.0), else_=0.0)) * 100
+        ).filter(
             AttendanceRecord.subject_id == self.subject_id,
-            db.extract('month', AttendanceRecord.date) == self.month,
-            db.extract('year', AttendanceRecord.date) == self.year
-        ).all()
+            AttendanceRecord.in_month(self.month, self.year)
+        ).scalar()
         
-        if not attendance_records:
+        if average is None:
             self.average_attendance = 0.0
             return
         
-        # Calculate average attendance percentage
-        total_records = len(attendance_records)
-        present_records = len([r for r in attendance_records if r.status == 'present'])
-        
-        self.average_attendance = round((present_records / total_records) * 100, 2) if total_records > 0 else 0.0
+        self.average_attendance = round(average, 2)
         self.updated_at = datetime.utcnow()
     
     def get_student_attendance_summary(self):
         """Get attendance summary for all students in this subject for the month"""
-        from models.student import Student
+        from models.student import Student, StudentEnrollment
         
-        # Get all students enrolled in this subject
-        enrolled_students = Student.query.join('enrollments').filter_by(
-            subject_id=self.subject_id,
-            is_active=True
+        # Per-student month totals, grouped once in SQL
+        counts = db.session.query(
+            AttendanceRecord.student_id.label('student_id'),
+            func.count(AttendanceRecord.id).label('total_classes'),
+            func.sum(case((AttendanceRecord.status == 'present', 1), else_=0)).label('present_classes')
+        ).filter(
+            AttendanceRecord.subject_id == self.subject_id,
+            AttendanceRecord.in_month(self.month, self.year)
+        ).group_by(AttendanceRecord.student_id).subquery()
+        
+        # All students enrolled in this subject, with their totals joined in
+        rows = db.session.query(
+            Student.id, Student.name, Student.roll_number,
+            func.coalesce(counts.c.total_classes, 0),
+            func.coalesce(counts.c.present_classes, 0)
+        ).join(
+            StudentEnrollment, StudentEnrollment.student_id == Student.id
+        ).outerjoin(
+            counts, counts.c.student_id == Student.id
+        ).filter(
+            StudentEnrollment.subject_id == self.subject_id,
+            StudentEnrollment.is_active == True
         ).all()
         
         summary = []
-        for student in enrolled_students:
-            attendance_records = AttendanceRecord.query.filter(
-                AttendanceRecord.student_id == student.id,
-                AttendanceRecord.subject_id == self.subject_id,
-                db.extract('month', AttendanceRecord.date) == self.month,
-                db.extract('year', AttendanceRecord.date) == self.year
-            ).all()
-            
-            total_classes = len(attendance_records)
-            present_classes = len([r for r in attendance_records if r.status == 'present'])
+        for student_id, student_name, roll_number, total_classes, present_classes in rows:
             percentage = round((present_classes / total_classes) * 100, 2) if total_classes > 0 else 0
             
             summary.append({
-                'student_id': student.id,
-                'student_name': student.name,
-                'roll_number': student.roll_number,
+                'student_id': student_id,
+                'student_name': student_name,
+                'roll_number': roll_number,
                 'total_classes': total_classes,
                 'present_classes': present_classes,
                 'absent_classes': total_classes - present_classes,
@@ -169,14 +340,17 @@ class MonthlyAttendanceSummary(db.Model):
         return summary
     
     @staticmethod
-    def get_or_create(subject_id, lecturer_id, month, year, total_classes):
-        """Get existing summary or create new one"""
-        summary = MonthlyAttendanceSummary.query.filter_by(
+    def get_or_create(subject_id, lecturer_id, month, year, total_classes, for_update=False):
+        """Get existing summary or create new one; for_update locks the row until commit"""
+        query = MonthlyAttendanceSummary.query.filter_by(
             subject_id=subject_id,
             lecturer_id=lecturer_id,
             month=month,
             year=year
-        ).first()
+        )
+        if for_update:
+            query = query.with_for_update()
+        summary = query.first()
         
         if not summary:
             summary = MonthlyAttendanceSummary(
@@ -239,6 +413,7 @@ class MonthlyStudentAttendance(db.Model):
     __table_args__ = (
         db.UniqueConstraint('student_id', 'subject_id', 'lecturer_id', 'month', 'year',
                             name='unique_student_subject_lecturer_month_year_attendance'),
+        db.Index('ix_msa_stu_subj_lect_yr_mo', 'student_id', 'subject_id', 'lecturer_id', 'year', 'month'),
     )
 
     @staticmethod
@@ -5,6 +5,32 @@ StudentMarks model for assessment tracking
 
 from database import db
 from datetime import datetime
+from operator import attrgetter
+from sqlalchemy import event, func
+from sqlalchemy.orm import attributes, column_property, selectinload, Load
+
+def _band_table(bands, fallback):
+    """Label for every whole percentage 0..100 from (min_percentage, label) bands, highest first"""
+    return tuple(
+        next((label for cutoff, label in bands if pct >= cutoff), fallback)
+        for pct in range(101)
+    )
+
+# Whole-number cutoffs, so int(percentage) always lands on the right label
+_GRADE_TABLE = _band_table(
+    ((90, 'A+'), (80, 'A'), (70, 'B+'), (60, 'B'), (50, 'C+'), (40, 'C'), (35, 'D')), 'F'
+)
+_PERFORMANCE_TABLE = _band_table(
+    ((90, 'Excellent'), (75, 'Very Good'), (60, 'Good'), (50, 'Average'), (35, 'Below Average')), 'Poor'
+)
+
+def _band_index(percentage):
+    return min(max(int(percentage), 0), 100)
+
+# Plain columns copied verbatim by StudentMarks.to_dicts
+_MARKS_COLUMNS = ('id', 'student_id', 'subject_id', 'lecturer_id', 'assessment_type',
+                  'marks_obtained', 'max_marks', 'percentage', 'grade', 'remarks')
+_get_marks_columns = attrgetter(*_MARKS_COLUMNS)
 
 class StudentMarks(db.Model):
     """Student marks for different assessment types"""
@@ -15,8 +41,9 @@ class StudentMarks(db.Model):
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
     lecturer_id = db.Column(db.Integer, db.ForeignKey('lecturer.id'), nullable=False)
     assessment_type = db.Column(db.String(20), nullable=False)  # 'internal1', 'internal2', 'assignment', 'project'
-    marks_obtained = db.Column(db.Float, nullable=False)
-    max_marks = db.Column(db.Float, nullable=False)
+    # active_history keeps the old value for the counter deltas even when the row was expired
+    marks_obtained = column_property(db.Column(db.Float, nullable=False), active_history=True)
+    max_marks = column_property(db.Column(db.Float, nullable=False), active_history=True)
     percentage = db.Column(db.Float, nullable=False, default=0.0)
     grade = db.Column(db.String(2), nullable=True)
     remarks = db.Column(db.String(200), nullable=True)
@@ -24,8 +51,13 @@ class StudentMarks(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Unique constraint to prevent duplicate marks for same student, subject, assessment type
-    __table_args__ = (db.UniqueConstraint('student_id', 'subject_id', 'assessment_type', name='unique_student_subject_assessment'),)
+    # Unique constraint to prevent duplicate marks for same student, subject, assessment type;
+    # its (student_id, subject_id) prefix also serves the per-student summaries.
+    # The composite index lets top-performer/failing queries filter and order by percentage from the index
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'subject_id', 'assessment_type', name='unique_student_subject_assessment'),
+        db.Index('ix_marks_sub_type_pct', 'subject_id', 'assessment_type', 'percentage'),
+    )
     
     def __init__(self, **kwargs):
         super(StudentMarks, self).__init__(**kwargs)
@@ -43,22 +75,7 @@ class StudentMarks(db.Model):
     @staticmethod
     def calculate_grade(percentage):
         """Calculate grade based on percentage"""
-        if percentage >= 90:
-            return 'A+'
-        elif percentage >= 80:
-            return 'A'
-        elif percentage >= 70:
-            return 'B+'
-        elif percentage >= 60:
-            return 'B'
-        elif percentage >= 50:
-            return 'C+'
-        elif percentage >= 40:
-            return 'C'
-        elif percentage >= 35:
-            return 'D'
-        else:
-            return 'F'
+        return _GRADE_TABLE[_band_index(percentage)]
     
     def is_passing(self, passing_percentage=35):
         """Check if marks are passing"""
@@ -94,15 +111,15 @@ class StudentMarks(db.Model):
     @staticmethod
     def get_student_overall_percentage(student_id, subject_id):
         """Calculate overall percentage for a student in a subject"""
-        marks = StudentMarks.get_student_subject_marks(student_id, subject_id)
-        
-        if not marks:
-            return 0.0
-        
-        total_obtained = sum(mark.marks_obtained for mark in marks)
-        total_max = sum(mark.max_marks for mark in marks)
+        total_obtained, total_max = db.session.query(
+            func.sum(StudentMarks.marks_obtained),
+            func.sum(StudentMarks.max_marks)
+        ).filter_by(
+            student_id=student_id,
+            subject_id=subject_id
+        ).one()
         
-        if total_max == 0:
+        if not total_max:
             return 0.0
         
         return (total_obtained / total_max) * 100
@@ -110,13 +127,15 @@ class StudentMarks(db.Model):
     @staticmethod
     def get_class_average(subject_id, assessment_type):
         """Get class average for a specific assessment type"""
-        marks = StudentMarks.get_assessment_type_marks(subject_id, assessment_type)
+        average = db.session.query(func.avg(StudentMarks.percentage)).filter_by(
+            subject_id=subject_id,
+            assessment_type=assessment_type
+        ).scalar()
         
-        if not marks:
+        if average is None:
             return 0.0
         
-        total_percentage = sum(mark.percentage for mark in marks)
-        return round(total_percentage / len(marks), 2)
+        return round(average, 2)
     
     @staticmethod
     def get_failing_students(subject_id, assessment_type, passing_percentage=35):
@@ -135,20 +154,59 @@ class StudentMarks(db.Model):
             assessment_type=assessment_type
         ).order_by(StudentMarks.percentage.desc()).limit(limit).all()
     
+    @staticmethod
+    def get_top_and_failing(subject_id, assessment_type, limit=10, passing_percentage=35):
+        """Get (top performers, failing students) for an assessment from one ranked scan"""
+        rank = func.row_number().over(order_by=StudentMarks.percentage.desc()).label('rn')
+        rows = db.session.execute(
+            db.select(StudentMarks, rank)
+            .where(StudentMarks.subject_id == subject_id,
+                   StudentMarks.assessment_type == assessment_type)
+            .order_by(rank)
+        ).all()
+        
+        top = [marks for marks, rn in rows if rn <= limit]
+        failing = [marks for marks, _ in rows
+                   if marks.percentage is not None and marks.percentage < passing_percentage]
+        return top, failing
+    
     def get_performance_status(self):
         """Get performance status based on percentage"""
-        if self.percentage >= 90:
-            return 'Excellent'
-        elif self.percentage >= 75:
-            return 'Very Good'
-        elif self.percentage >= 60:
-            return 'Good'
-        elif self.percentage >= 50:
-            return 'Average'
-        elif self.percentage >= 35:
-            return 'Below Average'
-        else:
-            return 'Poor'
+        return _PERFORMANCE_TABLE[_band_index(self.percentage)]
+    
+    @classmethod
+    def base_query(cls):
+        """Query with student, subject and lecturer preloaded for to_dict; any other lazy load on it raises"""
+        return cls.query.options(
+            selectinload(cls.student),
+            selectinload(cls.subject),
+            selectinload(cls.lecturer),
+            Load(cls).raiseload('*')
+        )
+    
+    @classmethod
+    def to_dicts(cls, marks):
+        """Serialize many marks at once; same keys as to_dict, load relationships first (see base_query)"""
+        result = []
+        for mark in marks:
+            row = dict(zip(_MARKS_COLUMNS, _get_marks_columns(mark)))
+            student, subject, lecturer = mark.student, mark.subject, mark.lecturer
+            percentage = mark.percentage
+            row.update(
+                student_name=student.name if student else None,
+                student_roll_number=student.roll_number if student else None,
+                subject_name=subject.name if subject else None,
+                subject_code=subject.code if subject else None,
+                lecturer_name=lecturer.name if lecturer else None,
+                assessment_date=mark.assessment_date.isoformat() if mark.assessment_date else None,
+                performance_status=_PERFORMANCE_TABLE[_band_index(percentage)],
+                is_passing=percentage >= 35,
+                is_distinction=percentage >= 75,
+                created_at=mark.created_at.isoformat() if mark.created_at else None,
+                updated_at=mark.updated_at.isoformat() if mark.updated_at else None
+            )
+            result.append(row)
+        return result
     
     def to_dict(self):
         """Convert marks to dictionary"""
@@ -179,4 +237,37 @@ class StudentMarks(db.Model):
     def __repr__(self):
         student_roll = self.student.roll_number if self.student else "Unknown"
         subject_code = self.subject.code if self.subject else "Unknown"
-        return f'<StudentMarks {student_roll} - {subject_code} - {self.assessment_type}: {self.marks_obtained}/{self.max_marks}>'
\ No newline at end of file
+        return f'<StudentMarks {student_roll} - {subject_code} - {self.assessment_type}: {self.marks_obtained}/{self.max_marks}>'
+
+def _bump_student_marks(connection, target, obtained_delta, max_delta):
+    """Apply marks deltas to the owning Student's overall counters"""
+    if not obtained_delta and not max_delta:
+        return
+    from models.student import Student
+    connection.execute(
+        db.update(Student)
+        .where(Student.id == target.student_id)
+        .values(
+            overall_marks_obtained=Student.overall_marks_obtained + obtained_delta,
+            overall_marks_max=Student.overall_marks_max + max_delta
+        )
+    )
+
+def _column_delta(target, key):
+    history = attributes.get_history(target, key)
+    if not history.has_changes() or not history.deleted:
+        return 0
+    return (getattr(target, key) or 0) - (history.deleted[0] or 0)
+
+@event.listens_for(StudentMarks, 'after_insert')
+def _marks_inserted(mapper, connection, target):
+    _bump_student_marks(connection, target, target.marks_obtained or 0, target.max_marks or 0)
+
+@event.listens_for(StudentMarks, 'after_update')
+def _marks_updated(mapper, connection, target):
+    _bump_student_marks(connection, target,
+                        _column_delta(target, 'marks_obtained'), _column_delta(target, 'max_marks'))
+
+@event.listens_for(StudentMarks, 'after_delete')
+def _marks_deleted(mapper, connection, target):
+    _bump_student_marks(connection, target, -(target.marks_obtained or 0), -(target.max_marks or 0))
\ No newline at end of file
@@ -5,6 +5,8 @@ Student and StudentEnrollment models
 
 from database import db
 from datetime import datetime
+from sqlalchemy import func, case, inspect as sa_inspect
+from sqlalchemy.orm import selectinload, Load
 
 class Student(db.Model):
     """Student model"""
@@ -20,53 +22,69 @@ class Student(db.Model):
     phone = db.Column(db.String(15), nullable=True)
     address = db.Column(db.Text, nullable=True)
     date_of_birth = db.Column(db.Date, nullable=True)
-    admission_date = db.Column(db.Date, default=datetime.utcnow().date())
+    # Evaluated per insert; server_default covers rows written outside the ORM
+    admission_date = db.Column(db.Date, default=lambda: datetime.utcnow().date(),
+                               server_default=func.current_date())
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    # Overall counters maintained by AttendanceRecord and StudentMarks write events
+    overall_attendance_total = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    overall_attendance_present = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    overall_marks_obtained = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    overall_marks_max = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
     
     # Relationships
-    enrollments = db.relationship('StudentEnrollment', backref='student', lazy='dynamic')
+    # enrollments and marks are small per-student lists that can be selectin-loaded;
+    # attendance_records stays dynamic because callers filter it in SQL
+    enrollments = db.relationship('StudentEnrollment', backref='student')
     attendance_records = db.relationship('AttendanceRecord', backref='student', lazy='dynamic')
-    marks = db.relationship('StudentMarks', backref='student', lazy='dynamic')
+    marks = db.relationship('StudentMarks', backref='student')
     
     def get_enrolled_subjects(self):
         """Get all subjects the student is enrolled in"""
-        return [enrollment.subject for enrollment in self.enrollments.filter_by(is_active=True)]
+        return [enrollment.subject for enrollment in self.enrollments if enrollment.is_active]
     
     def get_current_subjects(self):
         """Get subjects for current semester"""
-        return [enrollment.subject for enrollment in self.enrollments.filter_by(
-            is_active=True
-        ).join('subject').filter_by(
-            year=self.academic_year,
-            semester=self.current_semester
-        )]
+        from models.academic import Subject
+        return Subject.query.join(StudentEnrollment).filter(
+            StudentEnrollment.student_id == self.id,
+            StudentEnrollment.is_active == True,
+            Subject.year == self.academic_year,
+            Subject.semester == self.current_semester
+        ).all()
     
     def is_enrolled_in_subject(self, subject_id):
         """Check if student is enrolled in a specific subject"""
-        return self.enrollments.filter_by(subject_id=subject_id, is_active=True).first() is not None
+        if 'enrollments' not in sa_inspect(self).unloaded:
+            return any(enrollment.subject_id == subject_id and enrollment.is_active
+                       for enrollment in self.enrollments)
+        # Not loaded: let the database answer with SELECT EXISTS instead of fetching rows
+        return db.session.query(
+            StudentEnrollment.query.filter_by(
+                student_id=self.id, subject_id=subject_id, is_active=True
+            ).exists()
+        ).scalar()
     
     def get_overall_attendance_percentage(self):
         """Get overall attendance percentage across all subjects"""
-        total_classes = self.attendance_records.count()
-        if total_classes == 0:
+        if not self.overall_attendance_total:
             return 0
-        
-        present_classes = self.attendance_records.filter_by(status='present').count()
-        return round((present_classes / total_classes) * 100, 2)
+        return round((self.overall_attendance_present / self.overall_attendance_total) * 100, 2)
     
     def get_subject_attendance_percentage(self, subject_id):
         """Get attendance percentage for a specific subject"""
-        total_classes = self.attendance_records.filter_by(subject_id=subject_id).count()
-        if total_classes == 0:
+        from models.attendance import AttendanceRecord
+        total_classes, present_classes = self.attendance_records.filter_by(
+            subject_id=subject_id
+        ).with_entities(
+            func.count(AttendanceRecord.id),
+            func.sum(case((AttendanceRecord.status == 'present', 1), else_=0))
+        ).one()
+        if not total_classes:
             return 0
         
-        present_classes = self.attendance_records.filter_by(
-            subject_id=subject_id, 
-            status='present'
-        ).count()
-        
-        return round((present_classes / total_classes) * 100, 2)
+        return round(((present_classes or 0) / total_classes) * 100, 2)
     
     def has_attendance_shortage(self, threshold=75):
         """Check if student has attendance shortage"""
@@ -76,9 +94,14 @@ class Student(db.Model):
         """Get marks summary for a specific subject"""
         # Use direct query instead of relationship to avoid any issues
         from models.marks import StudentMarks
+        # Only three columns are needed, so skip hydrating StudentMarks objects
         marks = StudentMarks.query.filter_by(
             student_id=self.id,
             subject_id=subject_id
+        ).with_entities(
+            StudentMarks.assessment_type,
+            StudentMarks.marks_obtained,
+            StudentMarks.max_marks
         ).all()
         
         summary = {
@@ -88,26 +111,43 @@ class Student(db.Model):
             'project': {'obtained': 0, 'max': 0}
         }
         
-        for mark in marks:
-            if mark.assessment_type in summary:
-                summary[mark.assessment_type]['obtained'] = mark.marks_obtained
-                summary[mark.assessment_type]['max'] = mark.max_marks
+        for assessment_type, marks_obtained, max_marks in marks:
+            if assessment_type in summary:
+                summary[assessment_type]['obtained'] = marks_obtained
+                summary[assessment_type]['max'] = max_marks
         
         return summary
     
     def get_overall_marks_percentage(self):
         """Get overall marks percentage across all subjects"""
-        marks = self.marks.all()
-        if not marks:
-            return 0
-        
-        total_obtained = sum(mark.marks_obtained for mark in marks)
-        total_max = sum(mark.max_marks for mark in marks)
-        
-        if total_max == 0:
+        if not self.overall_marks_max:
             return 0
+        return round((self.overall_marks_obtained / self.overall_marks_max) * 100, 2)
+    
+    @staticmethod
+    def refresh_overall_counts(student_ids=None):
+        """Recompute the overall attendance and marks counters.
+
+        Needed after bulk deletes that bypass the ORM write events.
+        """
+        from models.attendance import AttendanceRecord
+        from models.marks import StudentMarks
         
-        return round((total_obtained / total_max) * 100, 2)
+        records = db.select(func.count(AttendanceRecord.id)).where(
+            AttendanceRecord.student_id == Student.id
+        )
+        marks = db.select(StudentMarks.id).where(StudentMarks.student_id == Student.id)
+        stmt = db.update(Student).values(
+            overall_attendance_total=records.scalar_subquery(),
+            overall_attendance_present=records.where(AttendanceRecord.status == 'present').scalar_subquery(),
+            overall_marks_obtained=marks.with_only_columns(
+                func.coalesce(func.sum(StudentMarks.marks_obtained), 0)).scalar_subquery(),
+            overall_marks_max=marks.with_only_columns(
+                func.coalesce(func.sum(StudentMarks.max_marks), 0)).scalar_subquery()
+        )
+        if student_ids is not None:
+            stmt = stmt.where(Student.id.in_(list(student_ids)))
+        db.session.execute(stmt, execution_options={'synchronize_session': False})
     
     def promote_to_next_semester(self):
         """Promote student to next semester"""
@@ -150,9 +190,16 @@ class StudentEnrollment(db.Model):
     academic_year = db.Column(db.Integer, nullable=False)
     enrolled_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    # Attendance counters maintained by AttendanceRecord write events
+    present_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Unique constraint to prevent duplicate enrollments
-    __table_args__ = (db.UniqueConstraint('student_id', 'subject_id', name='unique_student_subject_enrollment'),)
+    # Composite index backs the active-enrollment lookups by subject
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'subject_id', name='unique_student_subject_enrollment'),
+        db.Index('ix_enr_subj_active', 'subject_id', 'is_active'),
+    )
     
     def unenroll(self):
         """Unenroll student from subject"""
@@ -162,6 +209,41 @@ class StudentEnrollment(db.Model):
         """Re-enroll student in subject"""
         self.is_active = True
     
+    def get_attendance_percentage(self):
+        """Get attendance percentage from the stored counters"""
+        if not self.total_count:
+            return 0
+        return round((self.present_count / self.total_count) * 100, 2)
+    
+    @staticmethod
+    def refresh_attendance_counts(subject_ids=None):
+        """Recompute attendance counters from AttendanceRecord.
+
+        Needed after bulk deletes that bypass the ORM write events.
+        """
+        from models.attendance import AttendanceRecord
+        
+        records = db.select(func.count(AttendanceRecord.id)).where(
+            AttendanceRecord.student_id == StudentEnrollment.student_id,
+            AttendanceRecord.subject_id == StudentEnrollment.subject_id
+        )
+        stmt = db.update(StudentEnrollment).values(
+            total_count=records.scalar_subquery(),
+            present_count=records.where(AttendanceRecord.status == 'present').scalar_subquery()
+        )
+        if subject_ids is not None:
+            stmt = stmt.where(StudentEnrollment.subject_id.in_(list(subject_ids)))
+        db.session.execute(stmt, execution_options={'synchronize_session': False})
+    
+    @classmethod
+    def base_query(cls):
+        """Query with student and subject preloaded for to_dict; any other lazy load on it raises"""
+        return cls.query.options(
+            selectinload(cls.student),
+            selectinload(cls.subject),
+            Load(cls).raiseload('*')
+        )
+    
     def to_dict(self):
         """Convert enrollment to dictionary"""
         return {
@@ -4,9 +4,28 @@ Management and Lecturer user models
 """
 
 from database import db
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects.postgresql import JSONB
+from utils.hashing import hash_password, verify_password, needs_rehash
+from utils.encryption import password_encryptor
+import os
 import re
+import secrets
+import string
+
+# Minimum seconds between last_login writes for the same user
+LAST_LOGIN_THROTTLE_SECONDS = 60
+
+# Alphabet for generated lecturer passwords
+_PWCHARS = string.ascii_letters + string.digits
+
+# Characters not allowed in generated usernames
+_USERNAME_SANITIZE_RE = re.compile(r'[^A-Za-z0-9_]')
+
+# Administrator permission that grants every other permission
+ALL_PERMISSIONS = '*'
 
 class Management(db.Model):
     """Management user model for administrative access"""
@@ -14,23 +33,34 @@ class Management(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
     is_active = db.Column(db.Boolean, default=True)
     
+    # Matches the case-insensitive active-user login lookup in AuthService
+    __table_args__ = (
+        db.Index('ix_mgmt_login', db.func.lower(username), is_active),
+    )
+    
     def set_password(self, password):
         """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        """Check password against hash"""
-        return check_password_hash(self.password_hash, password)
+        """Check password against hash, upgrading legacy hashes on success"""
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
     
     def update_last_login(self):
-        """Update last login timestamp"""
-        self.last_login = datetime.utcnow()
-        db.session.commit()
+        """Update last login timestamp (caller commits); rapid re-logins leave the row clean"""
+        now = datetime.utcnow()
+        if self.last_login and (now - self.last_login).total_seconds() < LAST_LOGIN_THROTTLE_SECONDS:
+            return
+        self.last_login = now
     
     def __repr__(self):
         return f'<Management {self.username}>'
@@ -43,74 +73,123 @@ class Lecturer(db.Model):
     lecturer_id = db.Column(db.String(20), unique=True, nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     password_encrypted = db.Column(db.Text, nullable=True)  # Encrypted password for management access
     email = db.Column(db.String(120), unique=True, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
     is_active = db.Column(db.Boolean, default=True)
     
+    # Matches the case-insensitive active-user login lookup in AuthService
+    __table_args__ = (
+        db.Index('ix_lect_login', db.func.lower(username), is_active),
+    )
+    
     # Relationships
-    subject_assignments = db.relationship('SubjectAssignment', backref='lecturer', lazy='dynamic')
+    # Selectin-loaded so a page of lecturers fetches all assignments in one extra query
+    subject_assignments = db.relationship('SubjectAssignment', backref='lecturer', lazy='selectin')
     attendance_records = db.relationship('AttendanceRecord', backref='lecturer', lazy='dynamic')
     monthly_summaries = db.relationship('MonthlyAttendanceSummary', backref='lecturer', lazy='dynamic')
     student_marks = db.relationship('StudentMarks', backref='lecturer', lazy='dynamic')
     
     def set_password(self, password):
         """Set password hash and encrypted password for management access"""
-        from utils.encryption import password_encryptor
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
         self.password_encrypted = password_encryptor.encrypt_password(password)
     
     def check_password(self, password):
-        """Check password against hash"""
-        return check_password_hash(self.password_hash, password)
+        """Check password against hash, upgrading legacy hashes on success"""
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
+    
+    @staticmethod
+    def bulk_set_passwords(pairs):
+        """Hash passwords for many (lecturer, password) pairs on a thread pool and encrypt them"""
+        # Argon2 and hashlib's PBKDF2 both release the GIL while hashing; Fernet is
+        # cheap enough that a pool would only add overhead
+        pairs = list(pairs)
+        if not pairs:
+            return
+        passwords = [password for _, password in pairs]
+        with ThreadPoolExecutor(max_workers=min(len(pairs), os.cpu_count() or 1)) as executor:
+            hashes = list(executor.map(hash_password, passwords))
+        for (lecturer, password), password_hash in zip(pairs, hashes):
+            lecturer.password_hash = password_hash
+            lecturer.password_encrypted = password_encryptor.encrypt_password(password)
     
     def update_last_login(self):
-        """Update last login timestamp"""
-        self.last_login = datetime.utcnow()
-        db.session.commit()
+        """Update last login timestamp (caller commits); rapid re-logins leave the row clean"""
+        now = datetime.utcnow()
+        if self.last_login and (now - self.last_login).total_seconds() < LAST_LOGIN_THROTTLE_SECONDS:
+            return
+        self.last_login = now
     
     def get_assigned_subjects(self):
         """Get subjects actively assigned to this lecturer for the current academic year"""
         from datetime import datetime
         current_year = datetime.now().year
-        active_assignments_current_year = (
-            self.subject_assignments
-                .filter_by(academic_year=current_year, is_active=True)
-                .all()
-        )
-        return [assignment.subject for assignment in active_assignments_current_year]
+        return [assignment.subject for assignment in self.subject_assignments
+                if assignment.academic_year == current_year and assignment.is_active]
+    
+    def get_assigned_subject_names(self):
+        """Get names of actively assigned subjects for the current academic year"""
+        if 'subject_assignments' not in sa_inspect(self).unloaded:
+            return [subject.name for subject in self.get_assigned_subjects()]
+        # Fetch only the name column rather than hydrating Subject objects
+        from models.academic import Subject
+        from models.assignments import SubjectAssignment
+        return db.session.scalars(
+            db.select(Subject.name).join(SubjectAssignment).where(
+                SubjectAssignment.lecturer_id == self.id,
+                SubjectAssignment.academic_year == datetime.now().year,
+                SubjectAssignment.is_active == True
+            )
+        ).all()
     
     def is_assigned_to_subject(self, subject_id):
         """Check if lecturer is assigned to a specific subject"""
-        return self.subject_assignments.filter_by(subject_id=subject_id).first() is not None
+        if 'subject_assignments' not in sa_inspect(self).unloaded:
+            return any(assignment.subject_id == subject_id for assignment in self.subject_assignments)
+        # Probe the (lecturer_id, subject_id, academic_year) unique index instead of loading rows
+        from models.assignments import SubjectAssignment
+        return db.session.query(
+            SubjectAssignment.query.filter_by(lecturer_id=self.id, subject_id=subject_id).exists()
+        ).scalar()
     
     def get_decrypted_password(self):
         """Get decrypted password for management access"""
-        from utils.encryption import password_encryptor
-        if self.password_encrypted:
-            return password_encryptor.decrypt_password(self.password_encrypted)
-        return None
+        if not self.password_encrypted:
+            return None
+        # Cached against the ciphertext so set_password invalidates it automatically
+        cached = self.__dict__.get('_decrypted_pw')
+        if cached and cached[0] == self.password_encrypted:
+            return cached[1]
+        password = password_encryptor.decrypt_password(self.password_encrypted)
+        self.__dict__['_decrypted_pw'] = (self.password_encrypted, password)
+        return password
+    
+    @staticmethod
+    def decrypt_many(lecturers):
+        """Decrypt passwords for several lecturers, returning {lecturer.id: password}"""
+        return {lecturer.id: lecturer.get_decrypted_password() for lecturer in lecturers}
     
     @staticmethod
     def generate_username(name, lecturer_id):
         """Generate username from name and lecturer ID in BBHC format"""
         # Take first name and add BBHC format
-        first_name = name.split()[0].lower()
+        first_name = name.split(None, 1)[0].lower()
         # Sanitize lecturer_id to only contain valid username characters (letters, numbers, underscores)
-        sanitized_lecturer_id = re.sub(r'[^A-Za-z0-9_]', '_', lecturer_id.lower())
+        sanitized_lecturer_id = _USERNAME_SANITIZE_RE.sub('_', lecturer_id.lower())
         return f"bbhc_{first_name}_{sanitized_lecturer_id}"
     
     @staticmethod
     def generate_password():
         """Generate a random password for new lecturers"""
-        import random
-        import string
-        
-        # Generate 8-character password with letters and numbers
-        chars = string.ascii_letters + string.digits
-        return ''.join(random.choice(chars) for _ in range(8))
+        # 8-character password with letters and numbers from a CSPRNG
+        return ''.join(secrets.choice(_PWCHARS) for _ in range(8))
     
     def to_dict(self):
         """Convert lecturer to dictionary for JSON serialization"""
@@ -119,12 +198,25 @@ class Lecturer(db.Model):
             'lecturer_id': self.lecturer_id,
             'name': self.name,
             'username': self.username,
-            'assigned_subjects': [subject.name for subject in self.get_assigned_subjects()],
+            'assigned_subjects': self.get_assigned_subject_names(),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'last_login': self.last_login.isoformat() if self.last_login else None,
             'is_active': self.is_active
         }
     
+    @classmethod
+    def to_dict_bulk(cls, lecturers=None):
+        """Serialize lecturers (all when none are given) with assignments and subjects preloaded"""
+        if lecturers is None:
+            from sqlalchemy.orm import selectinload
+            from models.assignments import SubjectAssignment
+            lecturers = db.session.execute(
+                db.select(cls).options(
+                    selectinload(cls.subject_assignments).joinedload(SubjectAssignment.subject)
+                )
+            ).scalars().all()
+        return [lecturer.to_dict() for lecturer in lecturers]
+    
     def __repr__(self):
         return f'<Lecturer {self.lecturer_id}: {self.name}>'
 
@@ -135,38 +227,57 @@ class Administrator(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     secret_path = db.Column(db.String(36), unique=True, nullable=False)  # UUID for secret access
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
     is_active = db.Column(db.Boolean, default=True)
-    permissions = db.Column(db.Text, default='all')  # JSON string of permissions
+    # JSON list of permission names; ALL_PERMISSIONS grants everything
+    permissions = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'),
+                            default=lambda: [ALL_PERMISSIONS])
+
+    # GIN index for "admins with permission X" containment lookups on PostgreSQL
+    __table_args__ = (
+        db.Index('ix_admin_perms', 'permissions', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
 
     def set_password(self, password):
         """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        """Check password against hash"""
-        return check_password_hash(self.password_hash, password)
+        """Check password against hash, upgrading legacy hashes on success"""
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
 
     def update_last_login(self):
-        """Update last login timestamp"""
-        self.last_login = datetime.utcnow()
-        db.session.commit()
+        """Update last login timestamp (caller commits); rapid re-logins leave the row clean"""
+        now = datetime.utcnow()
+        if self.last_login and (now - self.last_login).total_seconds() < LAST_LOGIN_THROTTLE_SECONDS:
+            return
+        self.last_login = now
 
     def has_permission(self, permission):
         """Check if admin has specific permission"""
-        if self.permissions == 'all':
-            return True
-        permissions = self.permissions.split(',') if self.permissions else []
-        return permission in permissions
+        permissions = self.permissions or ()
+        return ALL_PERMISSIONS in permissions or permission in permissions
 
     def get_permissions_list(self):
         """Get list of permissions"""
-        if self.permissions == 'all':
+        permissions = self.permissions or []
+        if ALL_PERMISSIONS in permissions:
             return ['all']
-        return self.permissions.split(',') if self.permissions else []
+        return list(permissions)
+
+    @staticmethod
+    def permissions_from_legacy(value):
+        """Convert the old comma-separated permissions string to a list"""
+        if value == 'all':
+            return [ALL_PERMISSIONS]
+        return [permission for permission in value.split(',') if permission] if value else []
 
     @staticmethod
     def generate_secret_path():
@@ -3,29 +3,67 @@ Authentication routes for Moulya College Management System
 Handles login, logout, and authentication redirects
 """
 
+from functools import wraps
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from services.auth_service import AuthService, SessionManager
+from services.auth_service import (
+    AuthService, SessionManager, USER_MANAGEMENT, USER_LECTURER, INVALID_CREDENTIALS
+)
+from utils.login_throttle import login_throttle
 from utils.validators import validate_username, validate_password
 
 auth_bp = Blueprint('auth', __name__)
 
+# Auth templates, compiled at registration so the first login request skips it
+_INDEX_TMPL = 'auth/index.html'
+_MGMT_LOGIN_TMPL = 'auth/management_login.html'
+_LECT_LOGIN_TMPL = 'auth/lecturer_login.html'
+_CHANGE_PW_TMPL = 'auth/change_password.html'
+
+# Where each user type lands after login (keyed by SessionManager.snapshot code) and where it signs in
+_DASHBOARD_FOR = {USER_MANAGEMENT: 'management.dashboard', USER_LECTURER: 'lecturer.dashboard'}
+_LOGIN_FOR = {'management': 'auth.management_login', 'lecturer': 'auth.lecturer_login'}
+
+@auth_bp.record_once
+def _prewarm_templates(state):
+    """Load the auth templates into the Jinja cache"""
+    for name in (_INDEX_TMPL, _MGMT_LOGIN_TMPL, _LECT_LOGIN_TMPL, _CHANGE_PW_TMPL):
+        state.app.jinja_env.get_template(name)
+
 @auth_bp.route('/')
 def index():
     """Landing page with login options"""
     # Redirect if already logged in
-    if SessionManager.is_authenticated(session):
-        if SessionManager.is_management(session):
-            return redirect(url_for('management.dashboard'))
-        elif SessionManager.is_lecturer(session):
-            return redirect(url_for('lecturer.dashboard'))
+    authenticated, user_code = SessionManager.snapshot(session)
+    if authenticated:
+        endpoint = _DASHBOARD_FOR.get(user_code)
+        if endpoint:
+            return redirect(url_for(endpoint))
     
-    return render_template('auth/index.html', hide_header=True)
+    return render_template(_INDEX_TMPL, hide_header=True)
+
+def _authenticate_throttled(user_type, authenticate, username, password):
+    """Authenticate unless the client is rate-limited or the credentials were just rejected"""
+    client = request.remote_addr
+    if login_throttle.is_blocked(client, username):
+        return False, None, 'Too many failed login attempts. Please wait a minute and try again.'
+    
+    if login_throttle.is_known_bad(user_type, username, password):
+        success, user, message = False, None, INVALID_CREDENTIALS
+    else:
+        success, user, message = authenticate(username, password)
+    
+    if success:
+        login_throttle.reset(client, username)
+    elif message == INVALID_CREDENTIALS:
+        login_throttle.record_failure(user_type, client, username, password)
+    return success, user, message
 
 @auth_bp.route('/management/login', methods=['GET', 'POST'])
 def management_login():
     """Management login page and handler"""
     # Redirect if already logged in as management
-    if SessionManager.is_authenticated(session) and SessionManager.is_management(session):
+    authenticated, user_code = SessionManager.snapshot(session)
+    if authenticated and user_code == USER_MANAGEMENT:
         return redirect(url_for('management.dashboard'))
     
     if request.method == 'POST':
@@ -35,16 +73,18 @@ def management_login():
         # Validate input
         if not username or not password:
             flash('Username and password are required', 'error')
-            return render_template('auth/management_login.html', hide_header=True)
+            return render_template(_MGMT_LOGIN_TMPL, hide_header=True)
         
         # Validate username format
         is_valid, message = validate_username(username)
         if not is_valid:
             flash(message, 'error')
-            return render_template('auth/management_login.html', hide_header=True)
+            return render_template(_MGMT_LOGIN_TMPL, hide_header=True)
         
         # Authenticate user
-        success, user, message = AuthService.authenticate_management(username, password)
+        success, user, message = _authenticate_throttled(
+            'management', AuthService.authenticate_management, username, password
+        )
         
         if success:
             # Create session
@@ -54,13 +94,14 @@ def management_login():
         else:
             flash(message, 'error')
     
-    return render_template('auth/management_login.html', hide_header=True)
+    return render_template(_MGMT_LOGIN_TMPL, hide_header=True)
 
 @auth_bp.route('/lecturer/login', methods=['GET', 'POST'])
 def lecturer_login():
     """Lecturer login page and handler"""
     # Redirect if already logged in as lecturer
-    if SessionManager.is_authenticated(session) and SessionManager.is_lecturer(session):
+    authenticated, user_code = SessionManager.snapshot(session)
+    if authenticated and user_code == USER_LECTURER:
         return redirect(url_for('lecturer.dashboard'))
     
     if request.method == 'POST':
@@ -70,16 +111,18 @@ def lecturer_login():
         # Validate input
         if not username or not password:
             flash('Username and password are required', 'error')
-            return render_template('auth/lecturer_login.html', hide_header=True)
+            return render_template(_LECT_LOGIN_TMPL, hide_header=True)
         
         # Validate username format
         is_valid, message = validate_username(username)
         if not is_valid:
             flash(message, 'error')
-            return render_template('auth/lecturer_login.html', hide_header=True)
+            return render_template(_LECT_LOGIN_TMPL, hide_header=True)
         
         # Authenticate user
-        success, user, message = AuthService.authenticate_lecturer(username, password)
+        success, user, message = _authenticate_throttled(
+            'lecturer', AuthService.authenticate_lecturer, username, password
+        )
         
         if success:
             # Create session
@@ -89,7 +132,7 @@ def lecturer_login():
         else:
             flash(message, 'error')
     
-    return render_template('auth/lecturer_login.html', hide_header=True)
+    return render_template(_LECT_LOGIN_TMPL, hide_header=True)
 
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
@@ -99,17 +142,15 @@ def logout():
     flash('You have been logged out successfully', 'success')
     
     # Redirect to appropriate login page
-    if user_type == 'management':
-        return redirect(url_for('auth.management_login'))
-    elif user_type == 'lecturer':
-        return redirect(url_for('auth.lecturer_login'))
-    else:
-        return redirect(url_for('auth.index'))
+    return redirect(url_for(_LOGIN_FOR.get(user_type, 'auth.index')))
 
 @auth_bp.route('/change-password', methods=['GET', 'POST'])
 def change_password():
     """Change password for authenticated users"""
-    if not SessionManager.is_authenticated(session):
+    # Read the session once; everything below reuses these locals
+    user_type = session.get('user_type')
+    user_id = session.get('user_id')
+    if user_type is None or user_id is None:
         flash('Please log in to change your password', 'error')
         return redirect(url_for('auth.index'))
     
@@ -121,22 +162,19 @@ def change_password():
         # Validate input
         if not all([current_password, new_password, confirm_password]):
             flash('All password fields are required', 'error')
-            return render_template('auth/change_password.html')
+            return render_template(_CHANGE_PW_TMPL)
         
         if new_password != confirm_password:
             flash('New passwords do not match', 'error')
-            return render_template('auth/change_password.html')
+            return render_template(_CHANGE_PW_TMPL)
         
         # Validate new password
         is_valid, message = validate_password(new_password)
         if not is_valid:
             flash(message, 'error')
-            return render_template('auth/change_password.html')
+            return render_template(_CHANGE_PW_TMPL)
         
         # Change password
-        user_type = session.get('user_type')
-        user_id = session.get('user_id')
-        
         success, message = AuthService.change_password(
             user_type, user_id, current_password, new_password
         )
@@ -144,45 +182,56 @@ def change_password():
         if success:
             flash(message, 'success')
             # Redirect to appropriate dashboard
-            if user_type == 'management':
-                return redirect(url_for('management.dashboard'))
-            else:
-                return redirect(url_for('lecturer.dashboard'))
+            return redirect(url_for('management.dashboard' if user_type == 'management' else 'lecturer.dashboard'))
         else:
             flash(message, 'error')
     
-    return render_template('auth/change_password.html')
+    return render_template(_CHANGE_PW_TMPL)
 
 # Authentication decorator
+# Role checks resolved at decoration time: required code, denial message, login endpoint
+_ROLE_REQUIREMENTS = {
+    'management': (USER_MANAGEMENT, 'Access denied. Management login required.', _LOGIN_FOR['management']),
+    'lecturer': (USER_LECTURER, 'Access denied. Lecturer login required.', _LOGIN_FOR['lecturer']),
+}
+
 def login_required(user_type=None):
     """Decorator to require authentication"""
+    requirement = _ROLE_REQUIREMENTS.get(user_type)
+    
     def decorator(f):
-        def decorated_function(*args, **kwargs):
-            if not SessionManager.is_authenticated(session):
+        if requirement is None:
+            @wraps(f)
+            def decorated_any(*args, **kwargs):
+                if not SessionManager.snapshot(session)[0]:
+                    flash('Please log in to access this page', 'error')
+                    return redirect(url_for('auth.index'))
+                return f(*args, **kwargs)
+            return decorated_any
+        
+        required_code, denied_message, login_endpoint = requirement
+        
+        @wraps(f)
+        def decorated_role(*args, **kwargs):
+            authenticated, user_code = SessionManager.snapshot(session)
+            if not authenticated:
                 flash('Please log in to access this page', 'error')
                 return redirect(url_for('auth.index'))
-            
-            if user_type:
-                if user_type == 'management' and not SessionManager.is_management(session):
-                    flash('Access denied. Management login required.', 'error')
-                    return redirect(url_for('auth.management_login'))
-                elif user_type == 'lecturer' and not SessionManager.is_lecturer(session):
-                    flash('Access denied. Lecturer login required.', 'error')
-                    return redirect(url_for('auth.lecturer_login'))
-            
+            if user_code != required_code:
+                flash(denied_message, 'error')
+                return redirect(url_for(login_endpoint))
             return f(*args, **kwargs)
-        
-        decorated_function.__name__ = f.__name__
-        return decorated_function
+        return decorated_role
     return decorator
 
 # Context processor to make session info available in templates
 @auth_bp.app_context_processor
 def inject_user():
     """Inject user information into template context"""
-    session_info = SessionManager.get_session_info(session)
+    authenticated, user_code = SessionManager.snapshot(session)
+    session_info = SessionManager.get_session_info(session) if authenticated else None
     # Enrich with lecturer name when available
-    if session_info and session_info.get('user_type') == 'lecturer':
+    if session_info and user_code == USER_LECTURER:
         try:
             from services.auth_service import AuthService
             user_obj, _ = AuthService.get_user_info('lecturer', session_info.get('user_id'))
@@ -192,7 +241,7 @@ def inject_user():
             pass
     return {
         'current_user': session_info,
-        'is_authenticated': SessionManager.is_authenticated(session),
-        'is_management': SessionManager.is_management(session),
-        'is_lecturer': SessionManager.is_lecturer(session)
+        'is_authenticated': authenticated,
+        'is_management': user_code == USER_MANAGEMENT,
+        'is_lecturer': user_code == USER_LECTURER
     }
\ No newline at end of file
@@ -3,7 +3,13 @@ Lecturer portal routes for Moulya College Management System
 Handles all lecturer functionality
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from collections import defaultdict
+from functools import wraps
+import gzip
+import logging
+import re
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, abort, g
+from sqlalchemy.orm import joinedload, Load
 from routes.auth import login_required
 from services.lecturer_service import LecturerService
 from models.academic import Subject
@@ -12,11 +18,74 @@ from services.reporting_service import ReportingService
 from database import db
 from models.student import Student
 from models.attendance import AttendanceRecord, MonthlyAttendanceSummary
-from datetime import datetime, date
+from datetime import date
 from io import BytesIO
 from services.excel_export_service import ExcelExportService
 
 lecturer_bp = Blueprint('lecturer', __name__)
+logger = logging.getLogger(__name__)
+
+# Per-student form fields (e.g. attendance_12, attended_12, marks_12); group 1 is the student id
+ATTENDANCE_FIELD_RE = re.compile(r'attendance_(\d+)')
+ATTENDED_FIELD_RE = re.compile(r'attended_(\d+)')
+MARKS_FIELD_RE = re.compile(r'marks_(\d+)')
+DEPUTATION_FIELD_RE = re.compile(r'deputation_(\d+)')
+# Month keys used by the attendance priors endpoint (YYYY-MM)
+MONTH_KEY_RE = re.compile(r'(\d{4})-(\d{2})')
+MAX_PRIOR_MONTHS = 24
+GZIP_MIN_BYTES = 1024
+
+# Page size for the enrolled-student lists on the students and marks pages
+STUDENTS_PER_PAGE = 50
+
+def _get_subject_or_404(subject_id, raise_on_lazy=False):
+    """Load a subject with its course; optionally make any other relationship access raise"""
+    options = [joinedload(Subject.course)]
+    if raise_on_lazy:
+        # Guards templates that should only touch subject columns and subject.course
+        options.append(Load(Subject).raiseload('*'))
+    subject = db.session.execute(
+        db.select(Subject).options(*options).filter_by(id=subject_id)
+    ).scalar_one_or_none()
+    if subject is None:
+        abort(404)
+    return subject
+
+def _is_assigned(subject_id, lecturer_id):
+    """Whether the lecturer is actively assigned to the subject, memoized on flask.g for the request"""
+    cache = g.setdefault('_subject_assignments', {})
+    key = (subject_id, lecturer_id)
+    if key not in cache:
+        cache[key] = SubjectAssignment.is_assigned(lecturer_id, subject_id)
+    return cache[key]
+
+def subject_assignment_required(json_response=False):
+    """Decorator requiring the logged-in lecturer to be actively assigned to the route's subject.
+
+    Replaces an inline route check; it is not stacked on services that verify the assignment themselves.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(subject_id, *args, **kwargs):
+            if not _is_assigned(subject_id, session.get('user_id')):
+                if json_response:
+                    return jsonify({
+                        'success': False,
+                        'message': 'You are not assigned to this subject'
+                    }), 403
+                flash('You are not assigned to this subject.', 'error')
+                return redirect(url_for('lecturer.subjects'))
+            return f(subject_id, *args, **kwargs)
+        return decorated
+    return decorator
+
+def _get_subject_students(subject_id, lecturer_id):
+    """Enrolled students for a subject, memoized on flask.g for the request"""
+    cache = g.setdefault('_subject_students', {})
+    key = (subject_id, lecturer_id)
+    if key not in cache:
+        cache[key] = LecturerService.get_subject_students(subject_id, lecturer_id)
+    return cache[key]
 
 @lecturer_bp.route('/dashboard')
 @login_required('lecturer')
@@ -48,20 +117,30 @@ def subject_students(subject_id):
     """View students enrolled in a subject"""
     try:
         lecturer_id = session.get('user_id')
-        students = LecturerService.get_subject_students(subject_id, lecturer_id)
-        subject = Subject.query.get_or_404(subject_id)
+        subject = _get_subject_or_404(subject_id)
+        pagination = LecturerService.get_subject_students_page(
+            subject_id, lecturer_id, page=request.args.get('page', 1, type=int), per_page=STUDENTS_PER_PAGE
+        )
+        students = pagination.items if pagination else []
+        # Percentages for every listed student at once instead of one lookup per template row
+        attendance_percentages = subject.get_attendance_percentages([s.id for s in students])
         
         # Get all students for enrollment - only those from the same course as the subject
-        # Sort by roll number (and name as tiebreaker) for consistent ordering in UI
-        all_students = (Student.query
-            .filter_by(is_active=True, course_id=subject.course_id)
+        # Sort by roll number (and name as tiebreaker) for consistent ordering in UI;
+        # the picker only shows id/roll/name, so fetch those columns as plain rows
+        all_students = db.session.execute(
+            db.select(Student.id, Student.roll_number, Student.name)
+            .where(Student.is_active == True, Student.course_id == subject.course_id)
             .order_by(Student.roll_number.asc(), Student.name.asc())
-            .all())
+        ).all()
         
         return render_template('lecturer/subject_students.html', 
                              subject=subject, 
                              students=students,
-                             all_students=all_students)
+                             all_students=all_students,
+                             enrolled_ids=LecturerService.get_enrolled_student_ids(subject_id),
+                             pagination=pagination,
+                             attendance_percentages=attendance_percentages)
     except Exception as e:
         flash(f'Error loading students: {str(e)}', 'error')
         return redirect(url_for('lecturer.subjects'))
@@ -120,27 +199,24 @@ def attendance_management(subject_id):
     """Attendance management for a subject"""
     try:
         lecturer_id = session.get('user_id')
-        students = LecturerService.get_subject_students(subject_id, lecturer_id)
-        subject = Subject.query.get_or_404(subject_id)
+        subject = _get_subject_or_404(subject_id, raise_on_lazy=True)
+        students = _get_subject_students(subject_id, lecturer_id)
         
         # Get selected date from query params
         selected_date = request.args.get('date')
         if selected_date:
-            selected_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
+            selected_date = date.fromisoformat(selected_date)
         else:
             selected_date = date.today()
         
         # Get existing attendance for the date
         from models.attendance import AttendanceRecord, MonthlyAttendanceSummary
-        existing_attendance = {}
-        for student in students:
-            record = AttendanceRecord.query.filter_by(
-                student_id=student.id,
-                subject_id=subject_id,
-                date=selected_date
-            ).first()
-            if record:
-                existing_attendance[student.id] = record.status
+        student_ids = [s.id for s in students]
+        existing_attendance = dict(AttendanceRecord.query.filter(
+            AttendanceRecord.subject_id == subject_id,
+            AttendanceRecord.date == selected_date,
+            AttendanceRecord.student_id.in_(student_ids)
+        ).with_entities(AttendanceRecord.student_id, AttendanceRecord.status).all()) if student_ids else {}
         
         # Get monthly summary for current month
         monthly_summary = MonthlyAttendanceSummary.query.filter_by(
@@ -150,128 +226,43 @@ def attendance_management(subject_id):
             year=selected_date.year
         ).first()
         
-        # Compute cumulative totals up to previous month for validation hints
+        # Cumulative classes up to previous month; per-student prior presents for the
+        # validation hints are fetched by the page from attendance_priors after load
         from sqlalchemy import func
-        prior_total_classes = (db.session.query(func.coalesce(func.sum(MonthlyAttendanceSummary.total_classes), 0))
-            .filter(
-                MonthlyAttendanceSummary.subject_id == subject_id,
-                MonthlyAttendanceSummary.lecturer_id == lecturer_id,
-                ((MonthlyAttendanceSummary.year < selected_date.year) |
-                 ((MonthlyAttendanceSummary.year == selected_date.year) & (MonthlyAttendanceSummary.month < selected_date.month)))
-            ).scalar() or 0)
-
-        # Per-student present count up to previous month (use MonthlyStudentAttendance sums)
-        from datetime import date as _date
-        from sqlalchemy import func
-        from models.attendance import MonthlyStudentAttendance as MSA
-        prev_cutoff = _date(selected_date.year, selected_date.month, 1)
-        prev_present_map = {}
-        for s in students:
-            prev_present = (db.session.query(func.coalesce(func.sum(MSA.present_count), 0))
-                .filter(
-                    MSA.student_id == s.id,
-                    MSA.subject_id == subject_id,
-                    MSA.lecturer_id == lecturer_id,
-                    ((MSA.year < prev_cutoff.year) | ((MSA.year == prev_cutoff.year) & (MSA.month < prev_cutoff.month)))
-                ).scalar() or 0)
-            prev_present_map[s.id] = int(prev_present)
-
-        # Build prior totals map for all months/years to support client-side validation when month/year changes
-        # Map keys as f"{year}-{month:02d}" to cumulative total till previous month
-        prior_totals_map = {}
-        summaries = (MonthlyAttendanceSummary.query
-            .filter(
-                MonthlyAttendanceSummary.subject_id == subject_id,
-                MonthlyAttendanceSummary.lecturer_id == lecturer_id
-            )
-            .order_by(MonthlyAttendanceSummary.year.asc(), MonthlyAttendanceSummary.month.asc())
-            ).all()
-
-        # Prepare a set of (year, month) pairs to compute prior totals for:
-        # - all months in the selected year
-        # - all months in any years present in summaries
-        years_to_cover = {selected_date.year}
-        years_to_cover.update({s.year for s in summaries})
-        months_to_cover = sorted({(y, m) for y in years_to_cover for m in range(1, 13)})
-
-        # Precompute cumulative totals per (year, month) from summaries
-        # cumulative_map holds cumulative up to and including that month
-        cumulative_map = {}
-        running_total = 0
-        for y, m in sorted({(s.year, s.month) for s in summaries}):
-            # Set prior (before this month) for this key first
-            key = f"{y}-{m:02d}"
-            if key not in prior_totals_map:
-                prior_totals_map[key] = running_total
-            # Add this month's classes to running total
-            month_sum = sum(int(s.total_classes or 0) for s in summaries if s.year == y and s.month == m)
-            running_total += month_sum
-            cumulative_map[key] = running_total
-
-        # For any (year, month) not present in summaries, prior is the sum of all summaries strictly before that month
-        def prior_cumulative_for(yr, mo):
-            total = 0
-            for s in summaries:
-                if (s.year < yr) or (s.year == yr and s.month < mo):
-                    total += int(s.total_classes or 0)
-            return total
-
-        for (yr, mo) in months_to_cover:
-            key = f"{yr}-{mo:02d}"
-            if key not in prior_totals_map:
-                prior_totals_map[key] = prior_cumulative_for(yr, mo)
-
-        # Build previous-presents map per month-year for each student
-        # Keys: 'YYYY-MM' -> { studentId: prevPresentsBeforeMonth }
-        from datetime import date as _date
-        from models.attendance import MonthlyStudentAttendance as MSA
-        prev_present_by_month_map = {}
-        # Cover all months in selected year and any summary years
-        months_to_prepare = months_to_cover
-        for (yr, mo) in months_to_prepare:
-            cutoff = _date(yr, mo, 1)
-            per_student = {}
-            for s in students:
-                count_prev = (db.session.query(func.coalesce(func.sum(MSA.present_count), 0))
-                    .filter(
-                        MSA.student_id == s.id,
-                        MSA.subject_id == subject_id,
-                        MSA.lecturer_id == lecturer_id,
-                        ((MSA.year < cutoff.year) | ((MSA.year == cutoff.year) & (MSA.month < cutoff.month)))
-                    ).scalar() or 0)
-                per_student[s.id] = int(count_prev)
-            prev_present_by_month_map[f"{yr}-{mo:02d}"] = per_student
+        prior_total_classes, _ = LecturerService.get_prior_and_month_presents(
+            subject_id, lecturer_id, selected_date.year, selected_date.month
+        )
+        view_month = request.args.get('view_month', selected_date.month, type=int)
+        view_year = request.args.get('view_year', selected_date.year, type=int)
 
         # Get monthly attendance data if requested
         monthly_attendance_data = None
-        view_month = request.args.get('view_month', selected_date.month, type=int)
-        view_year = request.args.get('view_year', selected_date.year, type=int)
         # Map of current deputation counts per student for the selected/view year
         deputation_counts_map = {}
         # Map of cumulative present count per student for the selected/view year (for client-side hints)
         cumulative_present_map = {}
         # Always precompute deputation counts for the chosen view_year to support UI prefilling
+        from models.attendance import MonthlyStudentAttendance as MSA
         try:
-            from models.attendance import MonthlyStudentAttendance as MSA
-            from sqlalchemy import func
-            for s in students:
-                deput_sum = (db.session.query(func.coalesce(func.sum(MSA.deputation_count), 0))
-                    .filter(
-                        MSA.student_id == s.id,
-                        MSA.subject_id == subject_id,
-                        MSA.lecturer_id == lecturer_id,
-                        MSA.year == view_year
-                    ).scalar() or 0)
-                deputation_counts_map[s.id] = int(deput_sum)
-                # Also compute cumulative presents for the year
-                cum_present = (db.session.query(func.coalesce(func.sum(MSA.present_count), 0))
-                    .filter(
-                        MSA.student_id == s.id,
-                        MSA.subject_id == subject_id,
-                        MSA.lecturer_id == lecturer_id,
-                        MSA.year == view_year
-                    ).scalar() or 0)
-                cumulative_present_map[s.id] = int(cum_present)
+            # Deputations and cumulative presents for the year come from one grouped query
+            rows = (db.session.query(
+                    MSA.student_id,
+                    func.coalesce(func.sum(MSA.deputation_count), 0),
+                    func.coalesce(func.sum(MSA.present_count), 0))
+                .filter(
+                    MSA.subject_id == subject_id,
+                    MSA.lecturer_id == lecturer_id,
+                    MSA.year == view_year,
+                    MSA.student_id.in_(student_ids)
+                )
+                .group_by(MSA.student_id)
+                .all()) if student_ids else []
+            for sid, deput_sum, cum_present in rows:
+                deputation_counts_map[sid] = int(deput_sum)
+                cumulative_present_map[sid] = int(cum_present)
+            for sid in student_ids:
+                deputation_counts_map.setdefault(sid, 0)
+                cumulative_present_map.setdefault(sid, 0)
         except Exception:
             deputation_counts_map = {}
             cumulative_present_map = {}
@@ -301,15 +292,50 @@ def attendance_management(subject_id):
                              monthly_attendance_data=monthly_attendance_data,
                              cumulative_total_classes=cumulative_total_classes,
                              prior_total_classes=prior_total_classes,
-                             prev_present_map=prev_present_map,
-                             prior_totals_map=prior_totals_map,
-                             prev_present_by_month_map=prev_present_by_month_map,
                              deputation_counts_map=deputation_counts_map,
                              cumulative_present_map=cumulative_present_map)
     except Exception as e:
         flash(f'Error loading attendance: {str(e)}', 'error')
         return redirect(url_for('lecturer.subjects'))
 
+@lecturer_bp.route('/subjects/<int:subject_id>/attendance/priors.json')
+@login_required('lecturer')
+def attendance_priors(subject_id):
+    """Prior cumulative classes and per-student presents before each requested month (JSON)"""
+    try:
+        lecturer_id = session.get('user_id')
+        # months=YYYY-MM[,YYYY-MM...]
+        months = []
+        for key in (request.args.get('months') or '').split(','):
+            match = MONTH_KEY_RE.fullmatch(key.strip())
+            if match and 1 <= int(match.group(2)) <= 12:
+                months.append((int(match.group(1)), int(match.group(2))))
+        if not months or len(months) > MAX_PRIOR_MONTHS:
+            return jsonify({'error': f'Between 1 and {MAX_PRIOR_MONTHS} valid months (YYYY-MM) are required'}), 400
+        
+        student_ids = [s.id for s in _get_subject_students(subject_id, lecturer_id)]
+        prior_totals = {}
+        prev_presents = {}
+        for (year, month) in sorted(set(months)):
+            key = f"{year}-{month:02d}"
+            prior_totals[key], prev_presents[key] = LecturerService.get_prior_and_month_presents(
+                subject_id, lecturer_id, year, month, student_ids
+            )
+        
+        response = jsonify({'prior_totals': prior_totals, 'prev_presents': prev_presents})
+        # Compress larger payloads when the client accepts gzip
+        if len(response.get_data()) >= GZIP_MIN_BYTES and 'gzip' in request.accept_encodings:
+            response.set_data(gzip.compress(response.get_data(), mtime=0))
+            response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        # Always revalidate; unchanged priors are answered with 304 via the ETag
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.add_etag()
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({'error': f'Error loading prior attendance: {str(e)}'}), 500
+
 @lecturer_bp.route('/subjects/<int:subject_id>/attendance/daily', methods=['POST'])
 @login_required('lecturer')
 def record_daily_attendance(subject_id):
@@ -322,23 +348,15 @@ def record_daily_attendance(subject_id):
             flash('Attendance date is required', 'error')
             return redirect(url_for('lecturer.attendance_management', subject_id=subject_id))
         
-        attendance_date = datetime.strptime(attendance_date_str, '%Y-%m-%d').date()
+        attendance_date = date.fromisoformat(attendance_date_str)
         
-        # Build attendance data - exclude system fields
-        attendance_data = {}
-        
-        for key, value in request.form.items():
-            # Only process attendance fields that are not system fields
-            if key.startswith('attendance_') and key != 'attendance_date' and value:
-                try:
-                    student_id_str = key.replace('attendance_', '')
-                    # Make sure it's a valid integer (student ID)
-                    if student_id_str.isdigit():
-                        student_id = int(student_id_str)
-                        if value in ['present', 'absent']:  # Validate attendance status
-                            attendance_data[student_id] = value
-                except (ValueError, TypeError):
-                    continue
+        # Build attendance data from attendance_<student_id> fields; the numeric
+        # suffix also excludes system fields such as attendance_date
+        attendance_data = {
+            int(match.group(1)): value
+            for key, value in request.form.items()
+            if (match := ATTENDANCE_FIELD_RE.fullmatch(key)) and value in ('present', 'absent')
+        }
         
         if not attendance_data:
             flash('No attendance data provided', 'error')
@@ -374,17 +392,11 @@ def validate_monthly_attendance(subject_id):
         student_id = data.get('student_id')
         attended_classes = data.get('attended_classes')
         
-        from sqlalchemy import func
-        from datetime import date as _date
-        
-        # Compute prior cumulative classes up to previous month
-        prior_total_classes = (db.session.query(func.coalesce(func.sum(MonthlyAttendanceSummary.total_classes), 0))
-            .filter(
-                MonthlyAttendanceSummary.subject_id == subject_id,
-                MonthlyAttendanceSummary.lecturer_id == lecturer_id,
-                ((MonthlyAttendanceSummary.year < year) |
-                 ((MonthlyAttendanceSummary.year == year) & (MonthlyAttendanceSummary.month < month)))
-            ).scalar() or 0)
+        # Prior cumulative classes and the student's presents up to previous month, in one query
+        prior_total_classes, prev_present = LecturerService.get_prior_classes_and_presents(
+            subject_id, lecturer_id, year, month,
+            int(student_id) if student_id is not None and attended_classes is not None else None
+        )
         
         # Classes actually conducted in the selected month
         month_classes = max(total_classes - prior_total_classes, 0)
@@ -400,17 +412,6 @@ def validate_monthly_attendance(subject_id):
         
         # Validation 2: Student attendance range (if student_id and attended_classes provided)
         if student_id is not None and attended_classes is not None:
-            # Previous cumulative presents from MonthlyStudentAttendance up to prior month
-            from models.attendance import MonthlyStudentAttendance as MSA
-            from sqlalchemy import func
-            prev_present = (db.session.query(func.coalesce(func.sum(MSA.present_count), 0))
-                .filter(
-                    MSA.student_id == int(student_id),
-                    MSA.subject_id == subject_id,
-                    MSA.lecturer_id == lecturer_id,
-                    ((MSA.year < year) | ((MSA.year == year) & (MSA.month < month)))
-                ).scalar() or 0)
-            
             min_allowed = max(prev_present, 0)
             max_allowed = prev_present + month_classes
             
@@ -445,54 +446,13 @@ def record_monthly_attendance(subject_id):
         year = int(request.form.get('year'))
         total_classes = int(request.form.get('total_classes'))
         
-        # Build attendance data from form with server-side range validation
+        # Build attendance data from the form; the service validates every value
         attendance_data = {}
-        from sqlalchemy import func
-        from datetime import date as _date
-        from models.attendance import MonthlyStudentAttendance as MSA
-        # Compute prior cumulative classes up to previous month
-        prior_total_classes = (db.session.query(func.coalesce(func.sum(MonthlyAttendanceSummary.total_classes), 0))
-            .filter(
-                MonthlyAttendanceSummary.subject_id == subject_id,
-                MonthlyAttendanceSummary.lecturer_id == lecturer_id,
-                ((MonthlyAttendanceSummary.year < year) |
-                 ((MonthlyAttendanceSummary.year == year) & (MonthlyAttendanceSummary.month < month)))
-            ).scalar() or 0)
-        # Classes actually conducted in the selected month
-        month_classes = max(total_classes - prior_total_classes, 0)
-        # Cutoff for previous presents is first day of selected month
-        prev_cutoff = _date(year, month, 1)
-        # Build per-student previous presents map using MonthlyStudentAttendance sums
-        students = LecturerService.get_subject_students(subject_id, lecturer_id)
-        prev_present_map = {}
-        for s in students:
-            prev_present = (db.session.query(func.coalesce(func.sum(MSA.present_count), 0))
-                .filter(
-                    MSA.student_id == s.id,
-                    MSA.subject_id == subject_id,
-                    MSA.lecturer_id == lecturer_id,
-                    ((MSA.year < year) | ((MSA.year == year) & (MSA.month < month)))
-                ).scalar() or 0)
-            prev_present_map[s.id] = int(prev_present)
-
         for key, value in request.form.items():
-            if key.startswith('attended_') and value is not None and value != '':
+            match = ATTENDED_FIELD_RE.fullmatch(key)
+            if match and value is not None and value != '':
                 try:
-                    student_id_str = key.replace('attended_', '')
-                    student_id = int(student_id_str)
-                    attended_classes = int(value)
-                    # Determine allowed range for this student: [prev_presents, prev_presents + month_classes]
-                    prev_presents = prev_present_map.get(student_id, 0)
-                    min_allowed = max(prev_presents, 0)
-                    max_allowed = prev_presents + month_classes
-                    if attended_classes < min_allowed or attended_classes > max_allowed:
-                        flash(f"Invalid attended value for student {student_id}. Allowed range: {min_allowed}-{max_allowed}.", 'error')
-                        return redirect(url_for('lecturer.attendance_management', subject_id=subject_id))
-                    # Also cap by overall total cumulative to be safe
-                    if attended_classes > total_classes:
-                        flash(f"Attended cannot exceed total cumulative classes {total_classes}.", 'error')
-                        return redirect(url_for('lecturer.attendance_management', subject_id=subject_id))
-                    attendance_data[student_id] = attended_classes
+                    attendance_data[int(match.group(1))] = int(value)
                 except ValueError:
                     continue
         
@@ -500,7 +460,7 @@ def record_monthly_attendance(subject_id):
             flash('No attendance data provided', 'error')
             return redirect(url_for('lecturer.attendance_management', subject_id=subject_id))
         
-        success, message = LecturerService.record_monthly_attendance(
+        success, message = LecturerService.record_monthly_attendance_bulk(
             subject_id, lecturer_id, month, year, total_classes, attendance_data
         )
         
@@ -544,20 +504,27 @@ def marks_management(subject_id):
     """Marks management for a subject"""
     try:
         lecturer_id = session.get('user_id')
-        students = LecturerService.get_subject_students(subject_id, lecturer_id)
-        subject = Subject.query.get_or_404(subject_id)
+        subject = _get_subject_or_404(subject_id, raise_on_lazy=True)
+        pagination = LecturerService.get_subject_students_page(
+            subject_id, lecturer_id, page=request.args.get('page', 1, type=int), per_page=STUDENTS_PER_PAGE
+        )
+        students = pagination.items if pagination else []
         
         # Get existing marks for students and compute per-subject overall %
         from models.marks import StudentMarks
-        existing_marks = {}
+        # One IN query for every student's marks, pivoted to student -> assessment_type -> mark row
+        student_ids = [s.id for s in students]
+        existing_marks = defaultdict(dict)
+        if student_ids:
+            for mark in StudentMarks.query.filter(
+                StudentMarks.subject_id == subject_id,
+                StudentMarks.student_id.in_(student_ids)
+            ).all():
+                existing_marks[mark.student_id][mark.assessment_type] = mark
         per_subject_overall = {}
         for student in students:
-            marks = StudentMarks.query.filter_by(
-                student_id=student.id,
-                subject_id=subject_id
-            ).all()
-            # map assessment_type -> mark row
-            existing_marks[student.id] = {mark.assessment_type: mark for mark in marks}
+            # Indexing also gives students without marks an empty mapping
+            marks = list(existing_marks[student.id].values())
             # compute overall for this subject only
             if marks:
                 total_obtained = sum(mark.marks_obtained for mark in marks)
@@ -570,7 +537,8 @@ def marks_management(subject_id):
                              subject=subject, 
                              students=students,
                              existing_marks=existing_marks,
-                             per_subject_overall=per_subject_overall)
+                             per_subject_overall=per_subject_overall,
+                             pagination=pagination)
     except Exception as e:
         flash(f'Error loading marks: {str(e)}', 'error')
         return redirect(url_for('lecturer.subjects'))
@@ -594,14 +562,11 @@ def add_marks(subject_id):
         
         # Build marks data
         marks_data = []
-        import re
         for key, value in request.form.items():
             # Only accept keys like marks_<digits> (ignore fields like marks_file)
-            if re.fullmatch(r'marks_\d+', key):
-                try:
-                    student_id = int(key.split('_', 1)[1])
-                except Exception:
-                    continue
+            match = MARKS_FIELD_RE.fullmatch(key)
+            if match:
+                student_id = int(match.group(1))
                 if value not in (None, ''):
                     try:
                         obtained = float(value)
@@ -691,7 +656,7 @@ def download_attendance_template(subject_id):
             cell.font = Font(bold=True)
 
         # Fill students starting from row 5
-        students = LecturerService.get_subject_students(subject_id, lecturer_id)
+        students = _get_subject_students(subject_id, lecturer_id)
         row = header_row + 1
         for s in students:
             ws.cell(row=row, column=1, value=s.roll_number)
@@ -713,15 +678,10 @@ def download_attendance_template(subject_id):
             pass
 
         # Return as download
-        from flask import make_response
         bio = BytesIO()
         wb.save(bio)
-        bio.seek(0)
-        response = make_response(bio.read())
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         label = 'deputation' if is_deputation else 'attendance'
-        response.headers['Content-Disposition'] = f'attachment; filename={label}_template_{subject.code}.xlsx'
-        return response
+        return _send_xlsx(bio, f'{label}_template_{subject.code}.xlsx')
     except Exception as e:
         flash(f'Error preparing template: {str(e)}', 'error')
         return redirect(url_for('lecturer.attendance_management', subject_id=subject_id))
@@ -781,7 +741,7 @@ def download_marks_template(subject_id):
             c.font = Font(bold=True)
 
         # Data rows
-        students = LecturerService.get_subject_students(subject_id, lecturer_id)
+        students = _get_subject_students(subject_id, lecturer_id)
         row = header_row + 1
         for s in students:
             ws.cell(row=row, column=1, value=s.roll_number)
@@ -813,14 +773,9 @@ def download_marks_template(subject_id):
         except Exception:
             pass
 
-        from flask import make_response
         bio = BytesIO()
         wb.save(bio)
-        bio.seek(0)
-        response = make_response(bio.read())
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        response.headers['Content-Disposition'] = f'attachment; filename=marks_template_{subject.code}.xlsx'
-        return response
+        return _send_xlsx(bio, f'marks_template_{subject.code}.xlsx')
     except Exception as e:
         flash(f'Error preparing marks template: {str(e)}', 'error')
         return redirect(url_for('lecturer.marks_management', subject_id=subject_id))
@@ -847,7 +802,7 @@ def upload_marks_excel(subject_id):
         ws = wb.active
 
         # Build roll -> student id map
-        students = LecturerService.get_subject_students(subject_id, lecturer_id)
+        students = _get_subject_students(subject_id, lecturer_id)
         roll_to_student = {s.roll_number: s.id for s in students}
 
         marks_data = []
@@ -908,6 +863,33 @@ def subject_reports(subject_id):
         return redirect(url_for('lecturer.subjects'))
 
 # ---------------- PDF Export for Lecturer Reports ----------------
+def _send_pdf(pdf_bytes, filename, as_attachment=True):
+    """Send generated PDF bytes with range and conditional (ETag) support"""
+    import hashlib
+    from flask import send_file
+    pdf_bytes = pdf_bytes or b''
+    return send_file(
+        BytesIO(pdf_bytes),
+        mimetype='application/pdf',
+        as_attachment=as_attachment,
+        download_name=filename,
+        conditional=True,
+        etag=hashlib.sha1(pdf_bytes).hexdigest(),
+        max_age=0
+    )
+
+def _send_xlsx(stream, filename):
+    """Send a generated workbook stream as an attachment"""
+    from flask import send_file
+    stream.seek(0)
+    return send_file(
+        stream,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=filename,
+        max_age=0
+    )
+
 @lecturer_bp.route('/subjects/<int:subject_id>/reports/marks/pdf')
 @login_required('lecturer')
 def export_subject_marks_report_pdf(subject_id):
@@ -916,11 +898,7 @@ def export_subject_marks_report_pdf(subject_id):
         subject = Subject.query.get_or_404(subject_id)
         marks_report, _ = LecturerService.generate_marks_report(subject_id, lecturer_id)
         pdf_bytes = ReportingService.generate_subject_marks_report_pdf(subject, marks_report)
-        from flask import make_response
-        response = make_response(pdf_bytes)
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename=marks_report_{subject.code}.pdf'
-        return response
+        return _send_pdf(pdf_bytes, f'marks_report_{subject.code}.pdf')
     except Exception as e:
         flash(f'Error exporting marks PDF: {str(e)}', 'error')
         return redirect(url_for('lecturer.subject_reports', subject_id=subject_id))
@@ -933,11 +911,7 @@ def export_subject_attendance_report_pdf(subject_id):
         subject = Subject.query.get_or_404(subject_id)
         attendance_report, _ = LecturerService.generate_attendance_report(subject_id, lecturer_id)
         pdf_bytes = ReportingService.generate_subject_attendance_report_pdf(subject, attendance_report)
-        from flask import make_response
-        response = make_response(pdf_bytes)
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename=attendance_report_{subject.code}.pdf'
-        return response
+        return _send_pdf(pdf_bytes, f'attendance_report_{subject.code}.pdf')
     except Exception as e:
         flash(f'Error exporting attendance PDF: {str(e)}', 'error')
         return redirect(url_for('lecturer.subject_reports', subject_id=subject_id))
@@ -949,12 +923,9 @@ def export_subject_marks_report_excel(subject_id):
         lecturer_id = session.get('user_id')
         subject = Subject.query.get_or_404(subject_id)
         marks_report, _ = LecturerService.generate_marks_report(subject_id, lecturer_id)
-        excel_bytes = ReportingService.generate_subject_marks_report_excel(subject, marks_report)
-        from flask import make_response
-        response = make_response(excel_bytes)
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        response.headers['Content-Disposition'] = f'attachment; filename=marks_report_{subject.code}.xlsx'
-        return response
+        bio = BytesIO()
+        ReportingService.generate_subject_marks_report_excel(subject, marks_report, bio)
+        return _send_xlsx(bio, f'marks_report_{subject.code}.xlsx')
     except Exception as e:
         flash(f'Error exporting marks Excel: {str(e)}', 'error')
         return redirect(url_for('lecturer.subject_reports', subject_id=subject_id))
@@ -966,23 +937,34 @@ def export_subject_attendance_report_excel(subject_id):
         lecturer_id = session.get('user_id')
         subject = Subject.query.get_or_404(subject_id)
         attendance_report, _ = LecturerService.generate_attendance_report(subject_id, lecturer_id)
-        excel_bytes = ReportingService.generate_subject_attendance_report_excel(subject, attendance_report)
-        from flask import make_response
-        response = make_response(excel_bytes)
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        response.headers['Content-Disposition'] = f'attachment; filename=attendance_report_{subject.code}.xlsx'
-        return response
+        bio = BytesIO()
+        ReportingService.generate_subject_attendance_report_excel(subject, attendance_report, bio)
+        return _send_xlsx(bio, f'attendance_report_{subject.code}.xlsx')
     except Exception as e:
         flash(f'Error exporting attendance Excel: {str(e)}', 'error')
         return redirect(url_for('lecturer.subject_reports', subject_id=subject_id))
 
+def _collect_shortage_data(lecturer_id, subjects, threshold):
+    """Students at or below the attendance threshold (inclusive of 100%), grouped by subject"""
+    reports = LecturerService.generate_attendance_reports_bulk(lecturer_id, [s.id for s in subjects], threshold)
+    return [{'subject': subject, 'shortage_students': reports[subject.id]}
+            for subject in subjects if reports.get(subject.id)]
+
+def _collect_deficiency_data(lecturer_id, subjects, threshold):
+    """Students at or below the marks threshold, or without marks, grouped by subject"""
+    reports = LecturerService.generate_marks_reports_bulk(lecturer_id, [s.id for s in subjects], threshold)
+    return [{'subject': subject, 'deficient_students': reports[subject.id]}
+            for subject in subjects if reports.get(subject.id)]
+
 @lecturer_bp.route('/reports/attendance-shortage')
 @login_required('lecturer')
 def attendance_shortage_report():
     """Overall attendance shortage report"""
     try:
         lecturer_id = session.get('user_id')
-        subjects = LecturerService.get_assigned_subjects(lecturer_id)
+        # Loaded once: filtered for the report, unfiltered for the subject picker
+        assigned_subjects = LecturerService.get_assigned_subjects(lecturer_id)
+        subjects = assigned_subjects
         
         # Optional filter by subject
         selected_subject_id = request.args.get('subject_id', type=int)
@@ -992,31 +974,12 @@ def attendance_shortage_report():
         # Get threshold from query parameter, default to 75%
         threshold = request.args.get('threshold', 75, type=int)
         
-        shortage_data = []
-        for subject in subjects:
-            report, message = LecturerService.generate_attendance_report(subject.id, lecturer_id)
-            if report:
-                # Check if any attendance data has been recorded for this subject
-                has_recorded_attendance = False
-                for student_data in report:
-                    if student_data.get('total_classes', 0) > 0:
-                        has_recorded_attendance = True
-                        break
-                
-                # Only include subjects that have recorded attendance
-                if has_recorded_attendance:
-                    # Filter students based on custom threshold (include 100% when threshold is 100)
-                    shortage_students = [r for r in report if r['attendance_percentage'] <= threshold]
-                    if shortage_students:
-                        shortage_data.append({
-                            'subject': subject,
-                            'shortage_students': shortage_students
-                        })
+        shortage_data = _collect_shortage_data(lecturer_id, subjects, threshold)
         
         return render_template('lecturer/attendance_shortage.html', 
                              shortage_data=shortage_data, 
                              threshold=threshold,
-                             subjects=LecturerService.get_assigned_subjects(lecturer_id),
+                             subjects=assigned_subjects,
                              selected_subject_id=selected_subject_id)
     except Exception as e:
         flash(f'Error loading attendance shortage report: {str(e)}', 'error')
@@ -1036,24 +999,8 @@ def export_attendance_shortage_excel():
             subjects = [s for s in subjects if s.id == selected_subject_id]
         threshold = request.args.get('threshold', 75, type=int)
 
-        shortage_data = []
-        for subject in subjects:
-            report, _ = LecturerService.generate_attendance_report(subject.id, lecturer_id)
-            if report:
-                # Check if any attendance data has been recorded for this subject
-                has_recorded_attendance = False
-                for student_data in report:
-                    if student_data.get('total_classes', 0) > 0:
-                        has_recorded_attendance = True
-                        break
-                
-                # Only include subjects that have recorded attendance
-                if has_recorded_attendance:
-                    shortage_students = [r for r in report if r['attendance_percentage'] <= threshold]
-                    if shortage_students:
-                        shortage_data.append({'subject': subject, 'shortage_students': shortage_students})
-
-        from flask import make_response
+        shortage_data = _collect_shortage_data(lecturer_id, subjects, threshold)
+
         lecturer_name = None
         try:
             from models.user import Lecturer
@@ -1062,13 +1009,10 @@ def export_attendance_shortage_excel():
         except Exception:
             lecturer_name = None
         excel_bytes = ExcelExportService.export_attendance_shortage(threshold, shortage_data, lecturer_name=lecturer_name, selected_subject_id=selected_subject_id)
-        response = make_response(excel_bytes or b'')
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         fname = 'attendance_shortage'
         if selected_subject_id:
             fname += f'_{selected_subject_id}'
-        response.headers['Content-Disposition'] = f'attachment; filename={fname}.xlsx'
-        return response
+        return _send_xlsx(BytesIO(excel_bytes or b''), f'{fname}.xlsx')
     except Exception as e:
         flash(f'Error exporting attendance shortage: {str(e)}', 'error')
         return redirect(url_for('lecturer.attendance_shortage_report'))
@@ -1085,22 +1029,7 @@ def export_attendance_shortage_pdf():
             subjects = [s for s in subjects if s.id == selected_subject_id]
         threshold = request.args.get('threshold', 75, type=int)
 
-        shortage_data = []
-        for subject in subjects:
-            report, _ = LecturerService.generate_attendance_report(subject.id, lecturer_id)
-            if report:
-                # Check if any attendance data has been recorded for this subject
-                has_recorded_attendance = False
-                for student_data in report:
-                    if student_data.get('total_classes', 0) > 0:
-                        has_recorded_attendance = True
-                        break
-                
-                # Only include subjects that have recorded attendance
-                if has_recorded_attendance:
-                    shortage_students = [r for r in report if r['attendance_percentage'] <= threshold]
-                    if shortage_students:
-                        shortage_data.append({'subject': subject, 'shortage_students': shortage_students})
+        shortage_data = _collect_shortage_data(lecturer_id, subjects, threshold)
 
         lecturer_name = None
         try:
@@ -1110,19 +1039,12 @@ def export_attendance_shortage_pdf():
         except Exception:
             pass
 
-        from flask import make_response
         pdf_bytes = ReportingService.generate_attendance_shortage_pdf(threshold, shortage_data, lecturer_name=lecturer_name)
-        response = make_response(pdf_bytes or b'')
-        response.headers['Content-Type'] = 'application/pdf'
         fname = 'attendance_shortage'
         if selected_subject_id:
             fname += f'_{selected_subject_id}'
         # Support inline display for printing when ?inline=1
-        if request.args.get('inline') == '1':
-            response.headers['Content-Disposition'] = f'inline; filename={fname}.pdf'
-        else:
-            response.headers['Content-Disposition'] = f'attachment; filename={fname}.pdf'
-        return response
+        return _send_pdf(pdf_bytes, f'{fname}.pdf', as_attachment=request.args.get('inline') != '1')
     except Exception as e:
         flash(f'Error exporting attendance shortage PDF: {str(e)}', 'error')
         return redirect(url_for('lecturer.attendance_shortage_report'))
@@ -1133,7 +1055,9 @@ def marks_deficiency_report():
     """Overall marks deficiency report"""
     try:
         lecturer_id = session.get('user_id')
-        subjects = LecturerService.get_assigned_subjects(lecturer_id)
+        # Loaded once: filtered for the report, unfiltered for the subject picker
+        assigned_subjects = LecturerService.get_assigned_subjects(lecturer_id)
+        subjects = assigned_subjects
         
         # Optional filter by subject
         selected_subject_id = request.args.get('subject_id', type=int)
@@ -1143,39 +1067,12 @@ def marks_deficiency_report():
         # Get threshold from query parameter, default to 50%
         threshold = request.args.get('threshold', 50, type=int)
         
-        deficiency_data = []
-        for subject in subjects:
-            report, message = LecturerService.generate_marks_report(subject.id, lecturer_id)
-            if report:
-                # Check if any marks have been recorded for this subject
-                has_recorded_marks = False
-                for student_data in report:
-                    marks_summary = student_data.get('marks_summary', {})
-                    for component in ['internal1', 'internal2', 'assignment', 'project']:
-                        component_data = marks_summary.get(component, {})
-                        obtained = component_data.get('obtained', 0)
-                        max_marks = component_data.get('max', 0)
-                        if obtained > 0 or max_marks > 0:
-                            has_recorded_marks = True
-                            break
-                    if has_recorded_marks:
-                        break
-                
-                # Only include subjects that have recorded marks
-                if has_recorded_marks:
-                    # Filter students based on custom threshold (include 100% when threshold is 100)
-                    # Students with no recorded marks (overall_percentage is None) are considered deficient
-                    deficient_students = [r for r in report if r['overall_percentage'] is None or r['overall_percentage'] <= threshold]
-                    if deficient_students:
-                        deficiency_data.append({
-                            'subject': subject,
-                            'deficient_students': deficient_students
-                        })
+        deficiency_data = _collect_deficiency_data(lecturer_id, subjects, threshold)
         
         return render_template('lecturer/marks_deficiency.html', 
                              deficiency_data=deficiency_data, 
                              threshold=threshold,
-                             subjects=LecturerService.get_assigned_subjects(lecturer_id),
+                             subjects=assigned_subjects,
                              selected_subject_id=selected_subject_id)
     except Exception as e:
         flash(f'Error loading marks deficiency report: {str(e)}', 'error')
@@ -1195,32 +1092,8 @@ def export_marks_deficiency_excel():
             subjects = [s for s in subjects if s.id == selected_subject_id]
         threshold = request.args.get('threshold', 50, type=int)
 
-        deficiency_data = []
-        for subject in subjects:
-            report, _ = LecturerService.generate_marks_report(subject.id, lecturer_id)
-            if report:
-                # Check if any marks have been recorded for this subject
-                has_recorded_marks = False
-                for student_data in report:
-                    marks_summary = student_data.get('marks_summary', {})
-                    for component in ['internal1', 'internal2', 'assignment', 'project']:
-                        component_data = marks_summary.get(component, {})
-                        obtained = component_data.get('obtained', 0)
-                        max_marks = component_data.get('max', 0)
-                        if obtained > 0 or max_marks > 0:
-                            has_recorded_marks = True
-                            break
-                    if has_recorded_marks:
-                        break
-                
-                # Only include subjects that have recorded marks
-                if has_recorded_marks:
-                    # Students with no recorded marks (overall_percentage is None) are considered deficient
-                    deficient_students = [r for r in report if r['overall_percentage'] is None or r['overall_percentage'] <= threshold]
-                    if deficient_students:
-                        deficiency_data.append({'subject': subject, 'deficient_students': deficient_students})
-
-        from flask import make_response
+        deficiency_data = _collect_deficiency_data(lecturer_id, subjects, threshold)
+
         lecturer_name = None
         try:
             from models.user import Lecturer
@@ -1229,13 +1102,10 @@ def export_marks_deficiency_excel():
         except Exception:
             lecturer_name = None
         excel_bytes = ExcelExportService.export_marks_deficiency(threshold, deficiency_data, lecturer_name=lecturer_name, selected_subject_id=selected_subject_id)
-        response = make_response(excel_bytes or b'')
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         fname = 'marks_deficiency'
         if selected_subject_id:
             fname += f'_{selected_subject_id}'
-        response.headers['Content-Disposition'] = f'attachment; filename={fname}.xlsx'
-        return response
+        return _send_xlsx(BytesIO(excel_bytes or b''), f'{fname}.xlsx')
     except Exception as e:
         flash(f'Error exporting marks deficiency: {str(e)}', 'error')
         return redirect(url_for('lecturer.marks_deficiency_report'))
@@ -1252,30 +1122,7 @@ def export_marks_deficiency_pdf():
             subjects = [s for s in subjects if s.id == selected_subject_id]
         threshold = request.args.get('threshold', 50, type=int)
 
-        deficiency_data = []
-        for subject in subjects:
-            report, _ = LecturerService.generate_marks_report(subject.id, lecturer_id)
-            if report:
-                # Check if any marks have been recorded for this subject
-                has_recorded_marks = False
-                for student_data in report:
-                    marks_summary = student_data.get('marks_summary', {})
-                    for component in ['internal1', 'internal2', 'assignment', 'project']:
-                        component_data = marks_summary.get(component, {})
-                        obtained = component_data.get('obtained', 0)
-                        max_marks = component_data.get('max', 0)
-                        if obtained > 0 or max_marks > 0:
-                            has_recorded_marks = True
-                            break
-                    if has_recorded_marks:
-                        break
-                
-                # Only include subjects that have recorded marks
-                if has_recorded_marks:
-                    # Students with no recorded marks (overall_percentage is None) are considered deficient
-                    deficient_students = [r for r in report if r['overall_percentage'] is None or r['overall_percentage'] <= threshold]
-                    if deficient_students:
-                        deficiency_data.append({'subject': subject, 'deficient_students': deficient_students})
+        deficiency_data = _collect_deficiency_data(lecturer_id, subjects, threshold)
 
         lecturer_name = None
         try:
@@ -1285,17 +1132,12 @@ def export_marks_deficiency_pdf():
         except Exception:
             pass
 
-        from flask import make_response
         pdf_bytes = ReportingService.generate_marks_deficiency_pdf(threshold, deficiency_data, lecturer_name=lecturer_name)
-        response = make_response(pdf_bytes or b'')
-        response.headers['Content-Type'] = 'application/pdf'
         fname = 'marks_deficiency'
         if selected_subject_id:
             fname += f'_{selected_subject_id}'
-        if request.args.get('inline') == '1':
-            response.headers['Content-Disposition'] = f'inline; filename={fname}.pdf'
-        else:
-            response.headers['Content-Disposition'] = f'attachment; filename={fname}.pdf'
+        # Support inline display for printing when ?inline=1
+        response = _send_pdf(pdf_bytes, f'{fname}.pdf', as_attachment=request.args.get('inline') != '1')
         # Prevent client/proxy caching so latest layout is always served
         response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
         response.headers['Pragma'] = 'no-cache'
@@ -1307,6 +1149,7 @@ def export_marks_deficiency_pdf():
 
 @lecturer_bp.route('/subjects/<int:subject_id>/attendance/deputation/total-classes')
 @login_required('lecturer')
+@subject_assignment_required(json_response=True)
 def get_deputation_total_classes(subject_id):
     """Get cumulative total classes for deputation"""
     try:
@@ -1319,19 +1162,6 @@ def get_deputation_total_classes(subject_id):
                 'message': 'Year parameter is required'
             }), 400
         
-        # Verify lecturer is assigned to this subject
-        assignment = SubjectAssignment.query.filter_by(
-            lecturer_id=lecturer_id,
-            subject_id=subject_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
-            return jsonify({
-                'success': False,
-                'message': 'You are not assigned to this subject'
-            }), 403
-        
         # Get cumulative total classes for the year
         cumulative_total_classes = LecturerService.get_cumulative_total_classes(
             subject_id, lecturer_id, year
@@ -1345,7 +1175,7 @@ def get_deputation_total_classes(subject_id):
         })
         
     except Exception as e:
-        print(f"Error getting deputation total classes: {str(e)}")
+        logger.error("Error getting deputation total classes: %s", e)
         return jsonify({
             'success': False,
             'message': f'Error: {str(e)}'
@@ -1353,22 +1183,12 @@ def get_deputation_total_classes(subject_id):
 
 @lecturer_bp.route('/subjects/<int:subject_id>/attendance/deputation', methods=['POST'])
 @login_required('lecturer')
+@subject_assignment_required()
 def record_deputation_attendance(subject_id):
     """Record deputation attendance for students"""
     try:
         lecturer_id = session.get('user_id')
         
-        # Verify lecturer is assigned to this subject
-        assignment = SubjectAssignment.query.filter_by(
-            lecturer_id=lecturer_id,
-            subject_id=subject_id,
-            is_active=True
-        ).first()
-        
-        if not assignment:
-            flash('You are not assigned to this subject.', 'error')
-            return redirect(url_for('lecturer.subjects'))
-        
         # Get form data; month/year are optional for deputation flow
         month = request.form.get('month')
         year_str = request.form.get('year')
@@ -1390,17 +1210,22 @@ def record_deputation_attendance(subject_id):
      
         
         # Validate deputation entries
-        students = LecturerService.get_subject_students(subject_id, lecturer_id)
+        students = _get_subject_students(subject_id, lecturer_id)
         deputation_data = {}
+        # Map deputation_<student_id> fields once instead of probing the form per student
+        deputation_values = {
+            int(match.group(1)): value
+            for key, value in request.form.items()
+            if (match := DEPUTATION_FIELD_RE.fullmatch(key))
+        }
+        # Cumulative present counts for validation, fetched once for all students
+        present_map = LecturerService.get_cumulative_present_counts_bulk(subject_id, lecturer_id, year)
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         for student in students:
-            deputation_key = f'deputation_{student.id}'
-            deputation_value = request.form.get(deputation_key, '0')
-            # Debug log each incoming student value
-            try:
-                print(f"[Deputation] Incoming value for student {student.id} ({student.name}): {deputation_value}")
-            except Exception:
-                pass
+            deputation_value = deputation_values.get(student.id, '0')
+            if debug:
+                logger.debug("[Deputation] Incoming value for student %s (%s): %s", student.id, student.name, deputation_value)
             
             # Handle None values and empty strings
             if deputation_value is None or deputation_value == '':
@@ -1411,13 +1236,10 @@ def record_deputation_attendance(subject_id):
                 # Ensure non-negative values
                 deputation_count = max(0, deputation_count)
             except (ValueError, TypeError) as e:
-                print(f"Error parsing deputation value for student {student.id}: {deputation_value}, error: {e}")
+                logger.warning("Error parsing deputation value for student %s: %s, error: %s", student.id, deputation_value, e)
                 deputation_count = 0
             
-            # Get cumulative present count for validation
-            cumulative_present = LecturerService.get_cumulative_present_count(
-                student.id, subject_id, lecturer_id, year
-            )
+            cumulative_present = present_map.get(student.id, 0)
             
             # Validation: cumulative present + deputation should not exceed total classes
             if cumulative_present + deputation_count > total_classes:
@@ -1433,34 +1255,35 @@ def record_deputation_attendance(subject_id):
         
         if success:
             flash('Deputation attendance recorded successfully!', 'success')
-            # Diagnostics: read back a few values we just saved to ensure persistence
+        else:
+            flash(f'Error recording deputation attendance: {message}', 'error')
+        
+        # Diagnostics: read back a few values we just saved to ensure persistence
+        if success and debug:
             try:
                 from models.attendance import MonthlyStudentAttendance as MSA
                 from sqlalchemy import func
                 non_zero = {sid: val for sid, val in deputation_data.items() if val}
                 sample_ids = list(non_zero.keys())[:10] or list(deputation_data.keys())[:10]
-                verify_map = {}
-                for sid in sample_ids:
-                    rec = (db.session.query(MSA)
-                        .filter(
-                            MSA.student_id == sid,
-                            MSA.subject_id == subject_id,
-                            MSA.lecturer_id == lecturer_id,
-                            MSA.month == 13,
-                            MSA.year == year
-                        ).first())
-                    verify_map[sid] = int(rec.deputation_count) if rec else -1
+                saved = dict(db.session.query(MSA.student_id, MSA.deputation_count)
+                    .filter(
+                        MSA.student_id.in_(sample_ids),
+                        MSA.subject_id == subject_id,
+                        MSA.lecturer_id == lecturer_id,
+                        MSA.month == 13,
+                        MSA.year == year
+                    ).all()) if sample_ids else {}
+                # -1 marks a sampled student whose row was not found
+                verify_map = {sid: int(saved[sid]) if sid in saved else -1 for sid in sample_ids}
                 total_by_year = (db.session.query(func.coalesce(func.sum(MSA.deputation_count), 0))
                     .filter(
                         MSA.subject_id == subject_id,
                         MSA.lecturer_id == lecturer_id,
                         MSA.year == year
                     ).scalar() or 0)
-               
+                logger.debug("[Deputation][SaveVerify] subj=%s year=%s saved=%s total=%s", subject_id, year, verify_map, total_by_year)
             except Exception as _e:
-                print(f"[Deputation][SaveVerify] error: {_e}")
-        else:
-            flash(f'Error recording deputation attendance: {message}', 'error')
+                logger.debug("[Deputation][SaveVerify] error: %s", _e)
         
         return redirect(url_for('lecturer.attendance_management', subject_id=subject_id))
         
@@ -12,7 +12,9 @@ from services.excel_export_service import ExcelExportService
 from models.user import Lecturer
 from models.academic import Course, Subject
 from models.student import Student
+from models.assignments import SubjectAssignment
 from database import db
+from sqlalchemy.orm import selectinload
 from utils.validators import validate_username, validate_password
 from openpyxl.styles import Font
 
@@ -708,7 +710,11 @@ def export_lecturer_credentials():
         from io import BytesIO
         
         # Get all active lecturers with their credentials
-        lecturers = Lecturer.query.filter_by(is_active=True).all()
+        lecturers = Lecturer.query.options(
+            selectinload(Lecturer.subject_assignments).joinedload(SubjectAssignment.subject)
+        ).filter_by(is_active=True).all()
+        
+        passwords = Lecturer.decrypt_many(lecturers)
         
         # Create workbook and worksheet
         wb = openpyxl.Workbook()
@@ -727,7 +733,7 @@ def export_lecturer_credentials():
             ws.cell(row=row, column=1, value=lecturer.lecturer_id)
             ws.cell(row=row, column=2, value=lecturer.name)
             ws.cell(row=row, column=3, value=lecturer.username)
-            ws.cell(row=row, column=4, value=lecturer.get_decrypted_password() or 'N/A')
+            ws.cell(row=row, column=4, value=passwords[lecturer.id] or 'N/A')
             assigned_subjects = [subject.name for subject in lecturer.get_assigned_subjects()]
             ws.cell(row=row, column=5, value=', '.join(assigned_subjects) if assigned_subjects else 'No subjects assigned')
             ws.cell(row=row, column=6, value=lecturer.created_at.strftime('%Y-%m-%d') if lecturer.created_at else '')
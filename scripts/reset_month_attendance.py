@@ -29,6 +29,7 @@ if PROJECT_ROOT not in sys.path:
 from app import create_app
 from database import db
 from models.attendance import AttendanceRecord, MonthlyStudentAttendance, MonthlyAttendanceSummary
+from models.student import Student, StudentEnrollment
 
 
 def prompt_month_year(cli_month: int | None, cli_year: int | None, auto_yes: bool, dry_run: bool):
@@ -97,6 +98,9 @@ def reset_month(month: int, year: int, dry_run: bool = False):
         deleted_ar = ar_q.delete(synchronize_session=False)
         deleted_msa = msa_q.delete(synchronize_session=False)
         deleted_mas = mas_q.delete(synchronize_session=False)
+        # Bulk deletes bypass the ORM events that keep enrollment counters in sync
+        StudentEnrollment.refresh_attendance_counts()
+        Student.refresh_overall_counts()
         db.session.commit()
 
     return deleted_ar, deleted_msa, deleted_mas, ar_count, msa_count, mas_count
@@ -3,13 +3,15 @@ Authentication service for Moulya College Management System
 Handles login, password management, and session utilities
 """
 
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils import hashing
 from models.user import Management, Lecturer
 from database import db
 from datetime import datetime
 import random
 import string
 
+INVALID_CREDENTIALS = "Invalid username or password"
+
 class AuthService:
     """Authentication service class"""
     
@@ -49,11 +51,14 @@ class AuthService:
                 .first()
             )
             
-            if user and user.check_password(password):
+            if user is None:
+                hashing.verify_dummy(password)
+            elif user.check_password(password):
                 user.update_last_login()
+                db.session.commit()
                 return True, user, "Login successful"
             
-            return False, None, "Invalid username or password"
+            return False, None, INVALID_CREDENTIALS
         
         except Exception as e:
             return False, None, f"Authentication error: {str(e)}"
@@ -72,11 +77,14 @@ class AuthService:
                 .first()
             )
             
-            if user and user.check_password(password):
+            if user is None:
+                hashing.verify_dummy(password)
+            elif user.check_password(password):
                 user.update_last_login()
+                db.session.commit()
                 return True, user, "Login successful"
             
-            return False, None, "Invalid username or password"
+            return False, None, INVALID_CREDENTIALS
         
         except Exception as e:
             return False, None, f"Authentication error: {str(e)}"
@@ -114,9 +122,9 @@ class AuthService:
     
     @staticmethod
     def hash_password(password):
-        """Hash password using Werkzeug"""
+        """Hash password (Argon2id when available)"""
         try:
-            return generate_password_hash(password)
+            return hashing.hash_password(password)
         except Exception as e:
             raise Exception(f"Error hashing password: {str(e)}")
     
@@ -124,7 +132,7 @@ class AuthService:
     def verify_password(password, password_hash):
         """Verify password against hash"""
         try:
-            return check_password_hash(password_hash, password)
+            return hashing.verify_password(password_hash, password)
         except Exception as e:
             return False
     
@@ -260,6 +268,12 @@ class AuthService:
         except Exception as e:
             return None, f"Error getting user info: {str(e)}"
 
+# User type codes returned by SessionManager.snapshot
+USER_NONE = 0
+USER_MANAGEMENT = 1
+USER_LECTURER = 2
+_USER_TYPE_CODES = {'management': USER_MANAGEMENT, 'lecturer': USER_LECTURER}
+
 class SessionManager:
     """Session management utilities"""
     
@@ -282,6 +296,14 @@ class SessionManager:
         """Check if user is authenticated"""
         return 'user_type' in session and 'user_id' in session
     
+    @staticmethod
+    def snapshot(session):
+        """Read the session once and return (authenticated, user type code)"""
+        user_type = session.get('user_type')
+        if user_type is None or 'user_id' not in session:
+            return False, USER_NONE
+        return True, _USER_TYPE_CODES.get(user_type, USER_NONE)
+    
     @staticmethod
     def is_management(session):
         """Check if current user is management"""
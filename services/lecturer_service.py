@@ -11,9 +11,28 @@ from models.attendance import AttendanceRecord, MonthlyAttendanceSummary, Monthl
 from models.marks import StudentMarks
 from database import db
 from utils.db_helpers import safe_add_and_commit, safe_update_and_commit
-from datetime import datetime, date
+from collections import defaultdict
+from functools import lru_cache
+import logging
+from datetime import datetime, date, timedelta
 from sqlalchemy import extract, func
 from sqlalchemy import and_, extract, func
+from sqlalchemy.orm import lazyload, selectinload
+from utils.ttl_cache import TTLCache
+
+# Per-lecturer enrolled-student counts shown on the dashboard
+dashboard_stats_cache = TTLCache(ttl=60)
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=4096)
+def _classify_attendance(present_with_deputation, total_classes):
+    """(present, absent, rounded %, has_shortage) for one student; many students share the same counts"""
+    present_classes = min(present_with_deputation, total_classes) if total_classes > 0 else present_with_deputation
+    absent_classes = max(total_classes - present_classes, 0)
+    attendance_percentage = (present_classes / total_classes * 100) if total_classes > 0 else 0
+    # Round to 2 decimals to avoid loss of precision before rendering
+    return present_classes, absent_classes, round(attendance_percentage, 2), attendance_percentage < 75
 
 class LecturerService:
     """Lecturer service class"""
@@ -29,10 +48,22 @@ class LecturerService:
             # Get assigned subjects
             assigned_subjects = lecturer.get_assigned_subjects()
             
-            # Calculate total students across all subjects
-            total_students = 0
-            for subject in assigned_subjects:
-                total_students += subject.get_enrolled_students_count()
+            # Enrolled-student counts per subject, cached briefly per lecturer
+            subject_ids = sorted(subject.id for subject in assigned_subjects)
+            cached = dashboard_stats_cache.get(lecturer_id)
+            if cached is not None and cached[0] == subject_ids:
+                subject_student_counts = cached[1]
+            else:
+                subject_student_counts = dict.fromkeys(subject_ids, 0)
+                if subject_ids:
+                    subject_student_counts.update(StudentEnrollment.query.filter(
+                        StudentEnrollment.subject_id.in_(subject_ids),
+                        StudentEnrollment.is_active == True
+                    ).with_entities(
+                        StudentEnrollment.subject_id, func.count(StudentEnrollment.id)
+                    ).group_by(StudentEnrollment.subject_id).all())
+                dashboard_stats_cache.set(lecturer_id, (subject_ids, subject_student_counts))
+            total_students = sum(subject_student_counts.values())
             
             # Get recent attendance records
             recent_attendance = AttendanceRecord.query.filter_by(
@@ -43,6 +74,7 @@ class LecturerService:
                 'total_subjects': len(assigned_subjects),
                 'total_students': total_students,
                 'assigned_subjects': assigned_subjects,
+                'subject_student_counts': subject_student_counts,
                 'recent_attendance': recent_attendance
             }
             
@@ -51,45 +83,82 @@ class LecturerService:
             return {}
     
     @staticmethod
-    def get_assigned_subjects(lecturer_id):
-        """Get all subjects assigned to lecturer"""
+    def get_assigned_subjects(lecturer_id, with_course=True):
+        """Get subjects actively assigned to lecturer for the current academic year.
+
+        One query joined on SubjectAssignment; Subject.course is joined eagerly unless
+        with_course is False, for callers that only need subject columns.
+        """
         try:
-            lecturer = Lecturer.query.get(lecturer_id)
-            if not lecturer:
-                return []
-            
-            return lecturer.get_assigned_subjects()
+            query = (Subject.query
+                .join(SubjectAssignment, SubjectAssignment.subject_id == Subject.id)
+                .filter(
+                    SubjectAssignment.lecturer_id == lecturer_id,
+                    SubjectAssignment.academic_year == datetime.now().year,
+                    SubjectAssignment.is_active == True
+                )
+                .order_by(SubjectAssignment.id))
+            if not with_course:
+                query = query.options(lazyload(Subject.course))
+            return query.all()
         except Exception as e:
             return []
     
+    @staticmethod
+    def _subject_students_query(subject_id, lecturer_id):
+        """Query for students enrolled in a subject, or None if the lecturer is not assigned"""
+        # Verify lecturer is assigned to this subject
+        assignment = SubjectAssignment.query.filter_by(
+            lecturer_id=lecturer_id,
+            subject_id=subject_id,
+            is_active=True
+        ).first()
+        
+        if not assignment:
+            return None
+        
+        subject = Subject.query.get(subject_id)
+        if not subject:
+            return None
+        
+        # Students ordered by roll number ascending; selecting Student directly
+        # avoids a lazy load per enrollment, and courses arrive in one extra query
+        return Student.query\
+            .join(StudentEnrollment, Student.id == StudentEnrollment.student_id)\
+            .filter(StudentEnrollment.subject_id == subject_id, StudentEnrollment.is_active == True)\
+            .options(selectinload(Student.course))\
+            .order_by(Student.roll_number.asc())
+    
     @staticmethod
     def get_subject_students(subject_id, lecturer_id):
         """Get students enrolled in a subject"""
         try:
-            # Verify lecturer is assigned to this subject
-            assignment = SubjectAssignment.query.filter_by(
-                lecturer_id=lecturer_id,
-                subject_id=subject_id,
-                is_active=True
-            ).first()
-            
-            if not assignment:
-                return []
-            
-            subject = Subject.query.get(subject_id)
-            if not subject:
-                return []
-            
-            # Return students ordered by roll number ascending
-            enrollments = StudentEnrollment.query\
-                .filter_by(subject_id=subject_id, is_active=True)\
-                .join(Student, Student.id == StudentEnrollment.student_id)\
-                .order_by(Student.roll_number.asc())\
-                .all()
-            return [e.student for e in enrollments]
+            query = LecturerService._subject_students_query(subject_id, lecturer_id)
+            return query.all() if query is not None else []
         except Exception as e:
             return []
     
+    @staticmethod
+    def get_subject_students_page(subject_id, lecturer_id, page=1, per_page=50):
+        """Get one page of students enrolled in a subject, or None if unavailable"""
+        try:
+            query = LecturerService._subject_students_query(subject_id, lecturer_id)
+            if query is None:
+                return None
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            # Out-of-range pages fall back to the last page rather than an empty list
+            if pagination.pages and pagination.page > pagination.pages:
+                pagination = query.paginate(page=pagination.pages, per_page=per_page, error_out=False)
+            return pagination
+        except Exception as e:
+            return None
+    
+    @staticmethod
+    def get_enrolled_student_ids(subject_id):
+        """Get the ids of all students actively enrolled in a subject"""
+        return {student_id for (student_id,) in db.session.query(StudentEnrollment.student_id)
+                .filter_by(subject_id=subject_id, is_active=True)}
+    
     @staticmethod
     def enroll_students(subject_id, student_ids, lecturer_id):
         """Enroll multiple students in a subject"""
@@ -134,6 +203,8 @@ class LecturerService:
             if enrolled_count > 0:
                 success, message = safe_update_and_commit()
                 if success:
+                    # Subjects can be shared between lecturers, so drop every cached count
+                    dashboard_stats_cache.clear()
                     return True, f"Successfully enrolled {enrolled_count} students"
                 else:
                     return False, message
@@ -173,6 +244,8 @@ class LecturerService:
             if unenrolled_count > 0:
                 success, message = safe_update_and_commit()
                 if success:
+                    # Subjects can be shared between lecturers, so drop every cached count
+                    dashboard_stats_cache.clear()
                     return True, f"Successfully unenrolled {unenrolled_count} students"
                 else:
                     return False, message
@@ -199,35 +272,37 @@ class LecturerService:
             if not attendance_date:
                 attendance_date = date.today()
             
-            recorded_count = 0
             updated_count = 0
+            new_rows = []
+            
+            # Load this date's existing records for all students at once
+            existing_by_student = {
+                record.student_id: record
+                for record in AttendanceRecord.query.filter(
+                    AttendanceRecord.subject_id == subject_id,
+                    AttendanceRecord.date == attendance_date,
+                    AttendanceRecord.student_id.in_(list(attendance_data.keys()))
+                )
+            }
             
             for student_id, status in attendance_data.items():
-                try:
-                    # Check if attendance already exists for this date
-                    existing = AttendanceRecord.query.filter_by(
-                        student_id=student_id,
-                        subject_id=subject_id,
-                        date=attendance_date
-                    ).first()
-                    
-                    if existing:
-                        existing.status = status
-                        existing.updated_at = datetime.utcnow()
-                        updated_count += 1
-                    else:
-                        attendance = AttendanceRecord(
-                            student_id=student_id,
-                            subject_id=subject_id,
-                            lecturer_id=lecturer_id,
-                            date=attendance_date,
-                            status=status
-                        )
-                        db.session.add(attendance)
-                        recorded_count += 1
-                        
-                except Exception as e:
-                    continue
+                existing = existing_by_student.get(student_id)
+                if existing:
+                    existing.status = status
+                    existing.updated_at = datetime.utcnow()
+                    updated_count += 1
+                else:
+                    new_rows.append({
+                        'student_id': student_id,
+                        'subject_id': subject_id,
+                        'lecturer_id': lecturer_id,
+                        'date': attendance_date,
+                        'status': status
+                    })
+            
+            # New records go in as one executemany instead of one INSERT per student
+            db.session.flush()
+            recorded_count = AttendanceRecord.bulk_create(new_rows)
             
             success, message = safe_update_and_commit()
             if success:
@@ -253,9 +328,9 @@ class LecturerService:
             if not assignment:
                 return False, "You are not assigned to this subject"
             
-            # Get or create monthly summary
+            # Get or create monthly summary, locking it against concurrent submissions
             summary = MonthlyAttendanceSummary.get_or_create(
-                subject_id, lecturer_id, month, year, total_classes
+                subject_id, lecturer_id, month, year, total_classes, for_update=True
             )
             
             success, message = safe_update_and_commit()
@@ -332,139 +407,206 @@ class LecturerService:
             return False, f"Error adding marks: {str(e)}"
     
     @staticmethod
-    def generate_attendance_report(subject_id, lecturer_id):
-        """Generate attendance report for a subject using monthly summary tables.
+    def _assigned_subject_ids(lecturer_id, subject_ids=None):
+        """Ids of the given subjects (or all) actively assigned to a lecturer"""
+        query = db.session.query(SubjectAssignment.subject_id).filter(
+            SubjectAssignment.lecturer_id == lecturer_id,
+            SubjectAssignment.is_active == True
+        )
+        if subject_ids is not None:
+            if not subject_ids:
+                return []
+            query = query.filter(SubjectAssignment.subject_id.in_(subject_ids))
+        return sorted({subject_id for (subject_id,) in query.all()})
+    
+    @staticmethod
+    def _build_attendance_reports(subject_ids, threshold=None):
+        """Build attendance report rows for many subjects with three grouped queries.
 
         Totals are computed from MonthlyAttendanceSummary (sum of total_classes),
-        and per-student presents from MonthlyStudentAttendance (sum of present_count).
-        This aligns with the new monthly marking model that allows multiple classes per day.
+        and per-student presents from MonthlyStudentAttendance (sum of present_count
+        plus deputation_count), both overall across all lecturers. With a threshold,
+        only students at or below it in subjects with recorded classes are kept.
+        """
+        reports = {subject_id: [] for subject_id in subject_ids}
+        if not subject_ids:
+            return reports
+        
+        # Order enrolled students by roll number (and name as tiebreaker) for reports
+        enrolled = (db.session.query(StudentEnrollment.subject_id, Student)
+            .join(Student, Student.id == StudentEnrollment.student_id)
+            .filter(StudentEnrollment.subject_id.in_(subject_ids), StudentEnrollment.is_active == True)
+            .order_by(Student.roll_number.asc(), Student.name.asc())
+            .all())
+        
+        totals = dict(db.session.query(
+            MonthlyAttendanceSummary.subject_id,
+            func.sum(MonthlyAttendanceSummary.total_classes)
+        ).filter(
+            MonthlyAttendanceSummary.subject_id.in_(subject_ids)
+        ).group_by(MonthlyAttendanceSummary.subject_id).all())
+        
+        presents = {
+            (subject_id, student_id): int(present or 0) + int(deputation or 0)
+            for subject_id, student_id, present, deputation in db.session.query(
+                MonthlyStudentAttendance.subject_id,
+                MonthlyStudentAttendance.student_id,
+                func.sum(MonthlyStudentAttendance.present_count),
+                func.sum(MonthlyStudentAttendance.deputation_count)
+            ).filter(
+                MonthlyStudentAttendance.subject_id.in_(subject_ids)
+            ).group_by(MonthlyStudentAttendance.subject_id, MonthlyStudentAttendance.student_id).all()
+        }
+        
+        subject_totals = {subject_id: int(totals.get(subject_id) or 0) for subject_id in subject_ids}
+        for subject_id, student in enrolled:
+            total_classes = subject_totals[subject_id]
+            if threshold is not None and total_classes == 0:
+                continue
+            present_classes, absent_classes, attendance_percentage, has_shortage = _classify_attendance(
+                presents.get((subject_id, student.id), 0), total_classes
+            )
+            if threshold is not None and attendance_percentage > threshold:
+                continue
+            
+            reports[subject_id].append({
+                'student': student,
+                'total_classes': total_classes,
+                'present_classes': present_classes,
+                'absent_classes': absent_classes,
+                'attendance_percentage': attendance_percentage,
+                'has_shortage': has_shortage
+            })
+        
+        return reports
+    
+    @staticmethod
+    def _build_marks_reports(subject_ids, threshold=None):
+        """Build marks report rows for many subjects with two queries.
+
+        With a threshold, only students at or below it (or without marks) in
+        subjects with recorded marks are kept.
         """
+        reports = {subject_id: [] for subject_id in subject_ids}
+        if not subject_ids:
+            return reports
+        
+        enrolled = (db.session.query(StudentEnrollment.subject_id, Student)
+            .join(Student, Student.id == StudentEnrollment.student_id)
+            .filter(StudentEnrollment.subject_id.in_(subject_ids), StudentEnrollment.is_active == True)
+            .order_by(StudentEnrollment.id)
+            .all())
+        
+        summaries = defaultdict(lambda: {
+            'internal1': {'obtained': 0, 'max': 0},
+            'internal2': {'obtained': 0, 'max': 0},
+            'assignment': {'obtained': 0, 'max': 0},
+            'project': {'obtained': 0, 'max': 0}
+        })
+        marks = db.session.query(
+            StudentMarks.subject_id,
+            StudentMarks.student_id,
+            StudentMarks.assessment_type,
+            StudentMarks.marks_obtained,
+            StudentMarks.max_marks
+        ).filter(StudentMarks.subject_id.in_(subject_ids)).all()
+        for subject_id, student_id, assessment_type, marks_obtained, max_marks in marks:
+            summary = summaries[(subject_id, student_id)]
+            if assessment_type in summary:
+                summary[assessment_type]['obtained'] = marks_obtained
+                summary[assessment_type]['max'] = max_marks
+        
+        recorded_subject_ids = set()
+        for subject_id, student in enrolled:
+            marks_summary = summaries[(subject_id, student.id)]
+            if any((entry['obtained'] or 0) > 0 or (entry['max'] or 0) > 0 for entry in marks_summary.values()):
+                recorded_subject_ids.add(subject_id)
+            # Compute overall strictly from what is displayed in marks_summary so UI columns
+            # and the Overall % stay consistent (ignores assessments with no max set).
+            try:
+                total_obtained = 0.0
+                total_max = 0.0
+                for key in ('internal1', 'internal2', 'assignment', 'project'):
+                    entry = marks_summary[key]
+                    if entry['max'] not in (None, 0, 0.0):
+                        total_max += float(entry['max'])
+                        total_obtained += float(entry['obtained'] or 0)
+                overall_percentage = (total_obtained / total_max) * 100 if total_max > 0 else None
+            except Exception:
+                # Fallback to DB-based computation if summary parsing fails
+                overall_percentage = StudentMarks.get_student_overall_percentage(student.id, subject_id)
+            if threshold is not None and overall_percentage is not None and overall_percentage > threshold:
+                continue
+            
+            reports[subject_id].append({
+                'student': student,
+                'marks_summary': marks_summary,
+                'overall_percentage': overall_percentage,
+                'has_deficiency': overall_percentage is None or overall_percentage < 50
+            })
+        
+        if threshold is not None:
+            for subject_id in reports:
+                if subject_id not in recorded_subject_ids:
+                    reports[subject_id] = []
+        
+        return reports
+    
+    @staticmethod
+    def generate_attendance_report(subject_id, lecturer_id):
+        """Generate attendance report for a subject using monthly summary tables"""
         try:
-            # Verify lecturer is assigned to this subject
-            assignment = SubjectAssignment.query.filter_by(
-                lecturer_id=lecturer_id,
-                subject_id=subject_id,
-                is_active=True
-            ).first()
-            
-            if not assignment:
+            if not LecturerService._assigned_subject_ids(lecturer_id, [subject_id]):
                 return None, "You are not assigned to this subject"
             
             subject = Subject.query.get(subject_id)
             if not subject:
                 return None, "Subject not found"
             
-            # Order enrolled students by roll number (and name as tiebreaker) for reports
-            enrollments_sorted = (StudentEnrollment.query
-                .filter_by(subject_id=subject_id, is_active=True)
-                .join(Student, Student.id == StudentEnrollment.student_id)
-                .order_by(Student.roll_number.asc(), Student.name.asc())
-                .all())
-            enrolled_students = [e.student for e in enrollments_sorted]
-            report_data = []
-            
-            # Compute subject total classes cumulatively (overall across all lecturers)
-            total_classes_cumulative = (db.session.query(func.coalesce(func.sum(MonthlyAttendanceSummary.total_classes), 0))
-                .filter(
-                    MonthlyAttendanceSummary.subject_id == subject_id
-                ).scalar() or 0)
-            total_classes_cumulative = int(total_classes_cumulative)
-            
-            for student in enrolled_students:
-                # Sum student's presents cumulatively across months (overall across all lecturers)
-                present_cumulative = (db.session.query(func.coalesce(func.sum(MonthlyStudentAttendance.present_count), 0))
-                    .filter(
-                        MonthlyStudentAttendance.student_id == student.id,
-                        MonthlyStudentAttendance.subject_id == subject_id
-                    ).scalar() or 0)
-                present_cumulative = int(present_cumulative)
-                # Sum student's deputation cumulatively across months (overall across all lecturers)
-                deputation_cumulative = (db.session.query(func.coalesce(func.sum(MonthlyStudentAttendance.deputation_count), 0))
-                    .filter(
-                        MonthlyStudentAttendance.student_id == student.id,
-                        MonthlyStudentAttendance.subject_id == subject_id
-                    ).scalar() or 0)
-                deputation_cumulative = int(deputation_cumulative)
-                
-                total_classes = total_classes_cumulative
-                present_with_deputation = present_cumulative + deputation_cumulative
-                present_classes = min(present_with_deputation, total_classes) if total_classes > 0 else present_with_deputation
-                absent_classes = max(total_classes - present_classes, 0)
-                attendance_percentage = (present_classes / total_classes * 100) if total_classes > 0 else 0
-                
-                report_data.append({
-                    'student': student,
-                    'total_classes': total_classes,
-                    'present_classes': present_classes,
-                    'absent_classes': absent_classes,
-                    # Round to 2 decimals to avoid loss of precision before rendering
-                    'attendance_percentage': round(attendance_percentage, 2),
-                    'has_shortage': attendance_percentage < 75
-                })
-            
+            report_data = LecturerService._build_attendance_reports([subject_id])[subject_id]
             return report_data, "Report generated successfully"
             
         except Exception as e:
             return None, f"Error generating report: {str(e)}"
     
+    @staticmethod
+    def generate_attendance_reports_bulk(lecturer_id, subject_ids=None, threshold=None):
+        """Attendance reports for the lecturer's assigned subjects, keyed by subject id"""
+        try:
+            subject_ids = LecturerService._assigned_subject_ids(lecturer_id, subject_ids)
+            return LecturerService._build_attendance_reports(subject_ids, threshold)
+        except Exception as e:
+            return {}
+    
     @staticmethod
     def generate_marks_report(subject_id, lecturer_id):
         """Generate marks report for a subject"""
         try:
-            # Verify lecturer is assigned to this subject
-            assignment = SubjectAssignment.query.filter_by(
-                lecturer_id=lecturer_id,
-                subject_id=subject_id,
-                is_active=True
-            ).first()
-            
-            if not assignment:
+            if not LecturerService._assigned_subject_ids(lecturer_id, [subject_id]):
                 return None, "You are not assigned to this subject"
             
             subject = Subject.query.get(subject_id)
             if not subject:
                 return None, "Subject not found"
             
-            enrolled_students = subject.get_enrolled_students()
-            report_data = []
-            
-            for student in enrolled_students:
-                marks_summary = student.get_subject_marks_summary(subject_id)
-                # Compute overall strictly from what is displayed in marks_summary so UI columns
-                # and the Overall % stay consistent (ignores assessments with no max set).
-                try:
-                    total_obtained = 0.0
-                    total_max = 0.0
-                    for key in ('internal1', 'internal2', 'assignment', 'project'):
-                        entry = marks_summary.get(key) if isinstance(marks_summary, dict) else None
-                        if not entry:
-                            continue
-                        obtained = entry.get('obtained') if isinstance(entry, dict) else None
-                        max_marks = entry.get('max') if isinstance(entry, dict) else None
-                        if max_marks not in (None, 0, 0.0):
-                            total_max += float(max_marks)
-                            total_obtained += float(obtained or 0)
-                    overall_percentage = (total_obtained / total_max) * 100 if total_max > 0 else None
-                except Exception:
-                    # Fallback to DB-based computation if summary parsing fails
-                    fallback_percentage = StudentMarks.get_student_overall_percentage(student.id, subject_id)
-                    overall_percentage = fallback_percentage if fallback_percentage is not None else None
-                
-                report_data.append({
-                    'student': student,
-                    'marks_summary': marks_summary,
-                    'overall_percentage': overall_percentage,
-                    'has_deficiency': overall_percentage is None or overall_percentage < 50
-                })
-            
+            report_data = LecturerService._build_marks_reports([subject_id])[subject_id]
             return report_data, "Report generated successfully"
             
         except Exception as e:
             return None, f"Error generating report: {str(e)}"
     
     @staticmethod
-    def record_monthly_attendance(subject_id, lecturer_id, month, year, total_classes, attendance_data):
-        """Record monthly attendance for all students at once"""
+    def generate_marks_reports_bulk(lecturer_id, subject_ids=None, threshold=None):
+        """Marks reports for the lecturer's assigned subjects, keyed by subject id"""
+        try:
+            subject_ids = LecturerService._assigned_subject_ids(lecturer_id, subject_ids)
+            return LecturerService._build_marks_reports(subject_ids, threshold)
+        except Exception as e:
+            return {}
+    
+    @staticmethod
+    def record_monthly_attendance_bulk(subject_id, lecturer_id, month, year, total_classes, attendance_data):
+        """Record monthly attendance for all students, validating every entry before one batched write"""
         try:
             # Verify lecturer is assigned to this subject
             assignment = SubjectAssignment.query.filter_by(
@@ -476,23 +618,26 @@ class LecturerService:
             if not assignment:
                 return False, "You are not assigned to this subject"
             
-            # Compute monthly delta from cumulative inputs
-            from datetime import date as date_class
-            import calendar
-
-            # Previous month/year
-            prev_year = year
-            prev_month = month - 1
-            if prev_month == 0:
-                prev_month = 12
-                prev_year -= 1
-
-            # Sum prior months' total_classes to get cumulative through previous month
-            prior_total_classes = db.session.query(func.coalesce(func.sum(MonthlyAttendanceSummary.total_classes), 0)).filter(
+            # Lock this subject's summaries through the selected month so concurrent
+            # submissions cannot change the prior cumulative between validation and
+            # write; the prior total and the month's own summary come from those rows
+            locked_summaries = MonthlyAttendanceSummary.query.filter(
                 MonthlyAttendanceSummary.subject_id == subject_id,
                 MonthlyAttendanceSummary.lecturer_id == lecturer_id,
-                ( (MonthlyAttendanceSummary.year < year) | ((MonthlyAttendanceSummary.year == year) & (MonthlyAttendanceSummary.month < month)) )
-            ).scalar() or 0
+                ((MonthlyAttendanceSummary.year < year) |
+                 ((MonthlyAttendanceSummary.year == year) & (MonthlyAttendanceSummary.month <= month)))
+            ).with_for_update().all()
+            summary = None
+            prior_total_classes = 0
+            for locked in locked_summaries:
+                if locked.year == year and locked.month == month:
+                    summary = locked
+                else:
+                    prior_total_classes += int(locked.total_classes or 0)
+            # Per-student presents through the previous month
+            prev_present_map = LecturerService.get_prev_present_map(
+                subject_id, lecturer_id, year, month, attendance_data.keys()
+            )
 
             # Validate cumulative total must be at least prior cumulative (non-decreasing)
             if total_classes < prior_total_classes:
@@ -503,23 +648,62 @@ class LecturerService:
             # Calculate delta classes for this month
             month_total_classes = total_classes - prior_total_classes
 
+            # Validate every student before writing anything: the cumulative for this
+            # month must be at least the student's presents in previous months and can
+            # grow by at most this month's classes, never past the total classes
+            monthly_presents = {}
+            errors = []
+            for student_id, attended_cumulative in attendance_data.items():
+                student_id = int(student_id)
+                prev_present = prev_present_map.get(student_id, 0)
+                max_allowed = min(prev_present + month_total_classes, total_classes)
+                if attended_cumulative is None:
+                    attended_cumulative = 0
+                if attended_cumulative < prev_present:
+                    errors.append((student_id, f"is too low (minimum is {prev_present})"))
+                elif attended_cumulative > max_allowed:
+                    errors.append((student_id, f"is too high (maximum is {max_allowed})"))
+                else:
+                    monthly_presents[student_id] = attended_cumulative - prev_present
+            
+            if errors:
+                students = {student.id: student for student in Student.query.filter(
+                    Student.id.in_([student_id for student_id, _ in errors])
+                )}
+                details = []
+                for student_id, problem in errors:
+                    student = students.get(student_id)
+                    student_label = f"{student.name} ({student.roll_number})" if student else str(student_id)
+                    details.append(f"{student_label} {problem}")
+                return False, f"Cumulative attendance is invalid for {len(errors)} student(s): " + "; ".join(details) + "."
+
             # Create or update monthly summary using monthly delta
-            summary = MonthlyAttendanceSummary.get_or_create(
-                subject_id, lecturer_id, month, year, month_total_classes
-            )
+            if summary is None:
+                summary = MonthlyAttendanceSummary(
+                    subject_id=subject_id,
+                    lecturer_id=lecturer_id,
+                    month=month,
+                    year=year,
+                    total_classes=month_total_classes
+                )
+                db.session.add(summary)
+            else:
+                summary.total_classes = month_total_classes
+                summary.updated_at = datetime.utcnow()
 
             # Ensure daily records reflect the month's delta exactly:
             # remove any existing records in this month beyond the new total (e.g., when total reduced)
             # This keeps the unique class days equal to month_total_classes for reporting.
             def _cleanup_days_beyond_delta():
                 try:
-                    # Delete records where day index in month exceeds month_total_classes
+                    # Delete records where day index in month exceeds month_total_classes;
+                    # "day > N" is expressed as a date bound so the range stays index-friendly
+                    last_kept_day = date(year, month, 1) + timedelta(days=month_total_classes - 1)
                     extra_recs = AttendanceRecord.query.filter(
                         AttendanceRecord.subject_id == subject_id,
                         AttendanceRecord.lecturer_id == lecturer_id,
-                        extract('month', AttendanceRecord.date) == month,
-                        extract('year', AttendanceRecord.date) == year,
-                        func.extract('day', AttendanceRecord.date) > month_total_classes
+                        AttendanceRecord.in_month(month, year),
+                        AttendanceRecord.date > last_kept_day
                     ).all()
                     for rec in extra_recs:
                         db.session.delete(rec)
@@ -530,74 +714,55 @@ class LecturerService:
 
             _cleanup_days_beyond_delta()
 
-            # Preload existing month records mapped by student for selective updates
-            existing_records_by_student = {}
-            existing_q = AttendanceRecord.query.filter(
-                AttendanceRecord.subject_id == subject_id,
-                AttendanceRecord.lecturer_id == lecturer_id,
-                extract('month', AttendanceRecord.date) == month,
-                extract('year', AttendanceRecord.date) == year
-            )
-            for rec in existing_q.all():
-                existing_records_by_student.setdefault(rec.student_id, []).append(rec)
-            
-            # Upsert per-student monthly attendance (supports multiple classes per day)
-            total_records_created = 0
-            for student_id, attended_cumulative in attendance_data.items():
-                # Present count up to previous month (use MonthlyStudentAttendance sums)
-                prev_present = (db.session.query(func.coalesce(func.sum(MonthlyStudentAttendance.present_count), 0))
-                    .filter(
-                        MonthlyStudentAttendance.student_id == student_id,
-                        MonthlyStudentAttendance.subject_id == subject_id,
-                        MonthlyStudentAttendance.lecturer_id == lecturer_id,
-                        ((MonthlyStudentAttendance.year < year) |
-                         ((MonthlyStudentAttendance.year == year) & (MonthlyStudentAttendance.month < month)))
-                    ).scalar() or 0)
-                # Monthly delta for student derived from cumulative without hard validation
-                # Normalize bad values and clamp within [0, month_total_classes]
-                if attended_cumulative is None:
-                    attended_cumulative = 0
-                # Hard validation: cumulative for this month must be at least the
-                # sum of all previous months for this student, and cannot exceed
-                # the total classes entered for the selected month.
-                if attended_cumulative < prev_present:
-                    student = Student.query.get(student_id)
-                    student_label = f"{student.name} ({student.roll_number})" if student else str(student_id)
-                    return False, (
-                        f"Cumulative for {student_label} is too low. "
-                        f"Minimum is {prev_present}."
-                    )
-                if attended_cumulative > total_classes:
-                    student = Student.query.get(student_id)
-                    student_label = f"{student.name} ({student.roll_number})" if student else str(student_id)
-                    return False, (
-                        f"Cumulative for {student_label} exceeds total classes. "
-                        f"Maximum is {total_classes}."
-                    )
-
-                attended_classes = attended_cumulative - prev_present
-                
-                if attended_classes < 0:
-                    attended_classes = 0
-                if attended_classes > month_total_classes:
-                    attended_classes = month_total_classes
-                absent_classes = max(month_total_classes - attended_classes, 0)
-
-                # Upsert MonthlyStudentAttendance with cumulative present for this month
-                msa = MonthlyStudentAttendance.get_or_create(student_id, subject_id, lecturer_id, month, year)
-                msa.present_count = attended_classes
-                total_records_created += 1
+            # One IN query finds the month's existing rows; the upsert is then a
+            # single batched UPDATE plus a single batched INSERT
+            existing_ids = dict(db.session.query(
+                    MonthlyStudentAttendance.student_id, MonthlyStudentAttendance.id
+                ).filter(
+                    MonthlyStudentAttendance.subject_id == subject_id,
+                    MonthlyStudentAttendance.lecturer_id == lecturer_id,
+                    MonthlyStudentAttendance.month == month,
+                    MonthlyStudentAttendance.year == year,
+                    MonthlyStudentAttendance.student_id.in_(list(monthly_presents))
+                ).all()) if monthly_presents else {}
+            now = datetime.utcnow()
+            updates = []
+            inserts = []
+            for student_id, present_count in monthly_presents.items():
+                if student_id in existing_ids:
+                    updates.append({
+                        'id': existing_ids[student_id],
+                        'present_count': present_count,
+                        'updated_at': now
+                    })
+                else:
+                    inserts.append({
+                        'student_id': student_id,
+                        'subject_id': subject_id,
+                        'lecturer_id': lecturer_id,
+                        'month': month,
+                        'year': year,
+                        'present_count': present_count,
+                        'deputation_count': 0,
+                        'created_at': now,
+                        'updated_at': now
+                    })
+            if updates:
+                db.session.bulk_update_mappings(MonthlyStudentAttendance, updates)
+            if inserts:
+                db.session.bulk_insert_mappings(MonthlyStudentAttendance, inserts)
             
             # Update the monthly summary
             summary.calculate_average_attendance()
             
             success, message = safe_update_and_commit()
             if success:
-                return True, f"Monthly attendance recorded for {len(attendance_data)} students ({total_records_created} records created)"
+                return True, f"Monthly attendance recorded for {len(attendance_data)} students ({len(monthly_presents)} records created)"
             else:
                 return False, message
                 
         except Exception as e:
+            db.session.rollback()
             return False, f"Error recording monthly attendance: {str(e)}"
     
     @staticmethod
@@ -725,10 +890,7 @@ class LecturerService:
 
             # If everything is zero (possible lecturer_id mismatch), try a safe fallback without lecturer filter
             if all((v == 0 for v in per_student_deputation.values())):
-                try:
-                    print(f"[Deputation][Report] All zeros with lecturer filter; applying fallback without lecturer filter for subject={subject_id}, year={year}")
-                except Exception:
-                    pass
+                logger.info("[Deputation][Report] All zeros with lecturer filter; applying fallback without lecturer filter for subject=%s, year=%s", subject_id, year)
                 for student in enrolled_students:
                     cumulative_deputation = (db.session.query(func.coalesce(func.sum(MonthlyStudentAttendance.deputation_count), 0))
                         .filter(
@@ -738,12 +900,11 @@ class LecturerService:
                         ).scalar() or 0)
                     per_student_deputation[student.id] = int(cumulative_deputation)
 
+            debug = logger.isEnabledFor(logging.DEBUG)
             for student in enrolled_students:
                 # Debug log per-student computed deputation (post-fallback if any)
-                try:
-                    print(f"[Deputation][Report] subj={subject_id} year={year} student={student.id} -> deputation={per_student_deputation.get(student.id, 0)}")
-                except Exception:
-                    pass
+                if debug:
+                    logger.debug("[Deputation][Report] subj=%s year=%s student=%s -> deputation=%s", subject_id, year, student.id, per_student_deputation.get(student.id, 0))
                 
                 deputation_data.append({
                     'student_id': student.id,
@@ -758,6 +919,65 @@ class LecturerService:
         except Exception as e:
             return []
     
+    @staticmethod
+    def get_prior_and_month_presents(subject_id, lecturer_id, year, month, student_ids=()):
+        """Get (classes before the month, {student_id: presents before the month}) in two queries"""
+        prior_total_classes = (db.session.query(func.coalesce(func.sum(MonthlyAttendanceSummary.total_classes), 0))
+            .filter(
+                MonthlyAttendanceSummary.subject_id == subject_id,
+                MonthlyAttendanceSummary.lecturer_id == lecturer_id,
+                ((MonthlyAttendanceSummary.year < year) |
+                 ((MonthlyAttendanceSummary.year == year) & (MonthlyAttendanceSummary.month < month)))
+            ).scalar() or 0)
+        return prior_total_classes, LecturerService.get_prev_present_map(
+            subject_id, lecturer_id, year, month, student_ids
+        )
+    
+    @staticmethod
+    def get_prior_classes_and_presents(subject_id, lecturer_id, year, month, student_id=None):
+        """Get (classes before the month, student's presents before the month) in one round-trip"""
+        def before_month(model):
+            return (model.year < year) | ((model.year == year) & (model.month < month))
+        
+        prior_classes = (db.select(func.coalesce(func.sum(MonthlyAttendanceSummary.total_classes), 0))
+            .where(
+                MonthlyAttendanceSummary.subject_id == subject_id,
+                MonthlyAttendanceSummary.lecturer_id == lecturer_id,
+                before_month(MonthlyAttendanceSummary)
+            ).scalar_subquery())
+        if student_id is None:
+            return int(db.session.execute(db.select(prior_classes)).scalar() or 0), 0
+        prior_presents = (db.select(func.coalesce(func.sum(MonthlyStudentAttendance.present_count), 0))
+            .where(
+                MonthlyStudentAttendance.student_id == student_id,
+                MonthlyStudentAttendance.subject_id == subject_id,
+                MonthlyStudentAttendance.lecturer_id == lecturer_id,
+                before_month(MonthlyStudentAttendance)
+            ).scalar_subquery())
+        total, presents = db.session.execute(db.select(prior_classes, prior_presents)).one()
+        return int(total or 0), int(presents or 0)
+    
+    @staticmethod
+    def get_prev_present_map(subject_id, lecturer_id, year, month, student_ids):
+        """Get {student_id: presents before the month} in one grouped query"""
+        student_ids = [int(sid) for sid in student_ids]
+        prev_present_map = dict.fromkeys(student_ids, 0)
+        if student_ids:
+            rows = (db.session.query(MonthlyStudentAttendance.student_id,
+                                     func.sum(MonthlyStudentAttendance.present_count))
+                .filter(
+                    MonthlyStudentAttendance.subject_id == subject_id,
+                    MonthlyStudentAttendance.lecturer_id == lecturer_id,
+                    MonthlyStudentAttendance.student_id.in_(student_ids),
+                    ((MonthlyStudentAttendance.year < year) |
+                     ((MonthlyStudentAttendance.year == year) & (MonthlyStudentAttendance.month < month)))
+                )
+                .group_by(MonthlyStudentAttendance.student_id)
+                .all())
+            for sid, present in rows:
+                prev_present_map[sid] = int(present or 0)
+        return prev_present_map
+    
     @staticmethod
     def get_cumulative_total_classes(subject_id, lecturer_id, year):
         """Get cumulative total classes for a subject for the entire year"""
@@ -787,6 +1007,22 @@ class LecturerService:
         except Exception as e:
             return 0
     
+    @staticmethod
+    def get_cumulative_present_counts_bulk(subject_id, lecturer_id, year):
+        """Get cumulative present counts for the entire year, keyed by student id"""
+        try:
+            rows = (db.session.query(
+                    MonthlyStudentAttendance.student_id,
+                    func.coalesce(func.sum(MonthlyStudentAttendance.present_count), 0)
+                ).filter(
+                    MonthlyStudentAttendance.subject_id == subject_id,
+                    MonthlyStudentAttendance.lecturer_id == lecturer_id,
+                    MonthlyStudentAttendance.year == year
+                ).group_by(MonthlyStudentAttendance.student_id).all())
+            return {student_id: int(present or 0) for student_id, present in rows}
+        except Exception as e:
+            return {}
+    
     @staticmethod
     def record_deputation_attendance(subject_id, lecturer_id, month, year, deputation_data):
         """Record deputation attendance for students"""
@@ -8,6 +8,7 @@ from models.academic import Course, Subject, AcademicYear
 from models.student import Student, StudentEnrollment
 from models.assignments import SubjectAssignment
 from database import db
+from sqlalchemy.orm import selectinload
 from utils.db_helpers import safe_add_and_commit, bulk_insert
 from utils.validators import *
 from utils.sorting_helpers import SortingHelpers
@@ -48,7 +49,10 @@ class ManagementService:
     def get_lecturers_paginated(page=1, search='', per_page=20):
         """Get paginated lecturers list with sorted ordering"""
         try:
-            query = Lecturer.query.filter_by(is_active=True)
+            # Assigned subjects are rendered per row; load them for all lecturers in two queries
+            query = Lecturer.query.options(
+                selectinload(Lecturer.subject_assignments).joinedload(SubjectAssignment.subject)
+            ).filter_by(is_active=True)
             
             if search:
                 query = query.filter(
@@ -216,9 +220,16 @@ class ManagementService:
                     SubjectAssignment.query.filter_by(lecturer_id=existing_inactive.id).delete(synchronize_session=False)
                     from models.attendance import AttendanceRecord, MonthlyAttendanceSummary
                     from models.marks import StudentMarks
+                    touched_subject_ids = [row[0] for row in db.session.query(AttendanceRecord.subject_id)
+                        .filter_by(lecturer_id=existing_inactive.id).distinct()]
+                    touched_student_ids = ManagementService._students_with_records(lecturer_id=existing_inactive.id)
                     AttendanceRecord.query.filter_by(lecturer_id=existing_inactive.id).delete(synchronize_session=False)
+                    StudentEnrollment.refresh_attendance_counts(touched_subject_ids)
                     MonthlyAttendanceSummary.query.filter_by(lecturer_id=existing_inactive.id).delete(synchronize_session=False)
                     StudentMarks.query.filter_by(lecturer_id=existing_inactive.id).delete(synchronize_session=False)
+                    Student.refresh_overall_counts(touched_student_ids)
+                    # Drop collections loaded before the bulk deletes so the ORM doesn't try to update them
+                    db.session.expire(existing_inactive)
                     db.session.delete(existing_inactive)
                     db.session.commit()
                 except Exception as e:
@@ -315,6 +326,7 @@ class ManagementService:
                 return False, f"Missing required columns: {', '.join(missing_cols)}", [], []
 
             lecturers_to_create = []
+            password_pairs = []
             errors = []
             credentials = []
             updates_applied = 0
@@ -399,7 +411,7 @@ class ManagementService:
                             name=name,
                             username=username
                         )
-                        lecturer.set_password(password)
+                        password_pairs.append((lecturer, password))
                         lecturer._temp_subject_ids = subject_ids
                         lecturers_to_create.append(lecturer)
                         credentials.append({
@@ -411,6 +423,9 @@ class ManagementService:
                 except Exception as e:
                     errors.append(f"Row {row_num}: Error processing data - {str(e)}")
 
+            # Hash all new passwords together instead of one row at a time
+            Lecturer.bulk_set_passwords(password_pairs)
+
             if lecturers_to_create or updates_applied > 0:
                 try:
                     if updates_applied > 0:
@@ -974,6 +989,16 @@ class ManagementService:
             return False, f"Error unassigning subject: {str(e)}"
 
 
+    @staticmethod
+    def _students_with_records(**filters):
+        """Ids of students with attendance or marks matching filters (e.g. lecturer_id=...)"""
+        from models.attendance import AttendanceRecord
+        from models.marks import StudentMarks
+
+        attendance_ids = db.session.query(AttendanceRecord.student_id).filter_by(**filters)
+        marks_ids = db.session.query(StudentMarks.student_id).filter_by(**filters)
+        return [row[0] for row in attendance_ids.union(marks_ids)]
+
     @staticmethod
     def delete_lecturer_permanently(lecturer_id):
         """Hard-delete a lecturer and all dependent records referencing the lecturer.
@@ -995,10 +1020,17 @@ class ManagementService:
             from models.marks import StudentMarks
 
             SubjectAssignment.query.filter_by(lecturer_id=lecturer.id).delete(synchronize_session=False)
+            touched_subject_ids = [row[0] for row in db.session.query(AttendanceRecord.subject_id)
+                .filter_by(lecturer_id=lecturer.id).distinct()]
+            touched_student_ids = ManagementService._students_with_records(lecturer_id=lecturer.id)
             AttendanceRecord.query.filter_by(lecturer_id=lecturer.id).delete(synchronize_session=False)
+            StudentEnrollment.refresh_attendance_counts(touched_subject_ids)
             MonthlyAttendanceSummary.query.filter_by(lecturer_id=lecturer.id).delete(synchronize_session=False)
             StudentMarks.query.filter_by(lecturer_id=lecturer.id).delete(synchronize_session=False)
+            Student.refresh_overall_counts(touched_student_ids)
 
+            # Drop collections loaded before the bulk deletes so the ORM doesn't try to update them
+            db.session.expire(lecturer)
             db.session.delete(lecturer)
             db.session.commit()
             return True, "Lecturer permanently deleted"
@@ -1024,6 +1056,8 @@ class ManagementService:
             MonthlyStudentAttendance.query.filter_by(student_id=student.id).delete(synchronize_session=False)
             StudentMarks.query.filter_by(student_id=student.id).delete(synchronize_session=False)
 
+            # Drop collections loaded before the bulk deletes so the ORM doesn't try to update them
+            db.session.expire(student)
             db.session.delete(student)
             db.session.commit()
             return True, "Student permanently deleted"
@@ -1044,12 +1078,17 @@ class ManagementService:
             from models.attendance import AttendanceRecord, MonthlyAttendanceSummary
             from models.marks import StudentMarks
 
+            touched_student_ids = ManagementService._students_with_records(subject_id=subject.id)
             SubjectAssignment.query.filter_by(subject_id=subject.id).delete(synchronize_session=False)
             StudentEnrollment.query.filter_by(subject_id=subject.id).delete(synchronize_session=False)
             AttendanceRecord.query.filter_by(subject_id=subject.id).delete(synchronize_session=False)
             MonthlyAttendanceSummary.query.filter_by(subject_id=subject.id).delete(synchronize_session=False)
             StudentMarks.query.filter_by(subject_id=subject.id).delete(synchronize_session=False)
+            # Bulk deletes bypass the write events that keep student counters in sync
+            Student.refresh_overall_counts(touched_student_ids)
 
+            # Drop collections loaded before the bulk deletes so the ORM doesn't try to update them
+            db.session.expire(subject)
             db.session.delete(subject)
             db.session.commit()
             return True, "Subject permanently deleted"
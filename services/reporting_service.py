@@ -11,6 +11,7 @@ from models.user import Lecturer
 from database import db
 from datetime import datetime, date
 from sqlalchemy import func, and_, or_
+from sqlalchemy.orm import selectinload
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
@@ -19,9 +20,65 @@ from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from xml.sax.saxutils import escape as xml_escape
+import math
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from services.excel_export_service import ExcelExportService
+from openpyxl.utils import get_column_letter
+import zipfile
+
+# Subject reports with at least this many rows are written as plain OOXML
+FAST_XLSX_MIN_ROWS = 500
+
+_XLSX_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_XLSX_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_XLSX_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_XLSX_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{_XLSX_REL_NS}/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+# Cell styles match _write_subject_report_excel: 0 default, 1 table header
+# (bold white on black, centered), 2 sheet title (16pt bold), 3 grey spacer row
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<styleSheet xmlns="{_XLSX_MAIN_NS}">'
+    '<fonts count="3"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><color rgb="00FFFFFF"/></font>'
+    '<font><b/><sz val="16"/></font></fonts>'
+    '<fills count="4"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00F5F5F5"/><bgColor rgb="00F5F5F5"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00000000"/><bgColor rgb="00000000"/></patternFill></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="3" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="center"/></xf>'
+    '<xf numFmtId="0" fontId="2" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="0" fontId="0" fillId="2" borderId="0" xfId="0" applyFill="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+_XLSX_HEADER_STYLE = ' s="1"'
+_XLSX_TITLE_STYLE = ' s="2"'
+_XLSX_SPACER_STYLE = ' s="3"'
 
 class ReportingService:
     """Service for generating reports"""
@@ -212,7 +269,7 @@ class ReportingService:
             for subject in subjects:
                 # Get marks for this subject
                 from models.marks import StudentMarks
-                marks = StudentMarks.query.filter_by(
+                marks = StudentMarks.base_query().filter_by(
                     student_id=student_id,
                     subject_id=subject.id
                 ).all()
@@ -253,7 +310,7 @@ class ReportingService:
                     ).all()
                     
                     total_classes = len(attendance_records)
-                    present_classes = len([r for r in attendance_records if r.status == 'present'])
+                    present_classes = sum(1 for r in attendance_records if r.status == 'present')
                     attendance_percentage = round((present_classes / total_classes) * 100, 2) if total_classes > 0 else 0
                 
                 # Calculate overall marks percentage for this subject
@@ -266,8 +323,7 @@ class ReportingService:
                 
                 # Format marks data with proper assessment type names
                 marks_data = []
-                for mark in marks:
-                    mark_dict = mark.to_dict()
+                for mark, mark_dict in zip(marks, StudentMarks.to_dicts(marks)):
                     # Ensure assessment_type is properly formatted
                     assessment_type = mark.assessment_type
                     if assessment_type == 'internal1':
@@ -372,16 +428,15 @@ class ReportingService:
             # Get marks - if assessment_type is specified, filter by it
             if assessment_type:
                 # Get marks for the specific assessment type
-                marks = StudentMarks.query.filter_by(subject_id=subject_id, assessment_type=assessment_type).all()
+                marks = StudentMarks.base_query().filter_by(subject_id=subject_id, assessment_type=assessment_type).all()
             else:
                 # Get all marks for this subject
-                marks = StudentMarks.query.filter_by(subject_id=subject_id).all()
+                marks = StudentMarks.base_query().filter_by(subject_id=subject_id).all()
             
             # Add marks to student_marks
-            for mark in marks:
+            for mark, mark_dict in zip(marks, StudentMarks.to_dicts(marks)):
                 student_id = mark.student_id
                 if student_id in student_marks:
-                    mark_dict = mark.to_dict()
                     # Format assessment type for display
                     assessment_type_display = mark.assessment_type
                     if assessment_type_display == 'internal1':
@@ -405,8 +460,8 @@ class ReportingService:
                     all_percentages.append(percentage)
             
             # Calculate passing/failing assessments (individual assessments, not students)
-            passing_assessments = len([p for p in all_percentages if p >= 35])
-            failing_assessments = len([p for p in all_percentages if p < 35])
+            passing_assessments = sum(1 for p in all_percentages if p >= 35)
+            failing_assessments = sum(1 for p in all_percentages if p < 35)
             
             # Calculate passing/failing students (unique students based on their average)
             passing_students_count = 0
@@ -631,8 +686,7 @@ class ReportingService:
                     # Daily records for a specific month/year
                     all_attendance_records = AttendanceRecord.query.filter(
                         AttendanceRecord.subject_id == subject_id,
-                        db.extract('month', AttendanceRecord.date) == month,
-                        db.extract('year', AttendanceRecord.date) == year
+                        AttendanceRecord.in_month(month, year)
                     ).all()
 
                     # Get unique dates to count total classes
@@ -654,18 +708,18 @@ class ReportingService:
                             }
                             student_attendance.append(student_data)
                     else:
+                        # Tally the month's records per student in one pass: {student_id: [present, absent]}
+                        status_counts = {}
+                        for record in all_attendance_records:
+                            counts = status_counts.setdefault(record.student_id, [0, 0])
+                            if record.status == 'present':
+                                counts[0] += 1
+                            elif record.status == 'absent':
+                                counts[1] += 1
+
                         # Calculate attendance for each student for the specific month
                         for student in students:
-                            # Get attendance records for this student in this subject for this month
-                            student_records = AttendanceRecord.query.filter(
-                                AttendanceRecord.student_id == student.id,
-                                AttendanceRecord.subject_id == subject_id,
-                                db.extract('month', AttendanceRecord.date) == month,
-                                db.extract('year', AttendanceRecord.date) == year
-                            ).all()
-
-                            present_classes = len([r for r in student_records if r.status == 'present'])
-                            absent_classes = len([r for r in student_records if r.status == 'absent'])
+                            present_classes, absent_classes = status_counts.get(student.id, (0, 0))
 
                             # Calculate percentage
                             attendance_percentage = round((present_classes / total_classes_conducted) * 100, 2) if total_classes_conducted > 0 else 0
@@ -705,8 +759,8 @@ class ReportingService:
                 'total_students': len(students),
                 'total_classes_conducted': total_classes_conducted,
                 'class_average_attendance': round(sum(valid_percentages) / len(valid_percentages), 2) if valid_percentages else 0,
-                'students_with_good_attendance': len([s for s in student_attendance if s['attendance_percentage'] >= 75]),
-                'students_with_poor_attendance': len([s for s in student_attendance if s['attendance_percentage'] < 50])
+                'students_with_good_attendance': sum(1 for s in student_attendance if s['attendance_percentage'] >= 75),
+                'students_with_poor_attendance': sum(1 for s in student_attendance if s['attendance_percentage'] < 50)
             }
             
             # Get month name for display
@@ -825,7 +879,7 @@ class ReportingService:
                     # Fallback to daily attendance records
                     attendance_records = AttendanceRecord.query.filter_by(subject_id=subject.id).all()
                     total_records = len(attendance_records)
-                    present_records = len([r for r in attendance_records if r.status == 'present'])
+                    present_records = sum(1 for r in attendance_records if r.status == 'present')
                 
                 subject_data = {
                     'subject_id': subject.id,
@@ -888,13 +942,16 @@ class ReportingService:
     def get_courses_for_reporting():
         """Get all courses available for reporting"""
         try:
-            courses = Course.query.filter_by(is_active=True).all()
+            courses = (Course.query
+                .options(selectinload(Course.subjects))
+                .filter_by(is_active=True)
+                .all())
             return [{
                 'id': course.id,
                 'name': course.name,
                 'code': course.code,
                 'total_students': course.get_active_students_count(),
-                'total_subjects': course.subjects.filter_by(is_active=True).count()
+                'total_subjects': sum(1 for subject in course.subjects if subject.is_active)
             } for course in courses]
         except Exception as e:
             print(f"Error getting courses for reporting: {e}")
@@ -1313,34 +1370,85 @@ class ReportingService:
 
     # ======================== EXCEL EXPORT FUNCTIONS ========================
     @staticmethod
-    def generate_subject_marks_report_excel(subject, marks_report):
-        """Generate an Excel file for a subject's marks report (lecturer view)."""
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Marks Report"
+    def _write_xlsx_fast(stream, title, info, headers, rows, merge_width):
+        """Write a lecturer report sheet as raw OOXML, bypassing openpyxl's per-cell objects.
+
+        Produces the same layout and styles as the openpyxl path in _write_subject_report_excel.
+        Writes into ``stream`` and returns it when given, otherwise returns bytes.
+        """
+        target = stream if stream is not None else BytesIO()
+        width = max([len(headers), merge_width, 2] + [len(values) for values in rows])
+        letters = [get_column_letter(i) for i in range(1, width + 1)]
+        widths = [0] * width
+        parts = []
+        
+        def add_row(row_num, values, style=''):
+            cells = []
+            for idx, value in enumerate(values):
+                if value is None or value == '':
+                    continue
+                ref = f'{letters[idx]}{row_num}'
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    # NaN and infinity have no valid <v> form; leave those cells empty
+                    if not math.isfinite(value):
+                        continue
+                    cells.append(f'<c r="{ref}"{style}><v>{value}</v></c>')
+                else:
+                    value = str(value)
+                    cells.append(f'<c r="{ref}"{style} t="inlineStr"><is><t>{xml_escape(value)}</t></is></c>')
+                if value:
+                    widths[idx] = max(widths[idx], len(str(value)))
+            parts.append(f'<row r="{row_num}">{"".join(cells)}</row>')
         
+        add_row(1, [title], style=_XLSX_TITLE_STYLE)
+        for row_num, pair in enumerate(info, 3):
+            add_row(row_num, pair)
+        spacer_row = 3 + len(info)
+        parts.append(f'<row r="{spacer_row}"><c r="A{spacer_row}"{_XLSX_SPACER_STYLE}/></row>')
+        header_row = spacer_row + 1
+        add_row(header_row, headers, style=_XLSX_HEADER_STYLE)
+        for row_num, values in enumerate(rows, header_row + 1):
+            add_row(row_num, values)
+        if not rows:
+            add_row(header_row + 1, ['No data'])
+        
+        last_letter = letters[merge_width - 1]
+        merges = f'<mergeCells count="2"><mergeCell ref="A1:{last_letter}1"/>' \
+                 f'<mergeCell ref="A{spacer_row}:{last_letter}{spacer_row}"/></mergeCells>'
+        
+        cols = ''.join(
+            f'<col min="{i}" max="{i}" width="{min(w + 2, 50)}" customWidth="1"/>'
+            for i, w in enumerate(widths, 1)
+        )
+        sheet_xml = ''.join([
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+            f'<worksheet xmlns="{_XLSX_MAIN_NS}">',
+            f'<cols>{cols}</cols>' if cols else '',
+            '<sheetData>', ''.join(parts), '</sheetData>', merges, '</worksheet>'
+        ])
+        workbook_xml = (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<workbook xmlns="{_XLSX_MAIN_NS}" xmlns:r="{_XLSX_REL_NS}">'
+            f'<sheets><sheet name="{xml_escape(title, {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        )
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+            zf.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+            zf.writestr('xl/workbook.xml', workbook_xml)
+            zf.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+            zf.writestr('xl/styles.xml', _XLSX_STYLES)
+            zf.writestr('xl/worksheets/sheet1.xml', sheet_xml)
+        return target if stream is not None else target.getvalue()
+
+    @staticmethod
+    def _subject_report_info(subject):
+        """Label/value rows describing a subject on the lecturer report sheets"""
         # Get faculty name
         from models.assignments import SubjectAssignment
         assignment = SubjectAssignment.query.filter_by(subject_id=subject.id, is_active=True).first()
         faculty_name = assignment.lecturer.name if assignment and assignment.lecturer else 'N/A'
         
-        # Get students and marks data using the same logic as HTML view
-        from models.student import Student
-        from models.marks import StudentMarks
-        
-        # Get enrolled students
-        students = subject.get_enrolled_students()
-        
-        # Get existing marks for students (same as HTML view)
-        existing_marks = {}
-        for student in students:
-            marks = StudentMarks.query.filter_by(
-                student_id=student.id,
-                subject_id=subject.id
-            ).all()
-            # map assessment_type -> mark row (same as HTML view)
-            existing_marks[student.id] = {mark.assessment_type: mark for mark in marks}
-        
         # Parse course name to extract course code and section
         course_name = subject.course.name if subject.course else 'N/A'
         course_parts = course_name.split() if course_name != 'N/A' else []
@@ -1348,46 +1456,109 @@ class ReportingService:
         # Determine if section exists (if there are 3+ parts, last part is section)
         has_section = len(course_parts) >= 3
         course_code = course_parts[-2] if has_section else (course_parts[-1] if course_parts else 'N/A')
-        section = course_parts[-1] if has_section else None
+        
+        info = [('Subject', subject.name), ('Code', subject.code), ('Course', course_code)]
+        if has_section:
+            info.append(('Section', course_parts[-1]))
+        info.append(('Faculty', faculty_name))
+        # Year/Semester directly from subject
+        info.append(('Year/Semester', f"{getattr(subject, 'year', 'N/A')}/{getattr(subject, 'semester', 'N/A')}"))
+        return info
+
+    @staticmethod
+    def _write_subject_report_excel(title, info, headers, data_rows, merge_width, stream=None):
+        """Write a lecturer subject report sheet; large reports skip openpyxl styling"""
+        if len(data_rows) >= FAST_XLSX_MIN_ROWS:
+            return ReportingService._write_xlsx_fast(stream, title, info, headers, data_rows, merge_width)
+        
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = title
         
         # Title
-        ws['A1'] = 'Marks Report'
+        ws['A1'] = title
         ws['A1'].font = Font(size=16, bold=True)
-        ws.merge_cells('A1:D1')
+        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=merge_width)
         
         # Subject info
-        ws['A3'] = 'Subject'
-        ws['B3'] = subject.name
-        ws['A4'] = 'Code'
-        ws['B4'] = subject.code
-        ws['A5'] = 'Course'
-        ws['B5'] = course_code
-        if has_section:
-            ws['A6'] = 'Section'
-            ws['B6'] = section
-            ws['A7'] = 'Faculty'
-            ws['B7'] = faculty_name
-            # Year/Semester directly from subject
-            ys_display = f"{getattr(subject, 'year', 'N/A')}/{getattr(subject, 'semester', 'N/A')}"
-            ws['A8'] = 'Year/Semester'
-            ws['B8'] = ys_display
-        else:
-            ws['A6'] = 'Faculty'
-            ws['B6'] = faculty_name
-            ys_display = f"{getattr(subject, 'year', 'N/A')}/{getattr(subject, 'semester', 'N/A')}"
-            ws['A7'] = 'Year/Semester'
-            ws['B7'] = ys_display
+        for row, (label, value) in enumerate(info, 3):
+            ws.cell(row=row, column=1, value=label)
+            ws.cell(row=row, column=2, value=value)
         # Determine where to place spacer row and headers
-        last_info_row = 8 if has_section else 7
-        spacer_row = last_info_row + 1
+        spacer_row = 3 + len(info)
         header_row = spacer_row + 1
         data_start_row = header_row + 1
 
         # Spacer row above the table
-        ws.merge_cells(start_row=spacer_row, start_column=1, end_row=spacer_row, end_column=4)
+        ws.merge_cells(start_row=spacer_row, start_column=1, end_row=spacer_row, end_column=merge_width)
         spacer_cell = ws.cell(row=spacer_row, column=1, value='')
         spacer_cell.fill = PatternFill(start_color='F5F5F5', end_color='F5F5F5', fill_type='solid')
 
+        # Table headers
+        for col, header in enumerate(headers, 1):
+            cell = ws.cell(row=header_row, column=col, value=header)
+            cell.font = Font(bold=True, color='FFFFFF')
+            cell.fill = PatternFill(start_color='000000', end_color='000000', fill_type='solid')
+            cell.alignment = Alignment(horizontal='center')
+        
+        # Data rows
+        for row, values in enumerate(data_rows, data_start_row):
+            for col, value in enumerate(values, 1):
+                ws.cell(row=row, column=col, value=value)
+        
+        if not data_rows:
+            ws.cell(row=data_start_row, column=1, value='No data')
+        
+        # Auto-adjust column widths
+        for column in ws.columns:
+            max_length = 0
+            column_letter = None
+            for cell in column:
+                try:
+                    if hasattr(cell, 'column_letter'):
+                        column_letter = cell.column_letter
+                    if cell.value and len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except:
+                    pass
+            if column_letter:
+                adjusted_width = min(max_length + 2, 50)
+                ws.column_dimensions[column_letter].width = adjusted_width
+        
+        if stream is not None:
+            wb.save(stream)
+            return stream
+        
+        # Save to BytesIO
+        buffer = BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+        return buffer.getvalue()
+
+    @staticmethod
+    def generate_subject_marks_report_excel(subject, marks_report, stream=None):
+        """Generate an Excel file for a subject's marks report (lecturer view).
+
+        Writes into ``stream`` and returns it when given, otherwise returns bytes.
+        """
+        # Get students and marks data using the same logic as HTML view
+        from models.student import Student
+        from models.marks import StudentMarks
+        
+        # Get enrolled students
+        students = subject.get_enrolled_students()
+        
+        # Get existing marks for students in one IN query (same as HTML view)
+        existing_marks = {}
+        student_ids = [student.id for student in students]
+        if student_ids:
+            for mark in StudentMarks.query.filter(
+                StudentMarks.subject_id == subject.id,
+                StudentMarks.student_id.in_(student_ids)
+            ).all():
+                # map assessment_type -> mark row (same as HTML view)
+                existing_marks.setdefault(mark.student_id, {})[mark.assessment_type] = mark
+        
         # Decide which assessment components to include based on actual recorded values
         comp_keys = ['internal1', 'internal2', 'assignment', 'project']
         include = {k: False for k in comp_keys}
@@ -1401,16 +1572,9 @@ class ReportingService:
         ordered_components = [k for k in comp_keys if include[k]]
         comp_to_header = {'internal1': 'Internal 1', 'internal2': 'Internal 2', 'assignment': 'Assignment', 'project': 'Project'}
 
-        # Table headers
         headers = ['Student', 'Roll Number'] + [comp_to_header[k] for k in ordered_components] + ['Overall %', 'Status']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=header_row, column=col, value=header)
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = PatternFill(start_color='000000', end_color='000000', fill_type='solid')
-            cell.alignment = Alignment(horizontal='center')
         
-        # Data rows
-        row = data_start_row
+        data_rows = []
         for student in students:
             student_marks = existing_marks.get(student.id, {})
             
@@ -1435,147 +1599,39 @@ class ReportingService:
                 overall = 0.0
             
             status = 'Good' if overall >= 50 else 'Deficient'
-
-            col = 1
-            ws.cell(row=row, column=col, value=student.name); col += 1
-            ws.cell(row=row, column=col, value=student.roll_number); col += 1
-            for k in ordered_components:
-                ws.cell(row=row, column=col, value=_pair(k)); col += 1
-            ws.cell(row=row, column=col, value=f"{ReportingService._format_number(overall)}%"); col += 1
-            ws.cell(row=row, column=col, value=status)
-            row += 1
-        
-        if not students:
-            ws.cell(row=data_start_row, column=1, value='No data')
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = None
-            for cell in column:
-                try:
-                    if hasattr(cell, 'column_letter'):
-                        column_letter = cell.column_letter
-                    if cell.value and len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            if column_letter:
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+            data_rows.append(
+                [student.name, student.roll_number]
+                + [_pair(k) for k in ordered_components]
+                + [f"{ReportingService._format_number(overall)}%", status]
+            )
         
-        # Save to BytesIO
-        buffer = BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        return buffer.getvalue()
+        info = ReportingService._subject_report_info(subject)
+        return ReportingService._write_subject_report_excel('Marks Report', info, headers, data_rows, 4, stream)
 
     @staticmethod
-    def generate_subject_attendance_report_excel(subject, attendance_report):
-        """Generate an Excel file for a subject's attendance report (lecturer view)."""
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Attendance Report"
-        
-        # Get faculty name
-        from models.assignments import SubjectAssignment
-        assignment = SubjectAssignment.query.filter_by(subject_id=subject.id, is_active=True).first()
-        faculty_name = assignment.lecturer.name if assignment and assignment.lecturer else 'N/A'
-        
-        # Parse course name to extract course code and section
-        course_name = subject.course.name if subject.course else 'N/A'
-        course_parts = course_name.split() if course_name != 'N/A' else []
-        
-        # Determine if section exists (if there are 3+ parts, last part is section)
-        has_section = len(course_parts) >= 3
-        course_code = course_parts[-2] if has_section else (course_parts[-1] if course_parts else 'N/A')
-        section = course_parts[-1] if has_section else None
-        
-        # Title
-        ws['A1'] = 'Attendance Report'
-        ws['A1'].font = Font(size=16, bold=True)
-        ws.merge_cells('A1:F1')
-        
-        # Subject info
-        ws['A3'] = 'Subject'
-        ws['B3'] = subject.name
-        ws['A4'] = 'Code'
-        ws['B4'] = subject.code
-        ws['A5'] = 'Course'
-        ws['B5'] = course_code
-        if has_section:
-            ws['A6'] = 'Section'
-            ws['B6'] = section
-            ws['A7'] = 'Faculty'
-            ws['B7'] = faculty_name
-            # Year/Semester directly from subject
-            ys_display = f"{getattr(subject, 'year', 'N/A')}/{getattr(subject, 'semester', 'N/A')}"
-            ws['A8'] = 'Year/Semester'
-            ws['B8'] = ys_display
-        else:
-            ws['A6'] = 'Faculty'
-            ws['B6'] = faculty_name
-            ys_display = f"{getattr(subject, 'year', 'N/A')}/{getattr(subject, 'semester', 'N/A')}"
-            ws['A7'] = 'Year/Semester'
-            ws['B7'] = ys_display
-        # Determine where to place spacer row and headers
-        last_info_row = 8 if has_section else 7
-        spacer_row = last_info_row + 1
-        header_row = spacer_row + 1
-        data_start_row = header_row + 1
+    def generate_subject_attendance_report_excel(subject, attendance_report, stream=None):
+        """Generate an Excel file for a subject's attendance report (lecturer view).
 
-        # Spacer row above the table
-        ws.merge_cells(start_row=spacer_row, start_column=1, end_row=spacer_row, end_column=6)
-        spacer_cell = ws.cell(row=spacer_row, column=1, value='')
-        spacer_cell.fill = PatternFill(start_color='F5F5F5', end_color='F5F5F5', fill_type='solid')
-
-        # Table headers
+        Writes into ``stream`` and returns it when given, otherwise returns bytes.
+        """
         headers = ['Student', 'Roll Number', 'Present', 'Total', '%', 'Status']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=header_row, column=col, value=header)
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = PatternFill(start_color='000000', end_color='000000', fill_type='solid')
-            cell.alignment = Alignment(horizontal='center')
         
-        # Data rows
-        row = data_start_row
+        data_rows = []
         for record in attendance_report or []:
             student = record['student']
             percent = record.get('attendance_percentage') or 0
             status = 'Good' if percent >= 75 else 'Shortage'
-            
-            ws.cell(row=row, column=1, value=student.name)
-            ws.cell(row=row, column=2, value=student.roll_number)
-            ws.cell(row=row, column=3, value=record.get('present_classes') or 0)
-            ws.cell(row=row, column=4, value=record.get('total_classes') or 0)
-            ws.cell(row=row, column=5, value=f"{percent}%")
-            ws.cell(row=row, column=6, value=status)
-            row += 1
-        
-        if not attendance_report:
-            ws.cell(row=data_start_row, column=1, value='No data')
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = None
-            for cell in column:
-                try:
-                    if hasattr(cell, 'column_letter'):
-                        column_letter = cell.column_letter
-                    if cell.value and len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            if column_letter:
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+            data_rows.append([
+                student.name,
+                student.roll_number,
+                record.get('present_classes') or 0,
+                record.get('total_classes') or 0,
+                f"{percent}%",
+                status
+            ])
         
-        # Save to BytesIO
-        buffer = BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        return buffer.getvalue()
+        info = ReportingService._subject_report_info(subject)
+        return ReportingService._write_subject_report_excel('Attendance Report', info, headers, data_rows, 6, stream)
 
     # ======================== ADDITIONAL PDF GENERATORS ========================
     @staticmethod
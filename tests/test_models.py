@@ -187,6 +187,98 @@ class TestModels(unittest.TestCase):
         self.assertEqual(StudentMarks.calculate_grade(95), 'A+')
         self.assertEqual(StudentMarks.calculate_grade(85), 'A')
         self.assertEqual(StudentMarks.calculate_grade(30), 'F')
+    
+    def _create_enrolled_student(self):
+        """Create a course, subject, lecturer and one enrolled student"""
+        course = Course(name='Computer Science', code='CS')
+        subject = Subject(name='Python Programming', code='PY101', course=course, year=1, semester=1)
+        lecturer = Lecturer(lecturer_id='LEC001', name='John Doe', username='john')
+        lecturer.set_password('password')
+        student = Student(roll_number='CS001', name='Alice', course=course, academic_year=1)
+        db.session.add_all([course, subject, lecturer, student])
+        db.session.flush()
+        db.session.add(StudentEnrollment(student_id=student.id, subject_id=subject.id, academic_year=1))
+        db.session.commit()
+        return student, subject, lecturer
+    
+    def _counters(self, student, subject):
+        """Read the stored attendance and marks counters"""
+        db.session.expire_all()
+        enrollment = StudentEnrollment.query.filter_by(student_id=student.id, subject_id=subject.id).one()
+        return (enrollment.total_count, enrollment.present_count,
+                student.overall_attendance_total, student.overall_attendance_present,
+                student.overall_marks_obtained, student.overall_marks_max)
+    
+    def assertCountersMatchRecount(self, student, subject):
+        stored = self._counters(student, subject)
+        StudentEnrollment.refresh_attendance_counts()
+        Student.refresh_overall_counts()
+        self.assertEqual(stored, self._counters(student, subject))
+    
+    def test_attendance_counters_match_recount(self):
+        """Test the enrollment and student attendance counters track inserts, flips and deletes"""
+        student, subject, lecturer = self._create_enrolled_student()
+        
+        records = [
+            AttendanceRecord(student_id=student.id, subject_id=subject.id, lecturer_id=lecturer.id,
+                             date=date(2024, 1, day), status='present')
+            for day in (1, 2, 3)
+        ]
+        db.session.add_all(records)
+        db.session.commit()
+        self.assertEqual(self._counters(student, subject)[:4], (3, 3, 3, 3))
+        self.assertCountersMatchRecount(student, subject)
+        
+        records[0].mark_absent()
+        db.session.commit()
+        self.assertEqual(self._counters(student, subject)[:4], (3, 2, 3, 2))
+        self.assertCountersMatchRecount(student, subject)
+        
+        db.session.delete(records[1])
+        db.session.commit()
+        self.assertEqual(self._counters(student, subject)[:4], (2, 1, 2, 1))
+        self.assertCountersMatchRecount(student, subject)
+    
+    def test_bulk_create_counters_match_recount(self):
+        """Test AttendanceRecord.bulk_create applies counter deltas for the inserted rows"""
+        student, subject, lecturer = self._create_enrolled_student()
+        db.session.add(AttendanceRecord(student_id=student.id, subject_id=subject.id,
+                                        lecturer_id=lecturer.id, date=date(2024, 1, 1), status='absent'))
+        db.session.commit()
+        
+        rows = [
+            {'student_id': student.id, 'subject_id': subject.id, 'lecturer_id': lecturer.id,
+             'date': date(2024, 1, day), 'status': status}
+            for day, status in ((2, 'present'), (3, 'present'), (4, 'absent'))
+        ]
+        self.assertEqual(AttendanceRecord.bulk_create(rows), 3)
+        db.session.commit()
+        self.assertEqual(self._counters(student, subject)[:4], (4, 2, 4, 2))
+        self.assertCountersMatchRecount(student, subject)
+    
+    def test_marks_counters_match_recount(self):
+        """Test the student marks counters track inserts, edits and deletes"""
+        student, subject, lecturer = self._create_enrolled_student()
+        
+        marks = [
+            StudentMarks(student_id=student.id, subject_id=subject.id, lecturer_id=lecturer.id,
+                         assessment_type=assessment, marks_obtained=obtained, max_marks=50)
+            for assessment, obtained in (('internal1', 40), ('internal2', 30))
+        ]
+        db.session.add_all(marks)
+        db.session.commit()
+        self.assertEqual(self._counters(student, subject)[4:], (70, 100))
+        self.assertCountersMatchRecount(student, subject)
+        
+        marks[0].marks_obtained = 45
+        db.session.commit()
+        self.assertEqual(self._counters(student, subject)[4:], (75, 100))
+        self.assertCountersMatchRecount(student, subject)
+        
+        db.session.delete(marks[1])
+        db.session.commit()
+        self.assertEqual(self._counters(student, subject)[4:], (45, 50))
+        self.assertCountersMatchRecount(student, subject)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
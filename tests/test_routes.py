@@ -3,7 +3,9 @@ Integration tests for routes and workflows
 """
 
 import unittest
+from unittest.mock import patch
 from app import create_app
+from config import Config
 from database import db
 from models.user import Management, Lecturer
 from models.academic import Course
@@ -158,6 +160,61 @@ class TestRoutes(unittest.TestCase):
         # Try to access protected page
         response = self.client.get('/management/dashboard')
         self.assertEqual(response.status_code, 302)  # Should redirect to login
+    
+    def _management_login(self, password, client=None, **kwargs):
+        client = client or self.client
+        return client.post('/management/login', data={
+            'username': 'admin',
+            'password': password
+        }, **kwargs)
+    
+    def test_login_lockout_per_client(self):
+        """Test repeated failures lock out one client without affecting others"""
+        blocked = {'environ_base': {'REMOTE_ADDR': '10.0.0.1'}}
+        for _ in range(5):
+            self._management_login('wrongpassword', **blocked)
+        
+        response = self._management_login('admin123', **blocked)
+        self.assertIn(b'Too many failed login attempts', response.data)
+        
+        # Another address, or another username from the same address, can still log in
+        response = self._management_login('admin123', environ_base={'REMOTE_ADDR': '10.0.0.2'})
+        self.assertEqual(response.status_code, 302)
+        response = self.client.post('/lecturer/login', data={
+            'username': 'john',
+            'password': 'password123'
+        }, **blocked)
+        self.assertEqual(response.status_code, 302)
+    
+    def test_login_success_resets_failures(self):
+        """Test a successful login clears the client's failure count"""
+        client = {'environ_base': {'REMOTE_ADDR': '10.0.0.3'}}
+        for _ in range(4):
+            self._management_login('wrongpassword', **client)
+        self.assertEqual(self._management_login('admin123', **client).status_code, 302)
+        
+        self.client.post('/logout')
+        for _ in range(4):
+            self._management_login('wrongpassword', **client)
+        self.assertEqual(self._management_login('admin123', **client).status_code, 302)
+    
+    def test_login_lockout_behind_proxy(self):
+        """Test the lockout keys on the forwarded client address behind a trusted proxy"""
+        with patch.object(Config, 'TRUSTED_PROXY_COUNT', 1):
+            proxied_app = create_app()
+        proxied_app.config['WTF_CSRF_ENABLED'] = False
+        proxied = proxied_app.test_client()
+        proxy = {'REMOTE_ADDR': '127.0.0.1'}
+        for _ in range(5):
+            self._management_login('wrongpassword', client=proxied, environ_base=proxy,
+                                   headers={'X-Forwarded-For': '192.0.2.1'})
+        
+        response = self._management_login('admin123', client=proxied, environ_base=proxy,
+                                          headers={'X-Forwarded-For': '192.0.2.1'})
+        self.assertIn(b'Too many failed login attempts', response.data)
+        response = self._management_login('admin123', client=proxied, environ_base=proxy,
+                                          headers={'X-Forwarded-For': '192.0.2.2'})
+        self.assertEqual(response.status_code, 302)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -4,14 +4,22 @@ Unit tests for service classes
 
 import unittest
 from datetime import date
+from io import BytesIO
+from unittest.mock import patch
+import openpyxl
+from openpyxl.cell.cell import MergedCell
 from app import create_app
 from database import db
 from services.auth_service import AuthService
 from services.management_service import ManagementService
 from services.lecturer_service import LecturerService
+from services import reporting_service
+from services.reporting_service import ReportingService
 from models.user import Management, Lecturer
 from models.academic import Course, Subject
-from models.student import Student
+from models.student import Student, StudentEnrollment
+from models.assignments import SubjectAssignment
+from models.attendance import MonthlyAttendanceSummary, MonthlyStudentAttendance
 
 class TestServices(unittest.TestCase):
     
@@ -145,6 +153,102 @@ class TestServices(unittest.TestCase):
         self.assertIsInstance(stats, dict)
         self.assertIn('total_subjects', stats)
         self.assertIn('total_students', stats)
+    
+    def _create_monthly_attendance_fixture(self):
+        """Create a lecturer assigned to a subject with three enrolled students"""
+        course = Course(name='Computer Science', code='CS')
+        subject = Subject(name='Python Programming', code='PY101', course=course, year=1, semester=1)
+        lecturer = Lecturer(lecturer_id='LEC001', name='John Doe', username='john')
+        lecturer.set_password('password')
+        students = [Student(roll_number=f'CS00{i}', name=f'Student {i}', course=course, academic_year=1)
+                    for i in (1, 2, 3)]
+        db.session.add_all([course, subject, lecturer] + students)
+        db.session.flush()
+        db.session.add(SubjectAssignment(lecturer_id=lecturer.id, subject_id=subject.id, academic_year=2025))
+        db.session.add_all([StudentEnrollment(student_id=student.id, subject_id=subject.id, academic_year=1)
+                            for student in students])
+        db.session.commit()
+        return subject, lecturer, students
+    
+    def _monthly_presents(self, subject, month):
+        db.session.expire_all()
+        return {row.student_id: row.present_count for row in MonthlyStudentAttendance.query.filter_by(
+            subject_id=subject.id, month=month, year=2025)}
+    
+    def test_lecturer_service_monthly_attendance_update_and_insert(self):
+        """Test re-submitting a month updates existing rows and inserts new ones"""
+        subject, lecturer, (first, second, third) = self._create_monthly_attendance_fixture()
+        
+        success, message = LecturerService.record_monthly_attendance_bulk(
+            subject.id, lecturer.id, 1, 2025, 10, {first.id: 8, second.id: 6}
+        )
+        self.assertTrue(success, message)
+        self.assertEqual(self._monthly_presents(subject, 1), {first.id: 8, second.id: 6})
+        
+        success, message = LecturerService.record_monthly_attendance_bulk(
+            subject.id, lecturer.id, 1, 2025, 12, {first.id: 9, second.id: 12, third.id: 4}
+        )
+        self.assertTrue(success, message)
+        self.assertEqual(self._monthly_presents(subject, 1), {first.id: 9, second.id: 12, third.id: 4})
+        self.assertEqual(MonthlyAttendanceSummary.query.filter_by(subject_id=subject.id).one().total_classes, 12)
+        
+        # The next month's cumulative is validated against the previous presents
+        success, message = LecturerService.record_monthly_attendance_bulk(
+            subject.id, lecturer.id, 2, 2025, 20, {first.id: 8, second.id: 21, third.id: 10}
+        )
+        self.assertFalse(success)
+        self.assertIn('2 student(s)', message)
+        self.assertIn('Student 1 (CS001) is too low (minimum is 9)', message)
+        self.assertIn('Student 2 (CS002) is too high (maximum is 20)', message)
+        self.assertEqual(self._monthly_presents(subject, 2), {})
+    
+    def test_lecturer_service_monthly_attendance_rollback(self):
+        """Test a failed batched write leaves the month unchanged"""
+        subject, lecturer, (first, second, third) = self._create_monthly_attendance_fixture()
+        LecturerService.record_monthly_attendance_bulk(
+            subject.id, lecturer.id, 1, 2025, 10, {first.id: 8}
+        )
+        
+        with patch.object(db.session, 'bulk_insert_mappings', side_effect=RuntimeError('disk full')):
+            success, message = LecturerService.record_monthly_attendance_bulk(
+                subject.id, lecturer.id, 1, 2025, 12, {first.id: 11, second.id: 5}
+            )
+        
+        self.assertFalse(success)
+        self.assertIn('disk full', message)
+        self.assertEqual(self._monthly_presents(subject, 1), {first.id: 8})
+        self.assertEqual(MonthlyAttendanceSummary.query.filter_by(subject_id=subject.id).one().total_classes, 10)
+    
+    @staticmethod
+    def _load_sheet(data):
+        """Cell values, fonts, fills, alignment, merges and widths of a generated report sheet"""
+        ws = openpyxl.load_workbook(BytesIO(data)).active
+        cells = [
+            (cell.coordinate, cell.value, cell.font.b, cell.font.sz,
+             cell.font.color.rgb if cell.font.color is not None and cell.font.color.type == 'rgb' else None,
+             cell.fill.fill_type, cell.fill.fgColor.rgb, cell.alignment.horizontal)
+            for row in ws.iter_rows() for cell in row if not isinstance(cell, MergedCell)
+        ]
+        widths = {letter: dim.width for letter, dim in ws.column_dimensions.items()}
+        return ws.title, sorted(map(str, ws.merged_cells.ranges)), widths, cells
+    
+    def test_reporting_service_fast_excel_matches_styled(self):
+        """Test the raw OOXML writer produces the same sheet as the openpyxl path"""
+        info = [('Subject', 'Python Programming'), ('Code', 'PY101'), ('Faculty', 'John Doe')]
+        headers = ['Sl No', 'Roll Number', 'Name', 'Percentage']
+        rows = [[i, f'CS{i:03d}', f'Student {i}', i % 7 * 12.5] for i in range(1, reporting_service.FAST_XLSX_MIN_ROWS + 1)]
+        
+        for data_rows in (rows, []):
+            fast = ReportingService._write_xlsx_fast(None, 'Marks Report', info, headers, data_rows, 6)
+            with patch.object(reporting_service, 'FAST_XLSX_MIN_ROWS', len(rows) + 1):
+                styled = ReportingService._write_subject_report_excel('Marks Report', info, headers, data_rows, 6)
+            self.assertEqual(self._load_sheet(fast), self._load_sheet(styled))
+        
+        # Non-finite numbers become empty cells instead of invalid XML
+        fast = ReportingService._write_xlsx_fast(None, 'Marks Report', info, headers,
+                                                 [[1, 'CS001', float('nan'), float('inf')]], 4)
+        ws = openpyxl.load_workbook(BytesIO(fast)).active
+        self.assertEqual([cell.value for cell in ws[8]], [1, 'CS001', None, None])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
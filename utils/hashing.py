@@ -0,0 +1,56 @@
+"""
+Password hashing utilities for Moulya College Management System
+Argon2id hashing with transparent support for legacy werkzeug hashes
+"""
+
+import secrets
+from werkzeug.security import check_password_hash
+
+# argon2-cffi is a hard requirement: without it every stored Argon2 hash would fail to verify
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+
+ARGON2_PREFIX = '$argon2'
+
+# Argon2id parameters sized to keep a verify well under 250 ms
+password_hasher = PasswordHasher(
+    time_cost=2, memory_cost=19456, parallelism=1, hash_len=32
+)
+
+
+def hash_password(password):
+    """Hash a password with Argon2id"""
+    return password_hasher.hash(password)
+
+
+_dummy_hash = None
+
+
+def verify_dummy(password):
+    """Spend one verify on a throwaway hash so unknown usernames take as long as wrong passwords"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(secrets.token_urlsafe(16))
+    verify_password(_dummy_hash, password or '')
+    return False
+
+
+def verify_password(password_hash, password):
+    """Check a password against an Argon2 or legacy werkzeug hash"""
+    if not password_hash:
+        return False
+    if password_hash.startswith(ARGON2_PREFIX):
+        try:
+            return password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """Whether a verified hash should be upgraded to the current Argon2 parameters"""
+    if not password_hash:
+        return False
+    if not password_hash.startswith(ARGON2_PREFIX):
+        return True
+    return password_hasher.check_needs_rehash(password_hash)
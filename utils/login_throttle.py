@@ -0,0 +1,79 @@
+"""
+Login throttling utilities for Moulya College Management System
+Caches known-bad credential verdicts and rate-limits repeated login failures
+"""
+
+from collections import deque
+import hashlib
+import threading
+import time
+
+# Failed attempts allowed per (client, username) inside the window
+MAX_FAILURES = 5
+FAILURE_WINDOW_SECONDS = 60
+# How long a rejected (username, password) pair is answered from memory
+BAD_VERDICT_TTL_SECONDS = 30
+MAX_ENTRIES = 10000
+
+class LoginThrottle:
+    """In-process login failure tracking"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bad_verdicts = {}
+        self._failures = {}
+
+    @staticmethod
+    def _verdict_key(user_type, username, password):
+        digest = hashlib.blake2b((password or '').encode(), digest_size=16).digest()
+        return user_type, (username or '').lower(), digest
+
+    @staticmethod
+    def _failure_key(client, username):
+        return client or '', (username or '').lower()
+
+    def is_known_bad(self, user_type, username, password):
+        """Check whether these credentials were rejected within the verdict TTL"""
+        key = self._verdict_key(user_type, username, password)
+        with self._lock:
+            expires = self._bad_verdicts.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._bad_verdicts[key]
+                return False
+            return True
+
+    def is_blocked(self, client, username):
+        """Check whether a client has exhausted its failed attempts for a username"""
+        key = self._failure_key(client, username)
+        cutoff = time.monotonic() - FAILURE_WINDOW_SECONDS
+        with self._lock:
+            attempts = self._failures.get(key)
+            if not attempts:
+                return False
+            while attempts and attempts[0] < cutoff:
+                attempts.popleft()
+            if not attempts:
+                del self._failures[key]
+                return False
+            return len(attempts) >= MAX_FAILURES
+
+    def record_failure(self, user_type, client, username, password):
+        """Remember rejected credentials and count the failure against the client"""
+        now = time.monotonic()
+        with self._lock:
+            self._bad_verdicts[self._verdict_key(user_type, username, password)] = now + BAD_VERDICT_TTL_SECONDS
+            self._failures.setdefault(self._failure_key(client, username), deque()).append(now)
+            # Dicts keep insertion order, so the oldest entries go first
+            for store in (self._bad_verdicts, self._failures):
+                while len(store) > MAX_ENTRIES:
+                    del store[next(iter(store))]
+
+    def reset(self, client, username):
+        """Forget failures after a successful login"""
+        with self._lock:
+            self._failures.pop(self._failure_key(client, username), None)
+
+# Global instance
+login_throttle = LoginThrottle()
@@ -0,0 +1,50 @@
+"""
+Caching utilities for Moulya College Management System
+Small in-process cache whose entries expire after a fixed time-to-live
+"""
+
+import threading
+import time
+
+DEFAULT_TTL_SECONDS = 60
+MAX_ENTRIES = 10000
+
+class TTLCache:
+    """Thread-safe key/value cache with per-entry expiry"""
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        """Return the cached value, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        """Store a value for the configured TTL"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            # Dicts keep insertion order, so the oldest entries go first
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def delete(self, key):
+        """Drop a single entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()